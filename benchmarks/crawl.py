@@ -0,0 +1,239 @@
+"""
+End-to-end crawl benchmark against a local mock TCT server.
+
+Runs a cold crawl followed by warm revalidation cycles (with change_rate of
+the items changing between cycles) and reports requests/sec, p50/p99
+latency, bytes downloaded vs saved, CPU time and peak RSS as JSON.
+
+Usage:
+    python -m benchmarks.crawl --items 5000 --cycles 3 --mode async
+    python -m benchmarks.crawl --revalidate --conditional-ratio 0.9
+    python -m benchmarks.crawl --output result.json --baseline previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+if __package__ in (None, ''):
+    # Run as a script (python benchmarks/crawl.py): import from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collab_tunnel import AsyncCollabTunnelCrawler, CollabTunnelCrawler, PooledTransport, __version__  # noqa: E402
+
+from benchmarks.mock_server import MockTCTServer  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class TimedTransport(PooledTransport):
+    """PooledTransport that records the latency of every request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+        self._latency_lock = threading.Lock()
+
+    def _record(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        with self._latency_lock:
+            self.latencies.append(elapsed)
+
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().request(*args, **kwargs)
+        if not kwargs.get('stream'):
+            self._record(start)
+        return response
+
+    def get_body(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = super().get_body(*args, **kwargs)
+        self._record(start)
+        return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def peak_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def crawl_items(items, revalidate: bool):
+    # Without an etag should_fetch() never zero-fetches, so every item is
+    # revalidated with a conditional GET (exercises the 304 path).
+    if revalidate:
+        return [{'mUrl': item['mUrl']} for item in items]
+    return items
+
+
+def crawl_sync(crawler: CollabTunnelCrawler, sitemap_url: str, revalidate: bool) -> None:
+    sitemap = crawler.fetch_sitemap(sitemap_url)
+    for item in crawl_items(sitemap.items, revalidate):
+        if crawler.should_fetch(item):
+            crawler.fetch_content(item['mUrl'], item.get('etag'))
+
+
+async def crawl_async(crawler: AsyncCollabTunnelCrawler, sitemap_url: str, revalidate: bool) -> None:
+    sitemap = await crawler.fetch_sitemap(sitemap_url)
+    async for _ in crawler.crawl(crawl_items(sitemap.items, revalidate)):
+        pass
+
+
+def run_cycle(args, crawler, server: MockTCTServer, transport: TimedTransport) -> Dict[str, Any]:
+    before = dict(crawler.stats)
+    transport.latencies.clear()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+
+    if args.mode == 'async':
+        asyncio.run(crawl_async(crawler, server.sitemap_url, args.revalidate))
+    else:
+        crawl_sync(crawler, server.sitemap_url, args.revalidate)
+
+    elapsed = time.perf_counter() - start
+    latencies = transport.latencies
+    delta = {key: crawler.stats[key] - before.get(key, 0) for key in crawler.stats}
+    return {
+        'cycle': server.cycle,
+        'seconds': round(elapsed, 3),
+        'cpu_seconds': round(time.process_time() - cpu_start, 3),
+        'requests': delta['requests'],
+        'requests_per_second': round(delta['requests'] / elapsed, 1) if elapsed > 0 else 0,
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'latency_p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'bytes_downloaded': delta['bytes_downloaded'],
+        'bytes_decoded': delta['bytes_decoded'],
+        'bytes_saved': delta['bytes_saved'],
+        'not_modified': delta['cache_hits'],
+        'zero_fetches': delta['zero_fetches'],
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    server = MockTCTServer(
+        items=args.items,
+        payload_size=args.payload_size,
+        change_rate=args.change_rate,
+        latency=args.latency,
+        conditional_ratio=args.conditional_ratio,
+        compress=args.compress,
+    )
+    transport = TimedTransport(pool_maxsize=max(args.max_per_host, 1))
+    with server, tempfile.TemporaryDirectory() as cache_dir:
+        if args.mode == 'async':
+            crawler = AsyncCollabTunnelCrawler(
+                cache_dir=cache_dir, transport=transport,
+                max_concurrency=args.concurrency, max_per_host=args.max_per_host
+            )
+        else:
+            crawler = CollabTunnelCrawler(cache_dir=cache_dir, transport=transport)
+
+        cycles = []
+        try:
+            for cycle in range(args.cycles):
+                if cycle:
+                    server.advance()
+                cycles.append(run_cycle(args, crawler, server, transport))
+            stats = crawler.get_stats()
+        finally:
+            crawler.close()
+
+    warm = cycles[1:] or cycles
+    return {
+        'benchmark': 'crawl',
+        'collab_tunnel_version': __version__,
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('output', 'baseline', 'tolerance')},
+        'cycles': cycles,
+        'summary': {
+            'warm_requests_per_second': round(
+                sum(c['requests'] for c in warm) / sum(c['seconds'] for c in warm), 1
+            ) if sum(c['seconds'] for c in warm) > 0 else 0,
+            'warm_latency_p99_ms': max(c['latency_p99_ms'] for c in warm),
+            'bytes_downloaded': stats['bytes_downloaded'],
+            'bytes_decoded': stats['bytes_decoded'],
+            'bytes_saved': stats['bytes_saved'],
+            'savings_percentage': stats['savings_percentage'],
+            'connections_opened': stats['connections_opened'],
+            'cpu_seconds': round(sum(c['cpu_seconds'] for c in cycles), 3),
+            'peak_rss_bytes': peak_rss_bytes(),
+        },
+        'server': dict(server.stats),
+    }
+
+
+def compare(result: Dict[str, Any], baseline_path: str, tolerance: float) -> List[str]:
+    """Return regressions of the warm throughput/latency against a baseline result."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = json.load(fh)['summary']
+    current = result['summary']
+    regressions = []
+    if current['warm_requests_per_second'] < baseline['warm_requests_per_second'] * (1 - tolerance):
+        regressions.append('warm_requests_per_second')
+    if current['warm_latency_p99_ms'] > baseline['warm_latency_p99_ms'] * (1 + tolerance):
+        regressions.append('warm_latency_p99_ms')
+    if current['bytes_downloaded'] > baseline['bytes_downloaded'] * (1 + tolerance):
+        regressions.append('bytes_downloaded')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000, help='sitemap size')
+    parser.add_argument('--payload-size', type=int, default=20000, help='payload content size (chars)')
+    parser.add_argument('--change-rate', type=float, default=0.05, help='fraction changed per cycle')
+    parser.add_argument('--latency', type=float, default=0.0, help='server latency per request (s)')
+    parser.add_argument('--conditional-ratio', type=float, default=1.0,
+                        help='fraction of matching If-None-Match answered with 304')
+    parser.add_argument('--compress', action='store_true', help='server gzips responses')
+    parser.add_argument('--cycles', type=int, default=3, help='crawl cycles (first one is cold)')
+    parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--revalidate', action='store_true',
+                        help='skip zero-fetch and revalidate every item with If-None-Match')
+    parser.add_argument('--concurrency', type=int, default=32, help='async: global concurrency')
+    parser.add_argument('--max-per-host', type=int, default=8, help='async: per-host concurrency')
+    parser.add_argument('--output', help='write the JSON result to this file')
+    parser.add_argument('--baseline', help='compare against a previous JSON result')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative regression against --baseline')
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    if args.baseline:
+        result['regressions'] = compare(result, args.baseline, args.tolerance)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            fh.write(text + '\n')
+    print(text)
+    return 1 if result.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Micro-benchmark and equivalence check for the header compliance checker.
+
+Compares check_headers() / check_header_flags() against the original
+substring-matching implementation: on every combination of common header
+values the verbose results must be identical; the cases where the tokenized
+parser deliberately differs are listed separately. All three are then timed
+on monitoring-like traffic (full header sets, mostly compliant).
+
+Usage:
+    python -m benchmarks.headers [--responses 2000] [--noncompliant 0.1] [--repeat 10]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+if __package__ in (None, ''):
+    # Run as a script (python benchmarks/headers.py): import from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.structures import CaseInsensitiveDict  # noqa: E402
+
+from collab_tunnel.validator import ContentValidator, check_header_flags  # noqa: E402
+
+
+def reference_check_headers(headers):
+    """Original check_headers implementation (v1.0.1 - v2.0.0)."""
+    results = {'compliant': True, 'checks': {}, 'errors': [], 'warnings': []}
+
+    content_type = headers.get('content-type', '').lower()
+    results['checks']['json_content_type'] = 'application/json' in content_type
+    if not results['checks']['json_content_type']:
+        results['errors'].append("Content-Type should be application/json")
+        results['compliant'] = False
+
+    etag = headers.get('etag', '')
+    results['checks']['etag_present'] = bool(etag)
+    results['checks']['etag_format'] = False
+    results['checks']['etag_weak'] = False
+    if etag:
+        if etag.startswith('W/'):
+            results['checks']['etag_weak'] = True
+            results['errors'].append(
+                'Weak ETag not allowed in draft-01. '
+                'M-URLs MUST use strong ETags per Section 6.2.'
+            )
+            results['compliant'] = False
+            etag_clean = etag[2:]
+        else:
+            etag_clean = etag
+        results['checks']['etag_format'] = (
+            etag_clean.startswith('"sha256-') or etag_clean.startswith('sha256-')
+        )
+        if not results['checks']['etag_format']:
+            results['errors'].append("ETag must be 'sha256-<64hex>' format")
+            results['compliant'] = False
+    else:
+        results['errors'].append("ETag header missing")
+        results['compliant'] = False
+
+    link = headers.get('link', '')
+    results['checks']['canonical_link'] = 'rel="canonical"' in link.lower()
+    if not results['checks']['canonical_link']:
+        results['errors'].append("Link header missing rel='canonical'")
+        results['compliant'] = False
+
+    cache_control = headers.get('cache-control', '').lower()
+    results['checks']['must_revalidate'] = 'must-revalidate' in cache_control
+    results['checks']['stale_while_revalidate'] = 'stale-while-revalidate' in cache_control
+    if not results['checks']['must_revalidate']:
+        results['errors'].append("Cache-Control should include must-revalidate")
+
+    vary = headers.get('vary', '').lower()
+    results['checks']['vary_accept_encoding'] = 'accept-encoding' in vary
+    if not results['checks']['vary_accept_encoding']:
+        results['errors'].append("Vary header should include Accept-Encoding")
+
+    return results
+
+
+HASH = 'sha256-' + 'ab12' * 16
+
+VARIANTS = {
+    'content-type': [None, 'application/json', 'application/json; charset=UTF-8',
+                     'Application/JSON;charset=utf-8', 'text/html; charset=utf-8'],
+    'etag': [None, f'"{HASH}"', HASH, f'W/"{HASH}"', '"abc123"'],
+    'link': [None, '<https://example.com/post/1/>; rel="canonical"',
+             '<https://example.com/post/1/>; rel="canonical", <https://example.com/feed/>; rel="alternate"',
+             '<https://example.com/post/1/>; REL="Canonical"', '<https://example.com/>; rel="alternate"'],
+    'cache-control': [None, 'max-age=0, must-revalidate, stale-while-revalidate=60, stale-if-error=86400',
+                      'Max-Age=0, Must-Revalidate', 'no-cache', 'public, max-age=300'],
+    'vary': [None, 'Accept-Encoding', 'accept-encoding, Cookie', 'Accept', 'Origin, Accept-Encoding'],
+}
+
+# Inputs where the tokenized parser intentionally disagrees with substring matching
+DIFFERENCES = {
+    'content-type application/json-seq': {'content-type': 'application/json-seq'},
+    'truncated sha256 ETag': {'etag': '"sha256-abc123"'},
+    'unquoted rel=canonical': {'link': '<https://example.com/post/1/>; rel=canonical'},
+    'multi-valued rel': {'link': '<https://example.com/post/1/>; rel="canonical alternate"'},
+    'directive name prefix': {'cache-control': 'x-no-must-revalidate, max-age=0'},
+    'quoted directive argument': {'cache-control': 'no-cache="must-revalidate, stale-while-revalidate"'},
+    'Vary field name prefix': {'vary': 'X-Accept-Encoding-Hint'},
+    'original-case dict keys': {'Content-Type': 'application/json', 'ETag': f'"{HASH}"'},
+}
+
+
+def make_corpus():
+    """Every combination of the header variants (for the equivalence check)."""
+    return [CaseInsensitiveDict({name: value for name, value in zip(VARIANTS, values) if value is not None})
+            for values in itertools.product(*VARIANTS.values())]
+
+
+def make_traffic(count: int, noncompliant: float, seed: int = 0):
+    """Monitoring-like responses: full header sets, mostly compliant."""
+    rng = random.Random(seed)
+    responses = []
+    for index in range(count):
+        headers = CaseInsensitiveDict({
+            'Date': 'Sat, 18 Oct 2025 12:00:00 GMT',
+            'Server': 'nginx',
+            'Content-Type': 'application/json; charset=UTF-8',
+            'Content-Length': str(rng.randint(2000, 60000)),
+            'Content-Encoding': 'gzip',
+            'ETag': '"sha256-{:064x}"'.format(rng.getrandbits(256)),
+            'Link': f'<https://example.com/post/{index}/>; rel="canonical"',
+            'Cache-Control': 'max-age=0, must-revalidate, stale-while-revalidate=60, stale-if-error=86400',
+            'Vary': 'Accept-Encoding',
+        })
+        if rng.random() < noncompliant:
+            name = rng.choice(list(VARIANTS))
+            value = rng.choice(VARIANTS[name])
+            if value is None:
+                del headers[name]
+            else:
+                headers[name] = value
+        responses.append(headers)
+    return responses
+
+
+def timeit(func, responses, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for headers in responses:
+            func(headers)
+        best = min(best, (time.perf_counter() - start) / len(responses))
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--responses', type=int, default=2000, help='responses per timing run')
+    parser.add_argument('--noncompliant', type=float, default=0.1, help='share of non-compliant responses')
+    parser.add_argument('--repeat', type=int, default=10, help='timing repetitions (best of)')
+    args = parser.parse_args(argv)
+
+    mismatches = [dict(headers) for headers in make_corpus()
+                  if ContentValidator.check_headers(headers) != reference_check_headers(headers)]
+    for headers in mismatches[:5]:
+        print(f"MISMATCH for {headers!r}", file=sys.stderr)
+
+    differences = {}
+    for name, headers in DIFFERENCES.items():
+        before = reference_check_headers(headers)['checks']
+        after = ContentValidator.check_headers(headers)['checks']
+        differences[name] = {check: [before[check], after[check]]
+                             for check in before if before[check] != after[check]}
+
+    responses = make_traffic(args.responses, args.noncompliant)
+    seconds = {
+        'reference': timeit(reference_check_headers, responses, args.repeat),
+        'check_headers': timeit(ContentValidator.check_headers, responses, args.repeat),
+        'check_header_flags': timeit(check_header_flags, responses, args.repeat),
+    }
+    reference = seconds['reference']
+    result = {
+        'benchmark': 'headers',
+        'responses': len(responses),
+        'noncompliant': args.noncompliant,
+        'mismatches': len(mismatches),
+        # check -> [reference, new] for each intentional difference
+        'differences': differences,
+        'timings': {name: {
+            'us_per_call': round(elapsed * 1e6, 3),
+            'speedup_vs_reference': round(reference / elapsed, 2) if elapsed else None,
+        } for name, elapsed in seconds.items()},
+    }
+    print(json.dumps(result, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
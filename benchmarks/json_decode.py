@@ -0,0 +1,113 @@
+"""
+Benchmark of the JSON decoder backends against the stdlib path.
+
+Decodes a generated sitemap and M-URL payloads with every installed decoder
+(stdlib json, orjson, msgspec), both as generic dicts and as typed Payload
+structs, checks that all backends produce the same result, and reports the
+best-of timings and the speedup over the stdlib.
+
+Usage:
+    python -m benchmarks.json_decode [--items 10000] [--payload-size 20000] [--repeat 10]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+if __package__ in (None, ''):
+    # Run as a script (python benchmarks/json_decode.py): import from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collab_tunnel.decoders import available_decoders  # noqa: E402
+
+
+def make_sitemap(items: int) -> bytes:
+    return json.dumps({
+        'version': 1,
+        'profile': 'tct-1',
+        'items': [{
+            'cUrl': f'https://example.com/post/{index}/',
+            'mUrl': f'https://example.com/post/{index}/llm/',
+            'modified': '2025-10-{0:02d}T12:00:00Z'.format(1 + index % 28),
+            'etag': 'sha256-' + format(index, '064x'),
+            'estimatedSize': 20000,
+        } for index in range(items)],
+    }).encode('utf-8')
+
+
+def make_payload(size: int) -> bytes:
+    unit = 'Lorem ipsum dolor sit amet, “quoted” café — naïve text.\n'
+    return json.dumps({
+        'profile': 'tct-1',
+        'canonical_url': 'https://example.com/post/1/',
+        'title': 'Example article',
+        'content': (unit * (size // len(unit) + 1))[:size],
+        'hash': 'sha256-' + '0' * 64,
+    }, ensure_ascii=False).encode('utf-8')
+
+
+def timeit(func, data: bytes, repeat: int, number: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(data)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000, help='sitemap items')
+    parser.add_argument('--payload-size', type=int, default=20000, help='payload content size (chars)')
+    parser.add_argument('--payloads', type=int, default=200, help='payload decodes per timing run')
+    parser.add_argument('--repeat', type=int, default=10, help='timing repetitions (best of)')
+    args = parser.parse_args(argv)
+
+    sitemap = make_sitemap(args.items)
+    payload = make_payload(args.payload_size)
+    decoders = available_decoders()
+    stdlib = decoders['json']
+
+    # Every backend must decode to the same objects as the stdlib
+    mismatches = []
+    expected_sitemap = stdlib.loads(sitemap)
+    expected_payload = stdlib.decode_payload(payload).to_dict()
+    for name, decoder in decoders.items():
+        if decoder.loads(sitemap) != expected_sitemap:
+            mismatches.append(f'{name}: sitemap')
+        if decoder.decode_payload(payload).to_dict() != expected_payload:
+            mismatches.append(f'{name}: typed payload')
+
+    cases = {
+        'sitemap': (lambda decoder: decoder.loads, sitemap, 1),
+        'payload_dict': (lambda decoder: decoder.loads, payload, args.payloads),
+        'payload_typed': (lambda decoder: decoder.decode_payload, payload, args.payloads),
+    }
+    timings = {}
+    for case, (method, data, number) in cases.items():
+        seconds = {name: timeit(method(decoder), data, args.repeat, number)
+                   for name, decoder in decoders.items()}
+        reference = seconds['json']
+        timings[case] = {'bytes': len(data)}
+        for name, elapsed in seconds.items():
+            timings[case][name] = {
+                'ms': round(elapsed * 1000, 4),
+                'mb_per_second': round(len(data) / elapsed / 1e6, 1) if elapsed else None,
+                'speedup_vs_json': round(reference / elapsed, 2) if elapsed else None,
+            }
+
+    result = {
+        'benchmark': 'json_decode',
+        'decoders': list(decoders),
+        'mismatches': mismatches,
+        'timings': timings,
+    }
+    print(json.dumps(result, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Local stand-in TCT server for benchmarks.
+
+Serves /llm-sitemap.json and one M-URL per item (/post/<n>/llm/) with strong
+ETags, conditional 304 handling and Link/Cache-Control/Vary headers, plus the
+matching C-URL HTML pages (/post/<n>/). Sizes, change rate, latency, gzip
+compression and how often conditional requests are honoured are configurable.
+
+Usage:
+    with MockTCTServer(items=1000, change_rate=0.05) as server:
+        crawler.fetch_sitemap(server.sitemap_url)
+        ...
+        server.advance()   # next cycle: change_rate of the items get a new etag
+"""
+
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from collab_tunnel import ContentValidator
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Buffer each response and disable Nagle so small 304s are not delayed
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool):
+        server: 'MockTCTServer' = self.server.mock
+        if server.latency:
+            time.sleep(server.latency)
+
+        path = self.path.split('?', 1)[0]
+        if path == '/llm-sitemap.json':
+            body, etag = server.sitemap()
+            self._send(body, etag, 'application/json', send_body)
+            return
+
+        parts = path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] == 'post' and parts[1].isdigit():
+            index = int(parts[1])
+            if index < server.items:
+                if len(parts) == 3 and parts[2] == 'llm':
+                    body, etag = server.payload(index)
+                    self._send(body, etag, 'application/json', send_body,
+                               canonical=server.c_url(index))
+                    return
+                if len(parts) == 2:
+                    self._send(server.html(index), None, 'text/html; charset=UTF-8', send_body)
+                    return
+
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _send(self, body: bytes, etag: Optional[str], content_type: str,
+              send_body: bool, canonical: Optional[str] = None):
+        server: 'MockTCTServer' = self.server.mock
+        quoted = f'"{etag}"' if etag else None
+        not_modified = (
+            quoted is not None
+            and self.headers.get('If-None-Match') == quoted
+            and server.honour_conditional()
+        )
+
+        encoded = (server.compress and not not_modified
+                   and 'gzip' in self.headers.get('Accept-Encoding', ''))
+        if encoded:
+            body = server.gzip(body)
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header('Content-Type', content_type)
+        if encoded:
+            self.send_header('Content-Encoding', 'gzip')
+        if quoted:
+            self.send_header('ETag', quoted)
+            self.send_header('Cache-Control', 'max-age=0, must-revalidate, stale-while-revalidate=60')
+            self.send_header('Vary', 'Accept-Encoding')
+        if canonical:
+            self.send_header('Link', f'<{canonical}>; rel="canonical"')
+        self.send_header('Content-Length', '0' if not_modified else str(len(body)))
+        self.end_headers()
+        if send_body and not not_modified:
+            self.wfile.write(body)
+        server.count(0 if not_modified else len(body), not_modified)
+
+
+class MockTCTServer:
+    """
+    Threaded HTTP server implementing the TCT endpoints on 127.0.0.1.
+
+    Args:
+        items: Number of sitemap items
+        payload_size: Approximate size of each payload's 'content' in characters
+        change_rate: Fraction of items that get a new etag on each advance()
+        latency: Seconds to sleep before answering each request
+        conditional_ratio: Probability that a matching If-None-Match gets a 304
+            (the rest get a full 200, like servers that ignore validators)
+        seed: Random seed for change selection
+        compress: gzip responses for clients that send Accept-Encoding: gzip
+    """
+
+    def __init__(self,
+                 items: int = 1000,
+                 payload_size: int = 20000,
+                 change_rate: float = 0.05,
+                 latency: float = 0.0,
+                 conditional_ratio: float = 1.0,
+                 seed: int = 0,
+                 compress: bool = False):
+        self.items = items
+        self.payload_size = payload_size
+        self.change_rate = change_rate
+        self.latency = latency
+        self.conditional_ratio = conditional_ratio
+        self.compress = compress
+        self._gzipped: Dict[bytes, bytes] = {}
+        self.cycle = 0
+        self._random = random.Random(seed)
+        self._versions = [0] * items
+        self._hashes: Dict[Tuple[int, int], str] = {}
+        self._sitemap: Optional[Tuple[bytes, str]] = None
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'not_modified': 0, 'bytes_sent': 0}
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def sitemap_url(self) -> str:
+        return f'{self.base_url}/llm-sitemap.json'
+
+    def c_url(self, index: int) -> str:
+        return f'{self.base_url}/post/{index}/'
+
+    def m_url(self, index: int) -> str:
+        return f'{self.base_url}/post/{index}/llm/'
+
+    def start(self) -> 'MockTCTServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockTCTServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def advance(self) -> int:
+        """Start a new cycle, changing change_rate of the items. Returns the number changed."""
+        changed = self._random.sample(range(self.items), int(self.items * self.change_rate))
+        with self._lock:
+            for index in changed:
+                self._versions[index] += 1
+            self._sitemap = None
+            self.cycle += 1
+        return len(changed)
+
+    def honour_conditional(self) -> bool:
+        return self.conditional_ratio >= 1 or self._random.random() < self.conditional_ratio
+
+    def count(self, sent: int, not_modified: bool) -> None:
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_sent'] += sent
+            self.stats['not_modified'] += int(not_modified)
+
+    def gzip(self, body: bytes) -> bytes:
+        compressed = self._gzipped.get(body)
+        if compressed is None:
+            compressed = gzip.compress(body, compresslevel=6, mtime=0)
+            with self._lock:
+                if len(self._gzipped) > 4096:
+                    self._gzipped.clear()
+                self._gzipped[body] = compressed
+        return compressed
+
+    def _content(self, index: int, version: int) -> str:
+        unit = f'Item {index} revision {version}. '
+        return (unit * (self.payload_size // len(unit) + 1))[:self.payload_size]
+
+    def _etag(self, index: int) -> str:
+        key = (index, self._versions[index])
+        etag = self._hashes.get(key)
+        if etag is None:
+            normalized = ContentValidator.normalize_minimal(self._content(*key))
+            etag = 'sha256-' + hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            self._hashes[key] = etag
+        return etag
+
+    def payload(self, index: int) -> Tuple[bytes, str]:
+        etag = self._etag(index)
+        body = json.dumps({
+            'profile': 'tct-1',
+            'canonical_url': self.c_url(index),
+            'title': f'Item {index}',
+            'content': self._content(index, self._versions[index]),
+            'hash': etag,
+        }).encode('utf-8')
+        return body, etag
+
+    def html(self, index: int) -> bytes:
+        return (
+            '<!DOCTYPE html><html><head><title>Item {0}</title>'
+            '<link rel="alternate" type="application/json" href="{1}"></head>'
+            '<body><p>{2}</p></body></html>'
+        ).format(index, self.m_url(index), self._content(index, 0)).encode('utf-8')
+
+    def sitemap(self) -> Tuple[bytes, str]:
+        with self._lock:
+            if self._sitemap is None:
+                size = len(self.payload(0)[0]) if self.items else 0
+                items = [{
+                    'cUrl': self.c_url(index),
+                    'mUrl': self.m_url(index),
+                    'modified': '2025-10-{0:02d}T12:00:00Z'.format(1 + index % 28),
+                    'etag': self._etag(index),
+                    'estimatedSize': size,
+                } for index in range(self.items)]
+                body = json.dumps({'version': 1, 'profile': 'tct-1', 'items': items}).encode('utf-8')
+                self._sitemap = (body, 'sitemap-' + hashlib.sha256(body).hexdigest()[:16])
+            return self._sitemap
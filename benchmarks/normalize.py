@@ -0,0 +1,127 @@
+"""
+Micro-benchmark and equivalence check for ContentValidator.normalize_minimal.
+
+Compares the current implementation against the original per-character
+reference implementation: output must be byte-identical on the inputs from
+test_vectors.json and on generated payloads, then both are timed.
+
+Usage:
+    python -m benchmarks.normalize [--size 200000] [--repeat 20]
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+
+if __package__ in (None, ''):
+    # Run as a script (python benchmarks/normalize.py): import from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collab_tunnel import ContentValidator  # noqa: E402
+
+VECTORS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'test_vectors.json')
+
+
+def reference_normalize(text: str) -> str:
+    """Original normalize_minimal implementation (v1.0.1 - v2.0.0)."""
+    text = html.unescape(text)
+    text = unicodedata.normalize('NFKC', text)
+    text = text.casefold()
+    preserved_cc = {chr(9), chr(10), chr(13)}  # TAB, LF, CR
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Cc' or ch in preserved_cc)
+    text = re.sub(r'[ \t\n\r]+', ' ', text)
+    return text.strip()
+
+
+def vector_inputs():
+    with open(VECTORS_PATH, encoding='utf-8') as fh:
+        vectors = json.load(fh)
+    return [v['input'] for v in vectors.get('normalization_vectors', []) if 'input' in v]
+
+
+def generate(size: int, ascii_only: bool, seed: int = 0) -> str:
+    """Generate an article-like payload of roughly `size` characters."""
+    rng = random.Random(seed)
+    words = ['Lorem', 'ipsum', 'DOLOR', 'sit', 'amet,', 'consectetur', 'adipiscing', 'elit.']
+    # Occasional entities, control characters and whitespace runs
+    rare = ['&amp;', '&lt;', 'tab\there', 'line\nbreak', 'cr\r\nlf', 'form\x0cfeed',
+            '  ', 'x\x00y', '\x1f']
+    if not ascii_only:
+        rare += ['&#x2014;', 'Café', 'ﬁne', 'Straße', '—', ' ', '　',
+                 'Ǆ', '①', '\x85', 'ＡＢＣ']
+    out = []
+    length = 0
+    while length < size:
+        word = rng.choice(rare) if rng.random() < 0.05 else rng.choice(words)
+        out.append(word)
+        length += len(word) + 1
+    return ' '.join(out)
+
+
+def edge_cases():
+    cases = ['', ' ', '\t\n\r', '&', '&amp', '&#133;', '&#x85;', '&nbsp;x&nbsp;',
+             '\x0b\x0c\x1c\x1d\x1e\x1f', 'A\x7fB\x9fC', ' a ', '　a　']
+    rng = random.Random(1)
+    alphabet = [chr(c) for c in range(0, 0x250)] + ['&amp;', '&#xa0;', ' ', '　', 'ﬁ']
+    for _ in range(2000):
+        cases.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))))
+    return cases
+
+
+def check_equivalence(samples) -> int:
+    failures = 0
+    for sample in samples:
+        expected = reference_normalize(sample)
+        actual = ContentValidator.normalize_minimal(sample)
+        if expected.encode('utf-8') != actual.encode('utf-8'):
+            failures += 1
+            print(f"MISMATCH for {sample!r}: {expected!r} != {actual!r}", file=sys.stderr)
+    return failures
+
+
+def timeit(func, text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=200000, help='payload size in characters')
+    parser.add_argument('--repeat', type=int, default=20, help='timing repetitions (best of)')
+    args = parser.parse_args(argv)
+
+    payloads = {
+        'ascii': generate(args.size, ascii_only=True),
+        'unicode': generate(args.size, ascii_only=False),
+    }
+    samples = vector_inputs() + edge_cases() + list(payloads.values())
+    failures = check_equivalence(samples)
+
+    results = {'equivalence': {'samples': len(samples), 'failures': failures}, 'timings': {}}
+    for name, text in payloads.items():
+        reference = timeit(reference_normalize, text, args.repeat)
+        current = timeit(ContentValidator.normalize_minimal, text, args.repeat)
+        results['timings'][name] = {
+            'chars': len(text),
+            'reference_ms': round(reference * 1000, 3),
+            'current_ms': round(current * 1000, 3),
+            'speedup': round(reference / current, 1) if current else None,
+        }
+
+    print(json.dumps(results, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
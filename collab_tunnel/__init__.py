@@ -9,10 +9,87 @@ Collaboration Tunnel Protocol (TCT), achieving 60-90% bandwidth savings
 through sitemap-first discovery and conditional requests.
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 __version__ = '1.0.0'
 
-from .crawler import CollabTunnelCrawler
-from .sitemap import SitemapParser
-from .validator import ContentValidator
+# Public names are imported on first access (PEP 562) so that lightweight
+# entry points such as `collab-tunnel --help` don't pay for importing requests.
+_EXPORTS = {
+    'CollabTunnelCrawler': '.crawler',
+    'AsyncCollabTunnelCrawler': '.async_crawler',
+    'SitemapParser': '.sitemap',
+    'StreamingSitemapParser': '.sitemap',
+    'SitemapDelta': '.delta',
+    'ContentValidator': '.validator',
+    'HeaderCheck': '.validator',
+    'HeaderFlag': '.validator',
+    'check_header_flags': '.validator',
+    'CacheBackend': '.cache',
+    'MemoryCache': '.cache',
+    'SQLiteCache': '.cache',
+    'PooledTransport': '.transport',
+    'PayloadStore': '.store',
+    'MemoryPayloadStore': '.store',
+    'SQLitePayloadStore': '.store',
+    'SitemapSnapshot': '.snapshot',
+    'CacheSnapshot': '.snapshot',
+    'SnapshotCache': '.snapshot',
+    'write_sitemap_snapshot': '.snapshot',
+    'write_cache_snapshot': '.snapshot',
+    'Payload': '.decoders',
+    'SitemapItem': '.records',
+    'CacheEntry': '.records',
+    'FetchPlan': '.planner',
+    'CrawlScheduler': '.scheduler',
+    'HandshakeAuditor': '.handshake',
+    'ComplianceAuditor': '.audit',
+    'Instrumentation': '.instrumentation',
+    'HashRing': '.sharding',
+    'AdaptiveRevalidator': '.revalidation',
+    'ChangeModel': '.revalidation',
+    'ResultSink': '.sinks',
+    'JSONLSink': '.sinks',
+    'CallbackSink': '.sinks',
+    'QueueSink': '.sinks',
+    'pipe': '.sinks',
+    'apipe': '.sinks',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .crawler import CollabTunnelCrawler
+    from .async_crawler import AsyncCollabTunnelCrawler
+    from .audit import ComplianceAuditor
+    from .cache import CacheBackend, MemoryCache, SQLiteCache
+    from .decoders import Payload
+    from .handshake import HandshakeAuditor
+    from .instrumentation import Instrumentation
+    from .planner import FetchPlan
+    from .records import CacheEntry, SitemapItem
+    from .delta import SitemapDelta
+    from .revalidation import AdaptiveRevalidator, ChangeModel
+    from .scheduler import CrawlScheduler
+    from .sharding import HashRing
+    from .sinks import CallbackSink, JSONLSink, QueueSink, ResultSink, apipe, pipe
+    from .sitemap import SitemapParser, StreamingSitemapParser
+    from .snapshot import (CacheSnapshot, SitemapSnapshot, SnapshotCache,
+                           write_cache_snapshot, write_sitemap_snapshot)
+    from .store import MemoryPayloadStore, PayloadStore, SQLitePayloadStore
+    from .transport import PooledTransport
+    from .validator import ContentValidator, HeaderCheck, HeaderFlag, check_header_flags
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['CollabTunnelCrawler', 'SitemapParser', 'ContentValidator']
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,381 @@
+"""
+Asynchronous TCT crawler (draft-jurkovikj-collab-tunnel-01)
+Runs many conditional M-URL fetches concurrently with per-host and global limits.
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from .cache import CacheBackend
+from .crawler import CollabTunnelCrawler
+from .decoders import JSONDecoder
+from .instrumentation import Instrumentation, RequestTrace
+from .sitemap import SitemapParser
+from .store import PayloadStore
+from .transport import PooledTransport
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Allows `rate` acquisitions per second on average with bursts of up to
+    `burst`. Meant to be used from a single event loop.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self) -> float:
+        """Seconds until the next token becomes available."""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while not self.try_acquire():
+            await asyncio.sleep(self.delay())
+
+
+class AsyncCollabTunnelCrawler(CollabTunnelCrawler):
+    """
+    asyncio-based TCT crawler.
+
+    Shares the zero-fetch, cache and stats logic of CollabTunnelCrawler;
+    fetch_sitemap and fetch_content are coroutines, and crawl() yields
+    results as soon as each M-URL fetch completes.
+
+    Example usage:
+        async with AsyncCollabTunnelCrawler(max_concurrency=64) as crawler:
+            sitemap = await crawler.fetch_sitemap("https://example.com/llm-sitemap.json")
+
+            async for item, content in crawler.crawl(sitemap.items):
+                if content is not None:
+                    # Process content...
+                    pass
+    """
+
+    def __init__(self,
+                 user_agent: str = "CollabTunnelCrawler/1.0",
+                 cache_dir: Optional[str] = None,
+                 verify_ssl: bool = True,
+                 cache: Optional[CacheBackend] = None,
+                 transport: Optional[PooledTransport] = None,
+                 max_concurrency: int = 32,
+                 max_per_host: int = 8,
+                 rate_per_host: Optional[float] = None,
+                 decoder: Union[str, JSONDecoder, None] = None,
+                 typed_payloads: bool = False,
+                 compact: bool = False,
+                 instrumentation: Optional[Instrumentation] = None,
+                 payload_store: Optional[PayloadStore] = None):
+        """
+        Initialize the async crawler.
+
+        Args:
+            user_agent: User agent string to identify the crawler
+            cache_dir: Directory for a persistent (SQLite) ETag cache; None,
+                the default, keeps the cache in memory only
+            verify_ssl: Whether to verify SSL certificates
+            cache: Cache backend to use instead of the default store in cache_dir
+            transport: Pooled HTTP transport shared by all requests
+                (defaults to one that keeps max_per_host connections per host)
+            max_concurrency: Maximum number of requests in flight overall
+            max_per_host: Maximum number of requests in flight per host
+            rate_per_host: Maximum requests per second per host (None = unlimited)
+            decoder: JSON decoder (see CollabTunnelCrawler)
+            typed_payloads: Return M-URL payloads as typed Payload structs
+            compact: Keep sitemap items and cache entries as compact records
+            instrumentation: Per-phase latency histograms and event listeners
+                (see CollabTunnelCrawler); time spent waiting for the
+                concurrency and rate limits is recorded as the 'queue' phase
+            payload_store: Content-addressed store for payload bodies (see
+                CollabTunnelCrawler)
+        """
+        if max_concurrency < 1 or max_per_host < 1:
+            raise ValueError("max_concurrency and max_per_host must be >= 1")
+        if transport is None:
+            transport = PooledTransport(pool_maxsize=max_per_host, verify_ssl=verify_ssl)
+        super().__init__(user_agent=user_agent, cache_dir=cache_dir,
+                         verify_ssl=verify_ssl, cache=cache, transport=transport,
+                         decoder=decoder, typed_payloads=typed_payloads, compact=compact,
+                         instrumentation=instrumentation, payload_store=payload_store)
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.rate_per_host = rate_per_host
+        self._rate_limits: Dict[str, TokenBucket] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> 'AsyncCollabTunnelCrawler':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the worker threads, pooled connections and the cache."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        super().close()
+
+    async def _get(self, url: str, headers: Dict[str, str],
+                   timeout: int = 30,
+                   trace: Optional[RequestTrace] = None) -> Tuple[requests.Response, bytearray, int]:
+        """
+        Issue a GET once the per-host, rate and global limits allow it.
+
+        The body is read (and decoded) in the worker thread; returns
+        PooledTransport.get_body()'s (response, body, wire bytes).
+        """
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            # Semaphores are bound to a loop; recreate them if the crawler is
+            # reused from a new one (e.g. successive asyncio.run() calls).
+            self._loop = loop
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._host_limits = {}
+        host = urlsplit(url).netloc
+        host_limit = self._host_limits.get(host)
+        if host_limit is None:
+            host_limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix='collab-tunnel'
+            )
+
+        call = functools.partial(self.transport.get_body, url, headers=headers,
+                                 timeout=timeout, trace=trace)
+        async with host_limit:
+            # Wait for a rate token before taking a global slot, so a
+            # throttled host does not hold capacity other hosts could use
+            if self.rate_per_host:
+                bucket = self._rate_limits.get(host)
+                if bucket is None:
+                    bucket = self._rate_limits[host] = TokenBucket(self.rate_per_host)
+                await bucket.acquire()
+            async with self._global_limit:
+                if trace is not None:
+                    trace.mark('queue')
+                return await loop.run_in_executor(self._executor, call)
+
+    async def fetch_sitemap(self, sitemap_url: str) -> SitemapParser:
+        """
+        Fetch and parse a TCT sitemap (conditionally, like
+        CollabTunnelCrawler.fetch_sitemap).
+
+        Args:
+            sitemap_url: URL to the JSON sitemap (e.g., /llm-sitemap.json)
+
+        Returns:
+            SitemapParser object containing parsed sitemap data
+
+        Raises:
+            requests.RequestException: If sitemap fetch fails
+            ValueError: If sitemap format is invalid
+        """
+        trace = self._start_trace('sitemap', sitemap_url)
+        try:
+            response, body, received = await self._get(
+                sitemap_url, self._sitemap_headers(sitemap_url), trace=trace)
+            parser = self._handle_sitemap_response(sitemap_url, response, body, received, trace)
+        except Exception as exc:
+            if trace is not None:
+                self.instrumentation.finish(trace, exc)
+            raise
+        if trace is not None:
+            self.instrumentation.finish(trace)
+        return parser
+
+    async def fetch_content(self,
+                            m_url: str,
+                            expected_etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch content from M-URL with conditional request per draft-01 Section 8.2
+
+        Args:
+            m_url: Machine-readable endpoint URL
+            expected_etag: Expected etag (from sitemap) to validate the payload hash against
+
+        Returns:
+            Parsed JSON content if fetched, None if 304 Not Modified (the
+            stored payload instead, if the payload_store holds it)
+
+        Raises:
+            requests.RequestException: If request fails
+            ValueError: If content hash doesn't match expected
+        """
+        cached = self.cache.get(m_url)
+        trace = self._start_trace('content', m_url)
+        try:
+            response, body, received = await self._get(m_url, self._content_headers(cached), trace=trace)
+            content = self._handle_content_response(m_url, response, body, received,
+                                                    cached, expected_etag, trace)
+        except Exception as exc:
+            if trace is not None:
+                self.instrumentation.finish(trace, exc)
+            raise
+        if trace is not None:
+            self.instrumentation.finish(trace)
+        return content
+
+    async def _fetch_item(self,
+                          item: Dict[str, Any],
+                          return_exceptions: bool) -> Tuple[Dict[str, Any], Any]:
+        try:
+            return item, await self.fetch_content(item['mUrl'], item.get('etag'))
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            return item, exc
+
+    async def crawl(self,
+                    items: Iterable[Dict[str, Any]],
+                    return_exceptions: bool = False,
+                    include_unchanged: bool = False) -> AsyncIterator[Tuple[Dict[str, Any], Any]]:
+        """
+        Fetch every item that needs fetching, yielding results as they complete.
+
+        Items skipped by the zero-fetch check are not yielded. Only a bounded
+        window of fetches is scheduled at a time, so slow consumers apply
+        backpressure instead of letting tasks pile up.
+
+        Args:
+            items: Sitemap items with 'mUrl' and 'etag' keys
+            return_exceptions: Yield (item, exception) for failed fetches
+                instead of raising
+            include_unchanged: Also yield zero-fetched items, with their
+                payload from the payload_store (items whose body is not
+                stored are fetched); requires a payload_store
+
+        Yields:
+            (item, content) tuples; content is None if 304 Not Modified
+            (unless the payload_store holds the body)
+
+        Raises:
+            ValueError: If include_unchanged is set without a payload_store
+        """
+        if include_unchanged and self.payload_store is None:
+            raise ValueError("include_unchanged requires a payload_store")
+        window = self.max_concurrency * 2
+        source = iter(items)
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                        continue
+                    if not self.should_fetch(item):
+                        content = self.load_content(item['mUrl']) if include_unchanged else None
+                        if content is not None:
+                            yield item, content
+                        if content is not None or not include_unchanged:
+                            continue
+                    pending.add(asyncio.ensure_future(
+                        self._fetch_item(item, return_exceptions)
+                    ))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+# Convenience functions
+async def iter_site_async(sitemap_url: str,
+                          limit: Optional[int] = None,
+                          user_agent: str = "CollabTunnelCrawler/1.0",
+                          max_concurrency: int = 32,
+                          max_per_host: int = 8) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Crawl an entire site concurrently, yielding each payload as it arrives.
+
+    Example:
+        async for result in iter_site_async("https://example.com/llm-sitemap.json"):
+            print(result['title'])
+
+    Args:
+        sitemap_url: URL to sitemap
+        limit: Maximum number of items to crawl (None = all)
+        user_agent: User agent string
+        max_concurrency: Maximum number of requests in flight overall
+        max_per_host: Maximum number of requests in flight per host
+
+    Yields:
+        Crawled content dictionaries (in completion order)
+    """
+    async with AsyncCollabTunnelCrawler(user_agent=user_agent,
+                                        max_concurrency=max_concurrency,
+                                        max_per_host=max_per_host) as crawler:
+        sitemap = await crawler.fetch_sitemap(sitemap_url)
+        items = sitemap.items[:limit] if limit else sitemap.items
+
+        async for _, content in crawler.crawl(items):
+            if content:
+                yield content
+
+        print(f"Crawl complete: {crawler.get_stats()}")
+
+
+async def crawl_site_async(sitemap_url: str,
+                           limit: Optional[int] = None,
+                           user_agent: str = "CollabTunnelCrawler/1.0",
+                           max_concurrency: int = 32,
+                           max_per_host: int = 8) -> List[Dict[str, Any]]:
+    """
+    Crawl an entire site concurrently using TCT protocol.
+
+    Collects every payload in memory; use iter_site_async() to stream
+    large sites.
+
+    Example:
+        results = asyncio.run(crawl_site_async("https://example.com/llm-sitemap.json"))
+
+    Args:
+        sitemap_url: URL to sitemap
+        limit: Maximum number of items to crawl (None = all)
+        user_agent: User agent string
+        max_concurrency: Maximum number of requests in flight overall
+        max_per_host: Maximum number of requests in flight per host
+
+    Returns:
+        List of crawled content dictionaries (in completion order)
+    """
+    return [content async for content in iter_site_async(
+        sitemap_url, limit=limit, user_agent=user_agent,
+        max_concurrency=max_concurrency, max_per_host=max_per_host
+    )]
@@ -0,0 +1,304 @@
+"""
+Bulk TCT compliance auditing (draft-jurkovikj-collab-tunnel-01)
+
+ComplianceAuditor runs the ContentValidator checks over a whole sitemap:
+
+- sitemap_item: item structure (validate_sitemap_item, no request)
+- headers: M-URL response headers (check_headers)
+- etag_parity: sitemap etag == ETag header == payload hash (validate_parity)
+- head_get_parity: HEAD returns the same headers as GET (check_head_get_parity)
+- conditional_304: If-None-Match with the current ETag returns 304 (optional)
+
+Items are checked concurrently over one pooled transport, and each M-URL is
+fetched with a single GET whose headers and body feed every check. On huge
+sites a stratified sample (by host and first path segment) keeps the audit
+short, and the report gives failure rates with 95% confidence intervals.
+"""
+
+import math
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from .validator import ContentValidator
+
+CHECKS = ('sitemap_item', 'request', 'headers', 'etag_parity', 'head_get_parity', 'conditional_304')
+
+
+def _stratum(item: Dict[str, Any]) -> Tuple[str, str]:
+    parts = urlsplit(item.get('mUrl') or item.get('cUrl') or '')
+    return parts.netloc, parts.path.strip('/').split('/', 1)[0]
+
+
+def sample_items(items: Iterable[Dict[str, Any]], size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Draw a stratified random sample of sitemap items.
+
+    Items are grouped by host and first path segment; every group gets at
+    least one item (if size allows) and the rest is allocated in proportion
+    to group size, so small sections of a site are not missed.
+
+    Args:
+        items: Sitemap items
+        size: Sample size
+        seed: Random seed (the same seed gives the same sample)
+
+    Returns:
+        Sampled items, in their original order
+    """
+    items = list(items)
+    if size >= len(items):
+        return items
+    rng = random.Random(seed)
+    strata: Dict[Tuple[str, str], List[int]] = {}
+    for index, item in enumerate(items):
+        strata.setdefault(_stratum(item), []).append(index)
+    groups = list(strata.values())
+
+    if size < len(groups):
+        # Fewer samples than sections: one item from each of `size` random sections
+        chosen = [rng.choice(group) for group in rng.sample(groups, size)]
+    else:
+        # One per section, the remainder proportional to the rest of each section
+        spare = [len(group) - 1 for group in groups]
+        remaining = size - len(groups)
+        shares = [remaining * count / sum(spare) for count in spare]
+        quotas = [1 + int(share) for share in shares]
+        by_fraction = sorted(range(len(groups)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+        for i in by_fraction[:size - sum(quotas)]:
+            quotas[i] += 1
+        chosen = [index for group, quota in zip(groups, quotas) for index in rng.sample(group, quota)]
+    return [items[index] for index in sorted(chosen)]
+
+
+def wilson_interval(failures: int, total: int, z: float = 1.96) -> Tuple[float, float]:
+    """95% Wilson score interval for a failure rate observed in a sample."""
+    if total == 0:
+        return 0.0, 0.0
+    rate = failures / total
+    denominator = 1 + z * z / total
+    centre = (rate + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class ComplianceAuditor:
+    """
+    Audit the TCT compliance of every (or a sample of) sitemap item.
+
+    Example usage:
+        auditor = ComplianceAuditor(crawler, max_workers=8, sample=2000)
+        report = auditor.report(sitemap.items)
+        print(report['compliant'], report['checks'], report['errors'])
+    """
+
+    def __init__(self,
+                 crawler,
+                 max_workers: int = 8,
+                 timeout: float = 10,
+                 fetch: bool = True,
+                 head: bool = True,
+                 conditional: bool = False,
+                 sample: Union[int, float, None] = None,
+                 seed: int = 0):
+        """
+        Args:
+            crawler: CollabTunnelCrawler whose transport, user agent and
+                decoder are used
+            max_workers: Items checked concurrently (keep at or below the
+                transport's pool_maxsize so connections are reused)
+            timeout: Per-request timeout in seconds
+            fetch: Request the M-URLs (False checks sitemap items only)
+            head: Check HEAD/GET parity (one HEAD per item)
+            conditional: Check that If-None-Match returns 304 (one more GET per item)
+            sample: Audit at most this many items (int) or this fraction of
+                them (float between 0 and 1); None audits everything
+            seed: Random seed for sampling
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if isinstance(sample, float) and not 0 < sample <= 1:
+            raise ValueError("a fractional sample must be between 0 and 1")
+        self.crawler = crawler
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.fetch = fetch
+        self.head = head
+        self.conditional = conditional
+        self.sample = sample
+        self.seed = seed
+
+    def _sample_size(self, population: int) -> int:
+        if self.sample is None:
+            return population
+        if isinstance(self.sample, float):
+            return max(1, math.ceil(population * self.sample))
+        return self.sample
+
+    def check(self, item: Dict[str, Any], check_item: bool = True) -> Dict[str, Any]:
+        """
+        Run every check on one item.
+
+        Args:
+            item: Sitemap item (at least 'mUrl')
+            check_item: Validate the sitemap item structure (False for bare
+                M-URLs that did not come from a sitemap)
+
+        Returns:
+            Dict with mUrl, cUrl, etag, compliant, checks (check name ->
+            passed), errors (list of messages) and the detailed results
+            under 'sitemap_item', 'headers' and 'head_get'
+        """
+        m_url = item.get('mUrl')
+        result: Dict[str, Any] = {
+            'mUrl': m_url, 'cUrl': item.get('cUrl'), 'etag': item.get('etag'),
+            'compliant': True, 'checks': {}, 'errors': [],
+        }
+        checks: Dict[str, bool] = result['checks']
+        errors: List[str] = result['errors']
+
+        if check_item:
+            result['sitemap_item'] = ContentValidator.validate_sitemap_item(item)
+            checks['sitemap_item'] = result['sitemap_item']['valid']
+            errors.extend(result['sitemap_item']['errors'])
+
+        if self.fetch and m_url:
+            try:
+                self._check_endpoint(item, result)
+            except requests.RequestException as exc:
+                checks['request'] = False
+                errors.append(f'Request failed: {type(exc).__name__}')
+            except Exception as exc:
+                # Reported for this item, never raised: one bad response must
+                # not abort the whole audit
+                checks['request'] = False
+                errors.append(f'Check failed: {type(exc).__name__}: {exc}')
+
+        result['compliant'] = all(checks.values())
+        return result
+
+    def _check_endpoint(self, item: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """GET (and HEAD) the M-URL once and run the header and parity checks on it."""
+        checks, errors = result['checks'], result['errors']
+        m_url = item['mUrl']
+        headers = {'User-Agent': self.crawler.user_agent}
+        transport = self.crawler.transport
+
+        response = transport.get(m_url, headers=headers, timeout=self.timeout)
+        result['status'] = response.status_code
+        checks['request'] = response.status_code < 400
+        if not checks['request']:
+            errors.append(f'HTTP {response.status_code}')
+            return
+        get_headers = {name.lower(): value for name, value in response.headers.items()}
+
+        result['headers'] = ContentValidator.check_headers(get_headers)
+        checks['headers'] = result['headers']['compliant']
+        errors.extend(result['headers']['errors'])
+
+        try:
+            payload_hash = self.crawler.decoder.loads(response.content).get('hash') or ''
+        except (ValueError, AttributeError):
+            payload_hash = ''
+            errors.append('Payload is not a JSON object')
+        sitemap_etag = item.get('etag') or payload_hash
+        checks['etag_parity'] = bool(payload_hash) and ContentValidator.validate_parity(
+            sitemap_etag, get_headers.get('etag', ''), payload_hash
+        )
+        if not checks['etag_parity']:
+            errors.append('Sitemap etag, ETag header and payload hash differ')
+
+        if self.head:
+            head_response = transport.head(m_url, headers=headers, timeout=self.timeout)
+            result['head_get'] = ContentValidator.check_head_get_parity(get_headers, head_response.headers)
+            checks['head_get_parity'] = result['head_get']['parity']
+            errors.extend(f'HEAD/GET mismatch: {name}' for name in result['head_get']['mismatches'])
+
+        etag = get_headers.get('etag')
+        if self.conditional and etag:
+            conditional = transport.get(m_url, headers=dict(headers, **{'If-None-Match': etag}),
+                                        timeout=self.timeout)
+            checks['conditional_304'] = conditional.status_code == 304
+            if not checks['conditional_304']:
+                errors.append(f'If-None-Match with the current ETag returned {conditional.status_code}, not 304')
+
+    def audit(self, items: Iterable[Dict[str, Any]], check_items: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Check every item (or the configured sample), yielding results as they complete.
+
+        Args:
+            items: Sitemap items
+            check_items: Validate sitemap item structure
+
+        Yields:
+            Result dicts (see check()), in completion order
+        """
+        if self.sample is not None:
+            items = list(items)
+            items = sample_items(items, self._sample_size(len(items)), self.seed)
+        window = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='collab-tunnel-audit') as executor:
+            pending = set()
+            for item in items:
+                pending.add(executor.submit(self.check, item, check_items))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
+
+    def report(self, items: Iterable[Dict[str, Any]], check_items: bool = True,
+               include_results: bool = False) -> Dict[str, Any]:
+        """
+        Audit the items and aggregate the results.
+
+        Args:
+            items: Sitemap items
+            check_items: Validate sitemap item structure
+            include_results: Include every per-item result (by default only
+                non-compliant ones are kept)
+
+        Returns:
+            Dict with population, audited, sampled, compliant,
+            non_compliant, checks (per check: passed, failed, failure_rate
+            and, when sampled, a 95% confidence interval), errors (count
+            per message), elapsed_seconds and results
+        """
+        started = time.perf_counter()
+        items = list(items)
+        report: Dict[str, Any] = {
+            'population': len(items), 'audited': 0, 'sampled': False,
+            'compliant': 0, 'non_compliant': 0, 'checks': {}, 'errors': {}, 'results': [],
+        }
+        counts = {name: [0, 0] for name in CHECKS}
+        for result in self.audit(items, check_items):
+            report['audited'] += 1
+            report['compliant' if result['compliant'] else 'non_compliant'] += 1
+            for name, passed in result['checks'].items():
+                counts[name][0 if passed else 1] += 1
+            for error in result['errors']:
+                report['errors'][error] = report['errors'].get(error, 0) + 1
+            if include_results or not result['compliant']:
+                report['results'].append(result)
+
+        report['sampled'] = report['audited'] < report['population']
+        for name, (passed, failed) in counts.items():
+            if not passed + failed:
+                continue
+            summary = {
+                'passed': passed,
+                'failed': failed,
+                'failure_rate': round(failed / (passed + failed), 4),
+            }
+            if report['sampled']:
+                low, high = wilson_interval(failed, passed + failed)
+                summary['failure_rate_ci95'] = [round(low, 4), round(high, 4)]
+            report['checks'][name] = summary
+        report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return report
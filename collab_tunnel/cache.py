@@ -0,0 +1,227 @@
+"""
+ETag cache backends for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+The crawler keeps one entry per M-URL (ETag, content hash, fetch time and
+size). Backends are plain MutableMappings so any dict-like store can be used.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .records import CacheEntry
+
+_TABLE_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+
+
+class CacheBackend(MutableMapping):
+    """
+    Base class for crawler cache backends.
+
+    Maps M-URL -> cache entry dict. Subclasses implement the MutableMapping
+    methods; close() releases any underlying resources.
+    """
+
+    def get_many(self, m_urls: Iterable[str]) -> Dict[str, Mapping]:
+        """
+        Look up many entries at once (used by bulk fetch planning).
+
+        Args:
+            m_urls: M-URLs to look up
+
+        Returns:
+            Dict of M-URL -> entry for the M-URLs that are cached
+        """
+        entries = {}
+        for m_url in m_urls:
+            entry = self.get(m_url)
+            if entry is not None:
+                entries[m_url] = entry
+        return entries
+
+    def close(self) -> None:
+        """Release resources held by the backend."""
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process cache backend; entries are lost when the process exits.
+
+    With compact=True entries are stored as read-only CacheEntry records
+    (digest ETags, int timestamps) and returned as such.
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self._entries: Dict[str, Mapping] = {}
+
+    def __getitem__(self, m_url: str) -> Mapping:
+        return self._entries[m_url]
+
+    def __setitem__(self, m_url: str, entry: Mapping) -> None:
+        if self.compact:
+            m_url = sys.intern(m_url)
+            if not isinstance(entry, CacheEntry):
+                entry = CacheEntry(entry)
+        self._entries[m_url] = entry
+
+    def __delitem__(self, m_url: str) -> None:
+        del self._entries[m_url]
+
+    def get_many(self, m_urls: Iterable[str]) -> Dict[str, Mapping]:
+        entries = self._entries
+        return {m_url: entries[m_url] for m_url in m_urls if m_url in entries}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Persistent cache backend stored in a single SQLite file.
+
+    The database is opened on first access. Every write is committed
+    immediately (write-through); SQLite's journal guarantees that a crash
+    leaves either the old or the new entry, never a corrupt file.
+
+    With compact=True entries are returned as read-only CacheEntry records
+    (like MemoryCache(compact=True)), so zero-fetch compares digests.
+
+    Example usage:
+        cache = SQLiteCache(".cache/etags.sqlite3")
+        crawler = CollabTunnelCrawler(cache=cache)
+    """
+
+    def __init__(self, path: str, table: str = 'entries', compact: bool = False):
+        """
+        Args:
+            path: Path to the SQLite database file (created if missing)
+            table: Table holding the entries; other tables of the same file
+                can hold unrelated data (see companion_cache)
+            compact: Return entries as CacheEntry records instead of dicts
+
+        Raises:
+            ValueError: If table is not a plain SQL identifier
+        """
+        if not _TABLE_RE.match(table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.compact = compact
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'm_url TEXT PRIMARY KEY, data TEXT NOT NULL)'
+            )
+            self._conn = conn
+        return self._conn
+
+    def _decode(self, data: str) -> Mapping:
+        entry = json.loads(data)
+        return CacheEntry(entry) if self.compact else entry
+
+    def __getitem__(self, m_url: str) -> Mapping:
+        with self._lock:
+            row = self._connect().execute(
+                f'SELECT data FROM {self.table} WHERE m_url = ?', (m_url,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(m_url)
+        return self._decode(row[0])
+
+    def __setitem__(self, m_url: str, entry: Dict[str, Any]) -> None:
+        data = json.dumps(dict(entry), separators=(',', ':'))
+        with self._lock:
+            self._connect().execute(
+                f'INSERT OR REPLACE INTO {self.table} (m_url, data) VALUES (?, ?)',
+                (m_url, data)
+            )
+
+    def get_many(self, m_urls: Iterable[str]) -> Dict[str, Mapping]:
+        urls: List[str] = list(m_urls)
+        rows = []
+        with self._lock:
+            conn = self._connect()
+            # Stay below SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows.extend(conn.execute(
+                    f'SELECT m_url, data FROM {self.table} WHERE m_url IN (%s)' % ','.join('?' * len(chunk)),
+                    chunk
+                ).fetchall())
+        return {m_url: self._decode(data) for m_url, data in rows}
+
+    def __delitem__(self, m_url: str) -> None:
+        with self._lock:
+            cursor = self._connect().execute(f'DELETE FROM {self.table} WHERE m_url = ?', (m_url,))
+        if cursor.rowcount == 0:
+            raise KeyError(m_url)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connect().execute(f'SELECT m_url FROM {self.table}').fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def default_cache(cache_dir: Optional[str], compact: bool = False) -> CacheBackend:
+    """
+    Build the crawler's default cache backend.
+
+    Args:
+        cache_dir: Directory for the persistent store, or None for in-memory only
+        compact: Keep entries as compact CacheEntry records
+
+    Returns:
+        SQLiteCache under cache_dir, or MemoryCache if cache_dir is None
+    """
+    if cache_dir is None:
+        return MemoryCache(compact=compact)
+    return SQLiteCache(os.path.join(cache_dir, 'etags.sqlite3'), compact=compact)
+
+
+def companion_cache(cache: Mapping, table: str) -> CacheBackend:
+    """
+    Build a store for non-M-URL data that lives alongside a crawler cache.
+
+    Sitemap history and handshake results are kept out of the M-URL cache,
+    so len(cache), snapshots and other consumers only ever see M-URL entries.
+
+    Args:
+        cache: The crawler's cache backend
+        table: Table name for the companion data
+
+    Returns:
+        SQLiteCache on another table of the same file if cache is a
+        SQLiteCache, else a MemoryCache
+    """
+    if isinstance(cache, SQLiteCache):
+        return SQLiteCache(cache.path, table=table)
+    return MemoryCache()
@@ -0,0 +1,446 @@
+"""
+Command-line interface for the TCT client (draft-jurkovikj-collab-tunnel-01)
+
+    collab-tunnel crawl https://example.com/llm-sitemap.json -o crawl.jsonl
+    collab-tunnel validate https://example.com/post/llm/
+    collab-tunnel stats https://example.com/llm-sitemap.json
+
+Library modules are imported inside each command so `--help` stays fast.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+DEFAULT_USER_AGENT = "CollabTunnelCrawler/1.0"
+
+
+def _write_json(stream, record: Dict[str, Any]) -> None:
+    stream.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+    stream.flush()
+
+
+def _truncate_torn_line(fh) -> int:
+    """Cut a partially written last line (from a crash); return the new size."""
+    end = fh.seek(0, os.SEEK_END)
+    position = end
+    while position > 0:
+        step = min(8192, position)
+        fh.seek(position - step)
+        newline = fh.read(step).rfind(b'\n')
+        if newline >= 0:
+            position = position - step + newline + 1
+            break
+        position -= step
+    if position != end:
+        fh.truncate(position)
+    return position
+
+
+class _SitemapError(Exception):
+    """The sitemap of a crawl job could not be fetched or parsed."""
+
+
+def _load_checkpoint(output: str, start: int = 0) -> Set[str]:
+    """
+    Return the M-URLs already recorded in a JSONL output file.
+
+    Reads the small '<output>.done' checkpoint (status, output offset and
+    M-URL per record) line by line; the output itself is never parsed. The
+    output is truncated to the offset of the last checkpointed record, so a
+    record that was written but not checkpointed before a crash (or a torn
+    last line) is dropped and fetched again.
+
+    Args:
+        output: JSONL output file
+        start: Size of the output when the job started; nothing before it
+            (earlier, completed crawls) is ever truncated
+    """
+    done: Set[str] = set()
+    offset = start
+    if os.path.exists(output + '.done'):
+        with open(output + '.done', 'rb+') as fh:
+            _truncate_torn_line(fh)
+            fh.seek(0)
+            for line in fh:
+                status, position, m_url = line.decode('utf-8').rstrip('\n').split('\t', 2)
+                offset = max(start, int(position))
+                if status != 'error':
+                    done.add(m_url)
+    if os.path.exists(output) and os.path.getsize(output) > offset:
+        with open(output, 'rb+') as fh:
+            fh.truncate(offset)
+    return done
+
+
+class _CheckpointSink:
+    """JSONLSink wrapper that appends each record's M-URL to '<output>.done'."""
+
+    def __init__(self, output: str):
+        from .sinks import JSONLSink
+        self._stream = open(output, 'a', encoding='utf-8')
+        self._sink = JSONLSink(self._stream)
+        self._done = open(output + '.done', 'a', encoding='utf-8')
+
+    def write(self, item: Dict[str, Any], result: Any) -> None:
+        self._sink.write(item, result)
+        if isinstance(result, BaseException):
+            status = 'error'
+        else:
+            status = 'not_modified' if result is None else 'fetched'
+        # Checkpoint after the record is flushed, with the output size
+        self._done.write(f"{status}\t{self._stream.tell()}\t{item['mUrl']}\n")
+        self._done.flush()
+
+    def __enter__(self) -> '_CheckpointSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._sink.close()
+        self._stream.close()
+        self._done.close()
+
+
+def _read_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(path: str, state: Dict[str, Any]) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh)
+    os.replace(tmp, path)
+
+
+async def _crawl(args) -> Dict[str, Any]:
+    from datetime import datetime
+    import requests
+    from .async_crawler import AsyncCollabTunnelCrawler
+    from .sharding import LOCAL_NAMESPACE, HashRing, shard_cache_dir
+    from .sinks import JSONLSink
+
+    shard, shards = args.shard
+    process, processes = getattr(args, 'process', (0, 1))
+
+    to_stdout = args.output == '-'
+    state_path = None if to_stdout else args.output + '.state'
+    done: Set[str] = set()
+    started_at = None
+
+    if state_path:
+        if args.restart:
+            for path in (args.output, args.output + '.done', state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        # The state file exists only while a crawl job is unfinished
+        state = _read_state(state_path)
+        if state.get('sitemap_url') == args.sitemap_url:
+            done = _load_checkpoint(args.output, state.get('output_offset', 0))
+            started_at = state['started_at']
+        else:
+            if os.path.exists(args.output + '.done'):
+                os.remove(args.output + '.done')
+            # Records are appended: remember where this job's records begin
+            _write_state(state_path, {
+                'sitemap_url': args.sitemap_url,
+                'started_at': datetime.utcnow().isoformat(),
+                'output_offset': os.path.getsize(args.output) if os.path.exists(args.output) else 0,
+            })
+
+    crawler = AsyncCollabTunnelCrawler(
+        user_agent=args.user_agent,
+        cache_dir=shard_cache_dir(args.cache_dir, shard, shards,
+                                  process if processes > 1 else None),
+        verify_ssl=not args.insecure,
+        max_concurrency=args.concurrency,
+        max_per_host=args.per_host,
+        rate_per_host=args.rate,
+    )
+    errors = 0
+    async with crawler:
+        try:
+            sitemap = await crawler.fetch_sitemap(args.sitemap_url)
+        except (requests.RequestException, ValueError) as exc:
+            raise _SitemapError(f"cannot load {args.sitemap_url}: {exc}") from None
+        items = sitemap.items[:args.limit] if args.limit else sitemap.items
+        if shards > 1:
+            items = list(HashRing(shards).filter(items, shard))
+        if processes > 1:
+            # Split this node's own items again, so nodes need not agree on --processes
+            items = list(HashRing(processes, namespace=LOCAL_NAMESPACE).filter(items, process))
+
+        pending = []
+        for item in items:
+            if item['mUrl'] in done:
+                continue
+            if started_at:
+                # Fetched during the interrupted run but never written out:
+                # drop the cache entry so the payload is downloaded again.
+                cached = crawler.cache.get(item['mUrl'])
+                # (fetched_at has whole seconds; compare at that precision)
+                if cached and cached.get('fetched_at', '') >= started_at[:19]:
+                    del crawler.cache[item['mUrl']]
+            pending.append(item)
+
+        with (JSONLSink(sys.stdout) if to_stdout else _CheckpointSink(args.output)) as sink:
+            async for item, result in crawler.crawl(pending, return_exceptions=True):
+                errors += isinstance(result, Exception)
+                sink.write(item, result)
+
+        stats = crawler.get_stats()
+
+    stats['skipped_checkpoint'] = len(items) - len(pending)
+    stats['errors'] = errors
+    if state_path and not errors:
+        os.remove(state_path)
+        os.remove(args.output + '.done')
+    return stats
+
+
+def _crawl_process(args) -> Dict[str, Any]:
+    import asyncio
+    try:
+        return asyncio.run(_crawl(args))
+    except KeyboardInterrupt:
+        return {'errors': 1, 'interrupted': 1}
+
+
+def cmd_crawl(args) -> int:
+    import asyncio
+    try:
+        args.shard = _parse_shard(args.shard)
+    except ValueError as exc:
+        print(f"collab-tunnel crawl: {exc}", file=sys.stderr)
+        return 2
+
+    if args.processes > 1:
+        # Split this node's shard into one part per process (a second, local
+        # ring); each has its own output file, checkpoint and cache directory.
+        import copy
+        import multiprocessing
+        from .sharding import merge_stats
+
+        if args.output == '-':
+            print("collab-tunnel crawl: --processes needs an output file", file=sys.stderr)
+            return 2
+        jobs = []
+        for process in range(args.processes):
+            job = copy.copy(args)
+            job.process = (process, args.processes)
+            job.output = f'{args.output}.{process}-of-{args.processes}'
+            jobs.append(job)
+        with multiprocessing.Pool(args.processes) as pool:
+            try:
+                stats = merge_stats(pool.map(_crawl_process, jobs, chunksize=1))
+            except KeyboardInterrupt:
+                pool.terminate()
+                print("Interrupted; rerun the same command to resume.", file=sys.stderr)
+                return 130
+            except _SitemapError as exc:
+                print(f"collab-tunnel crawl: {exc}", file=sys.stderr)
+                return 1
+    else:
+        try:
+            stats = asyncio.run(_crawl(args))
+        except KeyboardInterrupt:
+            print("Interrupted; rerun the same command to resume.", file=sys.stderr)
+            return 130
+        except _SitemapError as exc:
+            print(f"collab-tunnel crawl: {exc}", file=sys.stderr)
+            return 1
+
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats['errors'] else 0
+
+
+def _parse_shard(spec: Optional[str]):
+    if not spec:
+        return 0, 1
+    from .sharding import parse_shard
+    return parse_shard(spec)
+
+
+def _parse_sample(value: str):
+    """'500' -> at most 500 items, '0.1' -> 10% of the items."""
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def cmd_validate(args) -> int:
+    from .audit import ComplianceAuditor
+    from .crawler import CollabTunnelCrawler
+    from .transport import PooledTransport
+
+    crawler = CollabTunnelCrawler(
+        user_agent=args.user_agent, cache_dir=None, verify_ssl=not args.insecure,
+        transport=PooledTransport(pool_maxsize=args.workers, verify_ssl=not args.insecure)
+    )
+    options = dict(max_workers=args.workers, conditional=args.conditional)
+    failures = 0
+    try:
+        if args.urls:
+            auditor = ComplianceAuditor(crawler, **options)
+            for result in auditor.audit([{'mUrl': url} for url in args.urls], check_items=False):
+                failures += not result['compliant']
+                _write_json(sys.stdout, result)
+        if args.sitemap:
+            sitemap = crawler.fetch_sitemap(args.sitemap)
+            items = sitemap.items[:args.limit] if args.limit else sitemap.items
+            auditor = ComplianceAuditor(crawler, fetch=args.fetch, sample=args.sample,
+                                        seed=args.seed, **options)
+            report = auditor.report(items, include_results=args.all)
+            for result in report.pop('results'):
+                _write_json(sys.stdout, result)
+            failures += report['non_compliant']
+            print(json.dumps(report), file=sys.stderr)
+    finally:
+        crawler.close()
+
+    return 1 if failures else 0
+
+
+def cmd_handshake(args) -> int:
+    from .crawler import CollabTunnelCrawler
+    from .handshake import HandshakeAuditor
+    from .transport import PooledTransport
+
+    crawler = CollabTunnelCrawler(
+        user_agent=args.user_agent, cache_dir=args.cache_dir, verify_ssl=not args.insecure,
+        transport=PooledTransport(pool_maxsize=args.workers, verify_ssl=not args.insecure)
+    )
+    invalid = 0
+    try:
+        sitemap = crawler.fetch_sitemap(args.sitemap_url)
+        items = sitemap.items[:args.limit] if args.limit else sitemap.items
+        report = HandshakeAuditor(crawler, max_workers=args.workers, timeout=args.timeout).report(
+            items, refresh=args.refresh, include_results=args.all
+        )
+        for result in report.pop('results'):
+            _write_json(sys.stdout, result)
+        invalid = report['invalid']
+    finally:
+        crawler.close()
+    print(json.dumps(report), file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def cmd_stats(args) -> int:
+    from .crawler import CollabTunnelCrawler
+
+    crawler = CollabTunnelCrawler(user_agent=args.user_agent, cache_dir=args.cache_dir,
+                                  verify_ssl=not args.insecure)
+    try:
+        sitemap = crawler.fetch_sitemap(args.sitemap_url)
+        plan = crawler.plan(sitemap)
+        result = {
+            'sitemap': sitemap.get_stats(),
+            'cache_entries': len(crawler.cache),
+            'would_fetch': len(plan.to_fetch),
+            'would_skip': len(plan.skip),
+            'plan': plan.get_stats(),
+            'crawler': crawler.get_stats(),
+        }
+    finally:
+        crawler.close()
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from . import __version__
+
+    parser = argparse.ArgumentParser(
+        prog='collab-tunnel',
+        description='Client for the Collaboration Tunnel Protocol (TCT)',
+    )
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--user-agent', default=DEFAULT_USER_AGENT, help='User-Agent header')
+    common.add_argument('--insecure', action='store_true', help='skip TLS certificate verification')
+
+    crawl = subparsers.add_parser(
+        'crawl', parents=[common], help='crawl a site (resumable, JSONL output)',
+        description='Crawl every changed M-URL of a sitemap concurrently, writing one JSON '
+                    'record per line. Rerunning with the same output resumes the crawl.'
+    )
+    crawl.add_argument('sitemap_url', help='URL of the llm-sitemap.json')
+    crawl.add_argument('-o', '--output', default='crawl.jsonl',
+                       help="JSONL output file, also used as checkpoint ('-' for stdout, no resume)")
+    crawl.add_argument('--restart', action='store_true', help='discard previous output and start over')
+    crawl.add_argument('--cache-dir', default='.cache', help='ETag cache directory')
+    crawl.add_argument('--concurrency', type=int, default=32, help='max requests in flight')
+    crawl.add_argument('--per-host', type=int, default=8, help='max requests in flight per host')
+    crawl.add_argument('--rate', type=float, default=None, help='max requests/second per host')
+    crawl.add_argument('--limit', type=int, default=None, help='only crawl the first N items')
+    crawl.add_argument('--shard', metavar='I/N', default=None,
+                       help='only crawl shard I of N (consistent hashing of M-URLs; one per node)')
+    crawl.add_argument('--processes', type=int, default=1,
+                       help="split this node's crawl across this many worker processes")
+    crawl.set_defaults(func=cmd_crawl)
+
+    validate = subparsers.add_parser(
+        'validate', parents=[common], help='check TCT compliance of M-URLs or a sitemap',
+        description='Check headers, HEAD/GET parity and etag parity of M-URLs concurrently. '
+                    'With --sitemap, prints non-compliant items as JSONL and an aggregated '
+                    'report to stderr.'
+    )
+    validate.add_argument('urls', nargs='*', help='M-URLs to check')
+    validate.add_argument('--sitemap', help='validate the items of this sitemap')
+    validate.add_argument('--fetch', action='store_true', help='with --sitemap: also check every M-URL')
+    validate.add_argument('--limit', type=int, default=None, help='only check the first N sitemap items')
+    validate.add_argument('--sample', type=_parse_sample, default=None,
+                          help='with --sitemap: audit a stratified sample (N items, or a fraction like 0.05)')
+    validate.add_argument('--seed', type=int, default=0, help='random seed for --sample')
+    validate.add_argument('--workers', type=int, default=8, help='items checked concurrently')
+    validate.add_argument('--conditional', action='store_true',
+                          help='also check that If-None-Match returns 304')
+    validate.add_argument('--all', action='store_true', help='with --sitemap: print compliant items too')
+    validate.set_defaults(func=cmd_validate)
+
+    handshake = subparsers.add_parser(
+        'handshake', parents=[common], help='verify C-URL/M-URL handshakes of a sitemap',
+        description='Check the alternate link of every C-URL and the canonical Link header of '
+                    'every M-URL concurrently. Prints failing pairs as JSONL and a summary to '
+                    'stderr; results are cached per etag.'
+    )
+    handshake.add_argument('sitemap_url', help='URL of the llm-sitemap.json')
+    handshake.add_argument('--cache-dir', default='.cache', help='cache directory (handshake results)')
+    handshake.add_argument('--workers', type=int, default=8, help='pairs checked concurrently')
+    handshake.add_argument('--timeout', type=float, default=10, help='per-request timeout (seconds)')
+    handshake.add_argument('--limit', type=int, default=None, help='only check the first N items')
+    handshake.add_argument('--refresh', action='store_true', help='ignore cached results')
+    handshake.add_argument('--all', action='store_true', help='print valid pairs too')
+    handshake.set_defaults(func=cmd_handshake)
+
+    stats = subparsers.add_parser(
+        'stats', parents=[common], help='show sitemap and cache statistics',
+        description='Show sitemap statistics and how many items the cache would skip.'
+    )
+    stats.add_argument('sitemap_url', help='URL of the llm-sitemap.json')
+    stats.add_argument('--cache-dir', default='.cache', help='ETag cache directory')
+    stats.set_defaults(func=cmd_stats)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'validate' and not args.urls and not args.sitemap:
+        parser.error('validate: give M-URLs and/or --sitemap')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
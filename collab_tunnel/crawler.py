@@ -6,9 +6,18 @@ Implements efficient web crawling using sitemap-first discovery and conditional
 import requests
 import hashlib
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
 from datetime import datetime
-from .sitemap import SitemapParser
+from .cache import CacheBackend, default_cache
+from .decoders import JSONDecoder, get_decoder
+from .handshake import HandshakeAuditor
+from .instrumentation import Instrumentation, RequestTrace
+from .planner import FetchPlan, plan_fetches
+from .records import etags_match
+from .revalidation import record_check
+from .sitemap import SitemapParser, StreamingSitemapParser
+from .store import PayloadStore, content_key
+from .transport import PooledTransport, wire_bytes
 from .validator import ContentValidator
 
 
@@ -28,32 +37,73 @@ class CollabTunnelCrawler:
 
     def __init__(self,
                  user_agent: str = "CollabTunnelCrawler/1.0",
-                 cache_dir: str = ".cache",
-                 verify_ssl: bool = True):
+                 cache_dir: Optional[str] = None,
+                 verify_ssl: bool = True,
+                 cache: Optional[CacheBackend] = None,
+                 transport: Optional[PooledTransport] = None,
+                 decoder: Union[str, JSONDecoder, None] = None,
+                 typed_payloads: bool = False,
+                 compact: bool = False,
+                 instrumentation: Optional[Instrumentation] = None,
+                 payload_store: Optional[PayloadStore] = None):
         """
         Initialize the crawler.
 
         Args:
             user_agent: User agent string to identify the crawler
-            cache_dir: Directory to store cached content hashes
+            cache_dir: Directory for a persistent (SQLite) ETag cache; None,
+                the default, keeps the cache in memory only
             verify_ssl: Whether to verify SSL certificates
+            cache: Cache backend to use instead of the default store in cache_dir
+            transport: Pooled HTTP transport shared by all requests
+                (defaults to a keep-alive requests session)
+            decoder: JSON decoder for sitemaps and payloads: None or 'json'
+                (stdlib), 'auto' (orjson/msgspec if installed, else stdlib),
+                'orjson', 'msgspec' or a JSONDecoder instance
+            typed_payloads: Return M-URL payloads as typed Payload structs
+                instead of dicts
+            compact: Keep sitemap items and cache entries as compact
+                read-only records (see records.py) instead of dicts
+            instrumentation: Per-phase latency histograms and event listeners
+                for every fetch (None disables timing)
+            payload_store: Content-addressed store that keeps the fetched
+                'content' of payloads, so unchanged content (304 or
+                zero-fetch) can be returned without downloading it again (see
+                store.py). The other payload fields are kept per M-URL in the
+                cache. The store is not closed by close(); it stays the
+                caller's.
         """
         self.user_agent = user_agent
         self.cache_dir = cache_dir
         self.verify_ssl = verify_ssl
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.compact = compact
+        self.cache = cache if cache is not None else default_cache(cache_dir, compact=compact)
+        self.transport = transport if transport is not None else PooledTransport(verify_ssl=verify_ssl)
+        self.decoder = get_decoder(decoder)
+        self.typed_payloads = typed_payloads
+        self.instrumentation = instrumentation
+        self.payload_store = payload_store
         self.stats = {
             'requests': 0,
             'bytes_downloaded': 0,
+            'bytes_decoded': 0,
             'bytes_saved': 0,
             'cache_hits': 0,
-            'zero_fetches': 0
+            'zero_fetches': 0,
+            'sitemap_revalidations': 0,
+            'store_hits': 0
         }
+        # Sitemap URL -> validators and parsed sitemap for conditional refetch
+        self.sitemaps: Dict[str, Dict[str, Any]] = {}
 
     def fetch_sitemap(self, sitemap_url: str) -> SitemapParser:
         """
         Fetch and parse a TCT sitemap.
 
+        Repeat fetches of the same sitemap are conditional (If-None-Match /
+        If-Modified-Since); on 304 Not Modified the previously parsed sitemap
+        is returned without downloading it again.
+
         Args:
             sitemap_url: URL to the JSON sitemap (e.g., /llm-sitemap.json)
 
@@ -64,19 +114,121 @@ class CollabTunnelCrawler:
             requests.RequestException: If sitemap fetch fails
             ValueError: If sitemap format is invalid
         """
-        response = requests.get(
+        trace = self._start_trace('sitemap', sitemap_url)
+        try:
+            response, body, received = self.transport.get_body(
+                sitemap_url,
+                headers=self._sitemap_headers(sitemap_url),
+                timeout=30,
+                trace=trace
+            )
+            parser = self._handle_sitemap_response(sitemap_url, response, body, received, trace)
+        except Exception as exc:
+            if trace is not None:
+                self.instrumentation.finish(trace, exc)
+            raise
+        if trace is not None:
+            self.instrumentation.finish(trace)
+        return parser
+
+    def _start_trace(self, kind: str, url: str) -> Optional[RequestTrace]:
+        """Begin timing a fetch, or return None when instrumentation is off."""
+        if self.instrumentation is None:
+            return None
+        return self.instrumentation.start(kind, url)
+
+    def _sitemap_headers(self, sitemap_url: str) -> Dict[str, str]:
+        """Build request headers for a sitemap fetch, adding validators if known."""
+        headers = {'User-Agent': self.user_agent}
+        cached = self.sitemaps.get(sitemap_url)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def _handle_sitemap_response(self,
+                                 sitemap_url: str,
+                                 response: requests.Response,
+                                 body: bytes,
+                                 received: int,
+                                 trace: Optional[RequestTrace] = None) -> SitemapParser:
+        """Apply the conditional-request outcome of a sitemap response."""
+        self.stats['requests'] += 1
+
+        cached = self.sitemaps.get(sitemap_url)
+        if response.status_code == 304 and cached:
+            self.stats['sitemap_revalidations'] += 1
+            self.stats['bytes_saved'] += cached['size']
+            return cached['parser']
+
+        response.raise_for_status()
+
+        size = received
+        self.stats['bytes_downloaded'] += size
+        self.stats['bytes_decoded'] += len(body)
+
+        data = self.decoder.loads(body)
+        if trace is not None:
+            trace.mark('parse')
+        parser = SitemapParser(data, compact=self.compact)
+        if trace is not None:
+            trace.mark('validate')
+        self.sitemaps[sitemap_url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'parser': parser,
+            'size': size
+        }
+        return parser
+
+    def iter_sitemap(self, sitemap_url: str, chunk_size: int = 65536) -> StreamingSitemapParser:
+        """
+        Fetch a TCT sitemap as a stream of validated items.
+
+        Unlike fetch_sitemap, the body is never held in memory as a whole:
+        items are parsed from the response stream and yielded one by one, so
+        fetching can start as soon as the first item arrives.
+
+        Args:
+            sitemap_url: URL to the JSON sitemap (e.g., /llm-sitemap.json)
+            chunk_size: Number of bytes to read from the stream at a time
+
+        Returns:
+            StreamingSitemapParser yielding sitemap items
+
+        Raises:
+            requests.RequestException: If sitemap fetch fails
+            ValueError: If sitemap format is invalid (raised during iteration)
+        """
+        response = self.transport.get(
             sitemap_url,
             headers={'User-Agent': self.user_agent},
-            verify=self.verify_ssl,
-            timeout=30
+            timeout=30,
+            stream=True
         )
-        response.raise_for_status()
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
 
         self.stats['requests'] += 1
-        self.stats['bytes_downloaded'] += len(response.content)
-
-        sitemap_data = response.json()
-        return SitemapParser(sitemap_data)
+        return StreamingSitemapParser(self._count_chunks(response, chunk_size))
+
+    def _count_chunks(self, response: requests.Response, chunk_size: int):
+        """Yield decoded response body chunks, tracking decoded and wire bytes."""
+        decoded = 0
+        try:
+            for chunk in response.iter_content(chunk_size):
+                decoded += len(chunk)
+                self.stats['bytes_decoded'] += len(chunk)
+                yield chunk
+        finally:
+            received = wire_bytes(response)
+            self.stats['bytes_downloaded'] += decoded if received is None else received
+            response.close()
 
     def should_fetch(self, item: Dict[str, Any]) -> bool:
         """
@@ -101,7 +253,11 @@ class CollabTunnelCrawler:
         if not cached:
             return True  # Not in cache, need to fetch
 
-        if cached.get('etag') == new_etag:
+        matches = etags_match(item, cached)
+        if matches is None:
+            cached_etag = cached.get('etag')
+            matches = bool(cached_etag) and self._hashes_match(cached_etag, new_etag)
+        if matches:
             # ETag matches! Zero-fetch optimization (Section 8.1)
             self.stats['zero_fetches'] += 1
             self.stats['bytes_saved'] += cached.get('estimated_size', 30000)
@@ -109,6 +265,35 @@ class CollabTunnelCrawler:
 
         return True  # ETag changed, need to fetch
 
+    def plan(self,
+             sitemap: Union[SitemapParser, Iterable[Dict[str, Any]]],
+             record_stats: bool = True) -> FetchPlan:
+        """
+        Apply the zero-fetch check to a whole sitemap at once.
+
+        Equivalent to calling should_fetch() on every item, but the cache is
+        queried in bulk and stats are updated once, so planning stays fast
+        for sitemaps with hundreds of thousands of items.
+
+        Example:
+            plan = crawler.plan(sitemap)
+            for item, content in crawler.crawl(plan.to_fetch):
+                ...
+
+        Args:
+            sitemap: SitemapParser or iterable of sitemap items
+            record_stats: Count skipped items as zero-fetches in get_stats()
+
+        Returns:
+            FetchPlan with fetch / revalidate / skip item lists
+        """
+        items = sitemap.items if isinstance(sitemap, SitemapParser) else sitemap
+        plan = plan_fetches(items, self.cache)
+        if record_stats:
+            self.stats['zero_fetches'] += len(plan.skip)
+            self.stats['bytes_saved'] += plan.saved_bytes
+        return plan
+
     def fetch_content(self,
                      m_url: str,
                      expected_etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -117,64 +302,201 @@ class CollabTunnelCrawler:
 
         Args:
             m_url: Machine-readable endpoint URL
-            expected_hash: Expected content hash (from sitemap) for validation
+            expected_etag: Expected etag (from sitemap) to validate the payload hash against
 
         Returns:
-            Parsed JSON content if fetched, None if 304 Not Modified
+            Parsed JSON content (a Payload with typed_payloads) if fetched,
+            None if 304 Not Modified (the stored payload instead, if the
+            payload_store holds it)
 
         Raises:
             requests.RequestException: If request fails
             ValueError: If content hash doesn't match expected
         """
-        headers = {'User-Agent': self.user_agent}
-
-        # Add If-None-Match header if we have cached ETag
         cached = self.cache.get(m_url)
-        if cached and 'etag' in cached:
-            headers['If-None-Match'] = cached['etag']
-
-        response = requests.get(
-            m_url,
-            headers=headers,
-            verify=self.verify_ssl,
-            timeout=30
-        )
+        trace = self._start_trace('content', m_url)
+        try:
+            response, body, received = self.transport.get_body(
+                m_url,
+                headers=self._content_headers(cached),
+                timeout=30,
+                trace=trace
+            )
+            content = self._handle_content_response(m_url, response, body, received,
+                                                    cached, expected_etag, trace)
+        except Exception as exc:
+            if trace is not None:
+                self.instrumentation.finish(trace, exc)
+            raise
+        if trace is not None:
+            self.instrumentation.finish(trace)
+        return content
+
+    def crawl(self,
+              items: Iterable[Dict[str, Any]],
+              return_exceptions: bool = False,
+              include_unchanged: bool = False) -> Iterator[Tuple[Dict[str, Any], Any]]:
+        """
+        Fetch every item that needs fetching, yielding each result as soon as it arrives.
+
+        Items skipped by the zero-fetch check are not yielded. Items are
+        fetched lazily, one at a time, so only the current payload is held in
+        memory and a slow consumer simply slows the crawl down.
+
+        Args:
+            items: Sitemap items with 'mUrl' and 'etag' keys (any iterable,
+                e.g. iter_sitemap())
+            return_exceptions: Yield (item, exception) for failed fetches
+                instead of raising
+            include_unchanged: Also yield zero-fetched items, with their
+                payload from the payload_store (items whose body is not
+                stored are fetched); requires a payload_store
+
+        Yields:
+            (item, content) tuples; content is None if 304 Not Modified
+            (unless the payload_store holds the body)
+
+        Raises:
+            ValueError: If include_unchanged is set without a payload_store
+        """
+        if include_unchanged and self.payload_store is None:
+            raise ValueError("include_unchanged requires a payload_store")
+        for item in items:
+            if not self.should_fetch(item):
+                content = self.load_content(item['mUrl']) if include_unchanged else None
+                if content is not None:
+                    yield item, content
+                if content is not None or not include_unchanged:
+                    continue
+            try:
+                content = self.fetch_content(item['mUrl'], item.get('etag'))
+            except Exception as exc:
+                if not return_exceptions:
+                    raise
+                content = exc
+            yield item, content
+
+    def load_content(self, m_url: str) -> Any:
+        """
+        Return the stored payload of the cached version of an M-URL.
 
+        Args:
+            m_url: Machine-readable endpoint URL
+
+        Returns:
+            Parsed payload (a Payload with typed_payloads), or None if there
+            is no payload_store, the M-URL is not cached or its body is not
+            stored
+        """
+        if self.payload_store is None:
+            return None
+        return self._stored_content(self.cache.get(m_url))
+
+    def _stored_key(self, cached: Optional[Dict[str, Any]]) -> Optional[str]:
+        # Only entries that kept their per-URL payload fields can be rebuilt
+        if not cached or cached.get('payload_fields') is None:
+            return None
+        return content_key(cached.get('contentHash')) or content_key(cached.get('etag'))
+
+    def _stored_content(self, cached: Optional[Dict[str, Any]]) -> Any:
+        body = self.payload_store.get(self._stored_key(cached))
+        if body is None:
+            return None
+        self.stats['store_hits'] += 1
+        # Shared content from the store, metadata (canonical_url, title, ...)
+        # from this M-URL's own cache entry
+        payload = dict(cached['payload_fields'])
+        payload['content'] = body.decode('utf-8')
+        return self.decoder.payload_from_dict(payload) if self.typed_payloads else payload
+
+    def _content_headers(self, cached: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build request headers for an M-URL fetch, adding If-None-Match if cached."""
+        headers = {'User-Agent': self.user_agent}
+        if cached and cached.get('etag'):
+            # With a payload store, a 304 is only useful if the body is stored
+            if self.payload_store is None or self._stored_key(cached) in self.payload_store:
+                headers['If-None-Match'] = cached['etag']
+        return headers
+
+    def _handle_content_response(self,
+                                 m_url: str,
+                                 response: requests.Response,
+                                 body: bytes,
+                                 received: int,
+                                 cached: Optional[Dict[str, Any]],
+                                 expected_etag: Optional[str],
+                                 trace: Optional[RequestTrace] = None) -> Optional[Dict[str, Any]]:
+        """
+        Apply the conditional-request outcome of an M-URL response.
+
+        Shared by the sync and async crawlers so both account stats and update
+        the cache identically.
+        """
         self.stats['requests'] += 1
 
         # Handle 304 Not Modified
         if response.status_code == 304:
             self.stats['cache_hits'] += 1
-            self.stats['bytes_saved'] += cached.get('estimated_size', 30000)
+            self.stats['bytes_saved'] += (cached or {}).get('estimated_size', 30000)
+            if cached is not None:
+                # Keep the change history used for adaptive revalidation
+                self.cache[m_url] = record_check(dict(cached), changed=False)
+            if self.payload_store is not None:
+                return self._stored_content(cached)
             return None  # Content unchanged
 
         response.raise_for_status()
 
-        # Track bandwidth
-        content_length = len(response.content)
+        # Track bandwidth: bytes on the wire (possibly compressed) and decoded
+        content_length = received
         self.stats['bytes_downloaded'] += content_length
+        self.stats['bytes_decoded'] += len(body)
 
         # Get ETag for caching
         etag = response.headers.get('ETag')
 
         # Parse JSON content
-        content = response.json()
+        if self.typed_payloads:
+            content = self.decoder.decode_payload(body)
+        else:
+            content = self.decoder.loads(body)
+        if trace is not None:
+            trace.mark('parse')
 
         # Validate content hash if provided
-        if expected_hash:
+        if expected_etag:
             actual_hash = content.get('hash')
-            if actual_hash and not self._hashes_match(expected_hash, actual_hash):
+            if actual_hash and not self._hashes_match(expected_etag, actual_hash):
                 raise ValueError(
-                    f"Content hash mismatch: expected {expected_hash}, got {actual_hash}"
+                    f"Content hash mismatch: expected {expected_etag}, got {actual_hash}"
                 )
-
-        # Update cache
-        self.cache[m_url] = {
+        if trace is not None:
+            trace.mark('validate')
+
+        # Update cache, carrying over the change history
+        entry = {key: value for key, value in (cached or {}).items()
+                 if key in ('first_checked', 'checks', 'changes', 'last_changed', 'last_checked')}
+        changed = bool(cached) and not self._hashes_match(
+            cached.get('etag') or cached.get('contentHash') or '',
+            etag or content.get('hash') or ''
+        )
+        entry.update({
             'etag': etag,
-            'contentHash': expected_hash or content.get('hash'),
-            'fetched_at': datetime.utcnow().isoformat(),
+            'contentHash': expected_etag or content.get('hash'),
+            'fetched_at': datetime.utcnow().replace(microsecond=0).isoformat(),
             'estimated_size': content_length
-        }
+        })
+        if self.payload_store is not None:
+            # Only the hashed 'content' is shared (stored once per hash); the
+            # rest of the payload belongs to this M-URL and stays in its entry
+            key = content_key(entry['contentHash']) or content_key(etag)
+            fields = content.to_dict() if self.typed_payloads else content
+            text = fields.get('content') if isinstance(fields, dict) else None
+            if key is not None and isinstance(text, str):
+                self.payload_store.put(key, text.encode('utf-8'))
+                entry['payload_fields'] = {name: value for name, value in fields.items()
+                                           if name != 'content'}
+        self.cache[m_url] = record_check(entry, changed)
 
         return content
 
@@ -186,6 +508,9 @@ class CollabTunnelCrawler:
         1. C-URL HTML contains <link rel="alternate" href="M-URL">
         2. M-URL headers contain Link: <C-URL>; rel="canonical"
 
+        Only the C-URL's <head> is read. Use HandshakeAuditor to check many
+        pairs concurrently and get a detailed report.
+
         Args:
             c_url: Canonical URL
             m_url: Machine-readable URL
@@ -193,21 +518,7 @@ class CollabTunnelCrawler:
         Returns:
             True if handshake is valid, False otherwise
         """
-        # Check C-URL → M-URL link
-        c_response = requests.get(c_url, headers={'User-Agent': self.user_agent})
-        c_html = c_response.text
-
-        if f'href="{m_url}"' not in c_html or 'rel="alternate"' not in c_html:
-            return False
-
-        # Check M-URL → C-URL link
-        m_response = requests.head(m_url, headers={'User-Agent': self.user_agent})
-        link_header = m_response.headers.get('Link', '')
-
-        if f'<{c_url}>' not in link_header or 'rel="canonical"' not in link_header:
-            return False
-
-        return True
+        return HandshakeAuditor(self).check(c_url, m_url)['valid']
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -218,17 +529,31 @@ class CollabTunnelCrawler:
         """
         total_bytes = self.stats['bytes_downloaded'] + self.stats['bytes_saved']
         savings_pct = (self.stats['bytes_saved'] / total_bytes * 100) if total_bytes > 0 else 0
+        decoded = self.stats['bytes_decoded']
+        compression_pct = (1 - self.stats['bytes_downloaded'] / decoded) * 100 if decoded > 0 else 0
+        connections = self.transport.connection_stats()
 
         return {
             'requests': self.stats['requests'],
             'bytes_downloaded': self.stats['bytes_downloaded'],
+            'bytes_decoded': self.stats['bytes_decoded'],
             'bytes_saved': self.stats['bytes_saved'],
             'savings_percentage': round(savings_pct, 1),
+            'compression_savings_percentage': round(compression_pct, 1),
             'cache_hits_304': self.stats['cache_hits'],
             'zero_fetches': self.stats['zero_fetches'],
-            'total_skips': self.stats['cache_hits'] + self.stats['zero_fetches']
+            'sitemap_revalidations_304': self.stats['sitemap_revalidations'],
+            'store_hits': self.stats['store_hits'],
+            'total_skips': self.stats['cache_hits'] + self.stats['zero_fetches'],
+            'connections_opened': connections['connections_opened'],
+            'connections_reused': connections['connections_reused']
         }
 
+    def close(self) -> None:
+        """Close pooled connections and the cache backend (not the payload store)."""
+        self.transport.close()
+        self.cache.close()
+
     def _hashes_match(self, hash1: str, hash2: str) -> bool:
         """Compare two hashes, handling different formats (with/without sha256- prefix)."""
         h1 = hash1.replace('sha256-', '').replace('"', '')
@@ -236,13 +561,48 @@ class CollabTunnelCrawler:
         return h1 == h2
 
 
-# Convenience function
+# Convenience functions
+def iter_site(sitemap_url: str,
+              limit: Optional[int] = None,
+              user_agent: str = "CollabTunnelCrawler/1.0") -> Iterator[Dict[str, Any]]:
+    """
+    Crawl an entire site using TCT protocol, yielding each payload as it arrives.
+
+    Example:
+        for result in iter_site("https://example.com/llm-sitemap.json"):
+            print(result['title'], result['content'][:100])
+
+    Args:
+        sitemap_url: URL to sitemap
+        limit: Maximum number of items to crawl (None = all)
+        user_agent: User agent string
+
+    Yields:
+        Crawled content dictionaries (unchanged items are skipped)
+    """
+    crawler = CollabTunnelCrawler(user_agent=user_agent)
+    try:
+        sitemap = crawler.fetch_sitemap(sitemap_url)
+        items = sitemap.items[:limit] if limit else sitemap.items
+
+        for _, content in crawler.crawl(items):
+            if content:
+                yield content
+
+        print(f"Crawl complete: {crawler.get_stats()}")
+    finally:
+        crawler.close()
+
+
 def crawl_site(sitemap_url: str,
                limit: Optional[int] = None,
                user_agent: str = "CollabTunnelCrawler/1.0") -> List[Dict[str, Any]]:
     """
     Crawl an entire site using TCT protocol.
 
+    Collects every payload in memory; use iter_site() or
+    CollabTunnelCrawler.crawl() with a sink to stream large sites.
+
     Example:
         results = crawl_site("https://example.com/llm-sitemap.json", limit=100)
         for result in results:
@@ -256,17 +616,4 @@ def crawl_site(sitemap_url: str,
     Returns:
         List of crawled content dictionaries
     """
-    crawler = CollabTunnelCrawler(user_agent=user_agent)
-    sitemap = crawler.fetch_sitemap(sitemap_url)
-
-    results = []
-    items = sitemap.items[:limit] if limit else sitemap.items
-
-    for item in items:
-        if crawler.should_fetch(item):
-            content = crawler.fetch_content(item['mUrl'], item.get('contentHash'))
-            if content:
-                results.append(content)
-
-    print(f"Crawl complete: {crawler.get_stats()}")
-    return results
+    return list(iter_site(sitemap_url, limit=limit, user_agent=user_agent))
@@ -0,0 +1,228 @@
+"""
+Pluggable JSON decoders for sitemaps and M-URL payloads (draft-jurkovikj-collab-tunnel-01)
+
+JSON decoding is the main CPU cost of a crawl after TLS. The standard
+library is the default; get_decoder('auto') picks the fastest installed
+backend (orjson, then msgspec) instead, so the optional dependencies are
+never required:
+
+    pip install orjson     # or: pip install msgspec
+
+The fast backends accept slightly different input than the stdlib: they
+reject NaN/Infinity, integers beyond 64 bits and bodies that are not valid
+UTF-8. That is why auto-detection is opt-in.
+
+Decoders can also turn an M-URL payload straight into a typed Payload
+(profile, canonical_url, title, content, hash) instead of a generic dict;
+with msgspec this skips building the intermediate dict entirely.
+"""
+
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # optional: pip install msgspec
+    msgspec = None
+
+PAYLOAD_FIELDS = ('profile', 'canonical_url', 'title', 'content', 'hash')
+
+
+class Payload:
+    """
+    Typed M-URL payload.
+
+    Only the protocol fields are kept. Supports the read-only dict access the
+    crawler relies on (payload['hash'], payload.get('title')) and to_dict().
+    Every field must be a string or null, as with the msgspec decoder.
+    """
+
+    __slots__ = PAYLOAD_FIELDS
+
+    def __init__(self,
+                 profile: Optional[str] = None,
+                 canonical_url: Optional[str] = None,
+                 title: str = '',
+                 content: str = '',
+                 hash: str = ''):
+        self.profile = profile
+        self.canonical_url = canonical_url
+        self.title = title
+        self.content = content
+        self.hash = hash
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Payload':
+        if not isinstance(data, dict):
+            raise ValueError("M-URL payload must be a JSON object")
+        for field in PAYLOAD_FIELDS:
+            value = data.get(field)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"M-URL payload field {field!r} must be a string or null")
+        return cls(
+            profile=data.get('profile'),
+            canonical_url=data.get('canonical_url'),
+            title=data.get('title', ''),
+            content=data.get('content', ''),
+            hash=data.get('hash', ''),
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in PAYLOAD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if key in PAYLOAD_FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in PAYLOAD_FIELDS}
+
+    def __eq__(self, other: object) -> bool:
+        if not hasattr(other, 'to_dict'):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Payload(title={self.title!r}, hash={self.hash!r}, content=<{len(self.content)} chars>)"
+
+
+class JSONDecoder:
+    """
+    Base JSON decoder backed by the standard library.
+
+    Subclasses override loads() (and decode_payload() where the backend can
+    decode into a typed struct directly).
+    """
+
+    name = 'json'
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        """Decode a JSON document into Python objects."""
+        return json.loads(data)
+
+    def decode_payload(self, data: Union[bytes, bytearray, str]) -> Payload:
+        """Decode an M-URL payload into a typed Payload."""
+        return self.payload_from_dict(self.loads(data))
+
+    def payload_from_dict(self, data: Dict[str, Any]) -> Payload:
+        """Build the typed Payload of an already decoded payload dict."""
+        return Payload.from_dict(data)
+
+
+class OrjsonDecoder(JSONDecoder):
+    """Decoder using orjson (pip install orjson)."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        return self._loads(data)
+
+
+if msgspec is not None:
+    class MsgspecPayload(msgspec.Struct):
+        """Payload decoded directly by msgspec (same interface as Payload)."""
+
+        profile: Optional[str] = None
+        canonical_url: Optional[str] = None
+        title: Optional[str] = ''
+        content: Optional[str] = ''
+        hash: Optional[str] = ''
+
+        def __getitem__(self, key: str) -> Any:
+            if key not in PAYLOAD_FIELDS:
+                raise KeyError(key)
+            return getattr(self, key)
+
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, None) if key in PAYLOAD_FIELDS else None
+            return default if value is None else value
+
+        def to_dict(self) -> Dict[str, Any]:
+            return {field: getattr(self, field) for field in PAYLOAD_FIELDS}
+
+
+class MsgspecDecoder(JSONDecoder):
+    """Decoder using msgspec (pip install msgspec); payloads decode straight into structs."""
+
+    name = 'msgspec'
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("the msgspec decoder requires msgspec: pip install msgspec")
+        self._decoder = msgspec.json.Decoder()
+        self._payload_decoder = msgspec.json.Decoder(MsgspecPayload)
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as exc:
+            raise ValueError(str(exc)) from exc
+
+    def decode_payload(self, data: Union[bytes, bytearray, str]):
+        try:
+            return self._payload_decoder.decode(data)
+        except msgspec.DecodeError as exc:
+            raise ValueError(str(exc)) from exc
+
+    def payload_from_dict(self, data: Dict[str, Any]):
+        try:
+            return msgspec.convert(data, MsgspecPayload)
+        except msgspec.ValidationError as exc:
+            raise ValueError(str(exc)) from exc
+
+
+DECODERS = {
+    'orjson': OrjsonDecoder,
+    'msgspec': MsgspecDecoder,
+    'json': JSONDecoder,
+}
+
+# Preference order for get_decoder('auto')
+AUTO_ORDER = ('orjson', 'msgspec', 'json')
+
+
+def available_decoders() -> Dict[str, JSONDecoder]:
+    """Return an instance of every decoder whose backend is installed."""
+    decoders = {}
+    for name, cls in DECODERS.items():
+        try:
+            decoders[name] = cls()
+        except ImportError:
+            continue
+    return decoders
+
+
+def get_decoder(decoder: Union[str, JSONDecoder, None] = None) -> JSONDecoder:
+    """
+    Resolve a decoder name or instance.
+
+    Args:
+        decoder: None or 'json' (standard library), 'auto' (fastest
+            installed backend), 'orjson', 'msgspec', or a JSONDecoder instance
+
+    Returns:
+        JSONDecoder instance
+
+    Raises:
+        ValueError: If the name is unknown
+        ImportError: If the named backend is not installed
+    """
+    if isinstance(decoder, JSONDecoder):
+        return decoder
+    if decoder is None:
+        return JSONDecoder()
+    if decoder == 'auto':
+        for name in AUTO_ORDER:
+            try:
+                return DECODERS[name]()
+            except ImportError:
+                continue
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown JSON decoder {decoder!r}; choose from auto, {', '.join(DECODERS)}")
+    return DECODERS[decoder]()
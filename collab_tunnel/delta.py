@@ -0,0 +1,98 @@
+"""
+Sitemap delta engine for TCT protocol (draft-jurkovikj-collab-tunnel-01)
+
+Compares two sitemap snapshots by mUrl and etag so a crawl only has to look
+at the items that actually changed. A snapshot is either a SitemapParser or a
+compact {mUrl: etag} mapping as returned by SitemapParser.snapshot().
+"""
+
+from typing import Any, Dict, List, Mapping, Union
+
+DEFAULT_ITEM_SIZE = 30000
+
+
+class SitemapDelta:
+    """
+    Result of diffing two sitemap snapshots.
+
+    Attributes:
+        added: Items whose mUrl is not in the previous snapshot
+        changed: Items whose etag differs from the previous snapshot
+        unchanged: Items whose etag matches the previous snapshot
+        removed: M-URLs present in the previous snapshot only
+    """
+
+    def __init__(self,
+                 added: List[Dict[str, Any]],
+                 changed: List[Dict[str, Any]],
+                 unchanged: List[Dict[str, Any]],
+                 removed: List[str]):
+        self.added = added
+        self.changed = changed
+        self.unchanged = unchanged
+        self.removed = removed
+
+    @property
+    def to_fetch(self) -> List[Dict[str, Any]]:
+        """Items that need fetching (added + changed)."""
+        return self.added + self.changed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get delta statistics.
+
+        Byte estimates use each item's 'estimatedSize' (30000 if missing).
+
+        Returns:
+            Dictionary with per-set counts and byte estimates
+        """
+        to_fetch = self.to_fetch
+        fetch_bytes = sum(item.get('estimatedSize', DEFAULT_ITEM_SIZE) for item in to_fetch)
+        skip_bytes = sum(item.get('estimatedSize', DEFAULT_ITEM_SIZE) for item in self.unchanged)
+        total_bytes = fetch_bytes + skip_bytes
+        total_items = len(to_fetch) + len(self.unchanged)
+
+        return {
+            'added': len(self.added),
+            'changed': len(self.changed),
+            'unchanged': len(self.unchanged),
+            'removed': len(self.removed),
+            'estimated_fetch_bytes': fetch_bytes,
+            'estimated_saved_bytes': skip_bytes,
+            'change_percentage': round(len(to_fetch) / total_items * 100, 1) if total_items > 0 else 0,
+            'savings_percentage': round(skip_bytes / total_bytes * 100, 1) if total_bytes > 0 else 0,
+        }
+
+
+def diff_sitemaps(items: List[Dict[str, Any]],
+                  previous: Union[Mapping[str, str], Any]) -> SitemapDelta:
+    """
+    Diff sitemap items against a previous snapshot.
+
+    Args:
+        items: Current sitemap items (with 'mUrl' and 'etag')
+        previous: Previous SitemapParser, or {mUrl: etag} mapping
+
+    Returns:
+        SitemapDelta with added/changed/unchanged items and removed M-URLs
+    """
+    if hasattr(previous, 'snapshot'):
+        previous = previous.snapshot()
+
+    added = []
+    changed = []
+    unchanged = []
+    current_urls = set()
+    for item in items:
+        m_url = item['mUrl']
+        current_urls.add(m_url)
+        previous_etag = previous.get(m_url)
+        if previous_etag is None:
+            added.append(item)
+        elif previous_etag == item['etag']:
+            unchanged.append(item)
+        else:
+            changed.append(item)
+
+    removed = [m_url for m_url in previous if m_url not in current_urls]
+    return SitemapDelta(added, changed, unchanged, removed)
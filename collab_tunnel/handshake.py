@@ -0,0 +1,293 @@
+"""
+Bulk C-URL ↔ M-URL handshake verification (draft-jurkovikj-collab-tunnel-01)
+
+A valid handshake needs two links:
+
+1. The C-URL's HTML <head> has <link rel="alternate" href="M-URL">
+2. The M-URL answers with Link: <C-URL>; rel="canonical"
+
+HandshakeAuditor checks many pairs concurrently over the crawler's pooled
+transport. Only the <head> of each C-URL is read: the body is streamed
+(with a Range request, for servers that honour it) and reading stops at
+</head>. Results are cached per sitemap etag, so re-auditing an unchanged
+site costs no requests.
+"""
+
+import html
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple
+from urllib.parse import urljoin
+
+from requests.utils import parse_header_links
+
+from .cache import companion_cache
+
+# Table of handshake results next to a SQLite crawler cache
+HANDSHAKE_TABLE = 'handshakes'
+
+_HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+_LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_ATTRIBUTE = re.compile(r'''([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+
+
+def _link_tags(head: str) -> Iterator[Dict[str, str]]:
+    for tag in _LINK_TAG.findall(head):
+        yield {name.lower(): html.unescape(double or single or bare)
+               for name, double, single, bare in _ATTRIBUTE.findall(tag)}
+
+
+def has_alternate_link(head: str, c_url: str, m_url: str) -> bool:
+    """
+    Check whether an HTML head links to the M-URL with rel="alternate".
+
+    Attribute order, quoting and relative hrefs (resolved against the
+    C-URL) don't matter.
+
+    Args:
+        head: HTML source (at least the <head>)
+        c_url: URL the HTML was fetched from
+        m_url: Expected M-URL
+
+    Returns:
+        True if a matching <link> tag is present
+    """
+    for attributes in _link_tags(head):
+        rels = attributes.get('rel', '').lower().split()
+        if 'alternate' in rels and urljoin(c_url, attributes.get('href', '')) == m_url:
+            return True
+    return False
+
+
+def has_canonical_link(link_header: str, m_url: str, c_url: str) -> bool:
+    """
+    Check whether a Link header points back to the C-URL with rel="canonical".
+
+    Args:
+        link_header: Value of the M-URL's Link header
+        m_url: URL the header came from (base for relative links)
+        c_url: Expected canonical URL
+
+    Returns:
+        True if a matching link is present
+    """
+    for link in parse_header_links(link_header or ''):
+        rels = link.get('rel', '').lower().split()
+        if 'canonical' in rels and urljoin(m_url, link.get('url', '')) == c_url:
+            return True
+    return False
+
+
+class HandshakeAuditor:
+    """
+    Verify the handshake of many C-URL/M-URL pairs concurrently.
+
+    Example usage:
+        auditor = HandshakeAuditor(crawler, max_workers=8)
+        report = auditor.report(sitemap.items)
+        print(report['valid'], report['invalid'], report['errors'])
+    """
+
+    def __init__(self,
+                 crawler,
+                 max_workers: int = 8,
+                 timeout: float = 10,
+                 max_head_bytes: int = 256 * 1024,
+                 drain_limit: int = 64 * 1024,
+                 chunk_size: int = 8192,
+                 results: Optional[MutableMapping] = None):
+        """
+        Args:
+            crawler: CollabTunnelCrawler whose transport and user agent are used
+            max_workers: Pairs checked concurrently (keep at or below the
+                transport's pool_maxsize so connections are reused)
+            timeout: Per-request timeout in seconds
+            max_head_bytes: Stop reading a C-URL after this many bytes even
+                if </head> was not found
+            drain_limit: After </head>, read the rest of the body if at most
+                this many bytes remain, so the connection can be reused;
+                longer bodies are cut off (closing the connection)
+            chunk_size: Read size for streaming the C-URL
+            results: Cache of handshake results, keyed by M-URL (defaults to
+                companion_cache(crawler.cache, 'handshakes'), i.e. a table
+                next to a SQLite crawler cache)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.crawler = crawler
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_head_bytes = max_head_bytes
+        self.drain_limit = drain_limit
+        self.chunk_size = chunk_size
+        if results is None:
+            results = companion_cache(crawler.cache, HANDSHAKE_TABLE)
+        self.results = results
+
+    def _headers(self, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        headers = {'User-Agent': self.crawler.user_agent}
+        headers.update(extra or {})
+        return headers
+
+    def _read_head(self, c_url: str) -> Tuple[int, str, int]:
+        """Fetch a C-URL up to </head>; returns (status, head HTML, bytes read)."""
+        response = self.crawler.transport.get(
+            c_url,
+            headers=self._headers({'Range': f'bytes=0-{self.max_head_bytes - 1}'}),
+            timeout=self.timeout,
+            stream=True
+        )
+        try:
+            data = bytearray()
+            complete = False
+            for chunk in response.iter_content(self.chunk_size):
+                # Search only the new data (plus an overlap for a split tag)
+                search_from = max(0, len(data) - 8)
+                data += chunk
+                match = _HEAD_END.search(data, search_from)
+                if match:
+                    del data[match.end():]
+                    complete = True
+                    break
+                if len(data) >= self.max_head_bytes:
+                    break
+            if complete:
+                remaining = response.headers.get('Content-Length')
+                if remaining and remaining.isdigit() and int(remaining) <= self.drain_limit + len(data):
+                    # Small rest of the body: drain it to keep the connection alive
+                    for _ in response.iter_content(self.chunk_size):
+                        pass
+            try:
+                head = data.decode(response.encoding or 'utf-8', errors='replace')
+            except LookupError:
+                # Unknown charset in Content-Type: the tags we look for are ASCII
+                head = data.decode('utf-8', errors='replace')
+            return response.status_code, head, len(data)
+        finally:
+            response.close()
+
+    def check(self, c_url: str, m_url: str, etag: Optional[str] = None,
+              refresh: bool = False) -> Dict[str, Any]:
+        """
+        Verify one handshake.
+
+        Args:
+            c_url: Canonical URL
+            m_url: Machine-readable URL
+            etag: Sitemap etag of the pair; a cached result for the same
+                etag is returned without any request
+            refresh: Ignore cached results
+
+        Returns:
+            Dict with cUrl, mUrl, etag, valid, alternate_link, canonical_link,
+            c_status, m_status, bytes_read, errors (list of error codes such
+            as 'missing_alternate_link' or 'c_url_http_404') and cached
+        """
+        if etag and not refresh:
+            entry = self.results.get(m_url)
+            if entry and entry.get('etag') == etag and entry.get('cUrl') == c_url:
+                return dict(entry['result'], cached=True)
+
+        result: Dict[str, Any] = {
+            'cUrl': c_url, 'mUrl': m_url, 'etag': etag, 'valid': False,
+            'alternate_link': False, 'canonical_link': False,
+            'c_status': None, 'm_status': None, 'bytes_read': 0, 'errors': [],
+        }
+        errors: List[str] = result['errors']
+        # Network failures and 5xx say nothing about the pages: don't cache
+        # them. Any other failure is recorded for this pair too (never
+        # raised), so one bad response cannot abort an audit.
+        transient = False
+        try:
+            status, head, read = self._read_head(c_url)
+            result.update(c_status=status, bytes_read=read)
+            transient = status >= 500
+            if status >= 400:
+                errors.append(f'c_url_http_{status}')
+            elif has_alternate_link(head, c_url, m_url):
+                result['alternate_link'] = True
+            else:
+                errors.append('missing_alternate_link')
+        except Exception as exc:
+            errors.append(f'c_url_{type(exc).__name__}')
+            transient = True
+
+        try:
+            response = self.crawler.transport.head(m_url, headers=self._headers(), timeout=self.timeout)
+            result['m_status'] = response.status_code
+            transient = transient or response.status_code >= 500
+            if response.status_code >= 400:
+                errors.append(f'm_url_http_{response.status_code}')
+            elif has_canonical_link(response.headers.get('Link', ''), m_url, c_url):
+                result['canonical_link'] = True
+            else:
+                errors.append('missing_canonical_link')
+        except Exception as exc:
+            errors.append(f'm_url_{type(exc).__name__}')
+            transient = True
+
+        result['valid'] = result['alternate_link'] and result['canonical_link']
+        if etag and not transient:
+            self.results[m_url] = {'etag': etag, 'cUrl': c_url, 'result': result}
+        return dict(result, cached=False)
+
+    def audit(self, items: Iterable[Dict[str, Any]], refresh: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Check the handshake of every sitemap item, yielding results as they complete.
+
+        At most 2 * max_workers checks are pending at a time, so any
+        iterable (e.g. iter_sitemap()) can be audited in bounded memory.
+
+        Args:
+            items: Sitemap items with 'cUrl' and 'mUrl' (and 'etag') keys
+            refresh: Ignore cached results
+
+        Yields:
+            Result dicts (see check()), in completion order
+        """
+        window = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='collab-tunnel-handshake') as executor:
+            pending = set()
+            for item in items:
+                pending.add(executor.submit(self.check, item['cUrl'], item['mUrl'],
+                                            item.get('etag'), refresh))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
+
+    def report(self, items: Iterable[Dict[str, Any]], refresh: bool = False,
+               include_results: bool = True) -> Dict[str, Any]:
+        """
+        Audit every item and aggregate the results.
+
+        Args:
+            items: Sitemap items with 'cUrl' and 'mUrl' (and 'etag') keys
+            refresh: Ignore cached results
+            include_results: Include the per-item results (invalid ones
+                only are kept if False)
+
+        Returns:
+            Dict with checked, valid, invalid, cached, bytes_read,
+            elapsed_seconds, errors (count per error code) and results
+        """
+        started = time.perf_counter()
+        report: Dict[str, Any] = {
+            'checked': 0, 'valid': 0, 'invalid': 0, 'cached': 0, 'bytes_read': 0,
+            'errors': {}, 'results': [],
+        }
+        for result in self.audit(items, refresh):
+            report['checked'] += 1
+            report['valid' if result['valid'] else 'invalid'] += 1
+            report['cached'] += result['cached']
+            report['bytes_read'] += result['bytes_read'] if not result['cached'] else 0
+            for error in result['errors']:
+                report['errors'][error] = report['errors'].get(error, 0) + 1
+            if include_results or not result['valid']:
+                report['results'].append(result)
+        report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return report
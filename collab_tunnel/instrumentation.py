@@ -0,0 +1,327 @@
+"""
+Request instrumentation for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+get_stats() only has cumulative counters. Attach an Instrumentation to a
+crawler to time every sitemap and M-URL fetch by phase:
+
+- queue: waiting for concurrency / rate limits (async crawler only)
+- connect: opening a new connection (DNS, TCP and TLS; 0 when reused)
+- ttfb: request sent until response headers arrived (includes connect)
+- body: reading and decoding the response body
+- parse: JSON decoding
+- validate: sitemap validation / payload hash check
+- total: the whole fetch
+
+Durations go into fixed-bucket histograms keyed by request kind, host,
+status code and phase, which export to the Prometheus text format. Listeners
+receive every finished RequestTrace (e.g. OpenTelemetryListener for spans).
+Without an Instrumentation attached the crawler does no timing at all.
+
+Example usage:
+    metrics = Instrumentation()
+    crawler = CollabTunnelCrawler(instrumentation=metrics)
+    ...
+    print(metrics.export_prometheus())
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+PHASES = ('queue', 'connect', 'ttfb', 'body', 'parse', 'validate', 'total')
+
+# Seconds; finer than the Prometheus client defaults at the low end, since
+# parse/validate (and body reads on keep-alive connections) take well under 1 ms
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RequestTrace:
+    """
+    Timing record of one fetch.
+
+    Attributes:
+        kind: 'sitemap' or 'content'
+        url: Requested URL
+        host: URL host (netloc)
+        status: HTTP status code (None if no response was received)
+        error: Exception that ended the fetch, if any
+        wire_bytes: Bytes received on the wire
+        start_time: Wall-clock start (epoch seconds)
+        phases: Phase name -> duration in seconds
+        offsets: Phase name -> start offset from start_time in seconds
+    """
+
+    __slots__ = ('kind', 'url', 'host', 'status', 'error', 'wire_bytes',
+                 'start_time', 'phases', 'offsets', '_started', '_last')
+
+    def __init__(self, kind: str, url: str):
+        self.kind = kind
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.status: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.wire_bytes = 0
+        self.start_time = time.time()
+        self.phases: Dict[str, float] = {}
+        self.offsets: Dict[str, float] = {}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        """End `phase` now; it started where the previous phase ended."""
+        now = time.perf_counter()
+        self.offsets[phase] = self._last - self._started
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add time to a phase that overlaps the sequential ones (connect)."""
+        if phase not in self.phases:
+            self.offsets[phase] = time.perf_counter() - seconds - self._started
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def finish(self) -> None:
+        self.offsets['total'] = 0.0
+        self.phases['total'] = time.perf_counter() - self._started
+
+    @property
+    def status_label(self) -> str:
+        """Status code as a label ('error' if the request failed without a response)."""
+        return 'error' if self.status is None else str(self.status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'url': self.url,
+            'host': self.host,
+            'status': self.status,
+            'error': None if self.error is None else f'{type(self.error).__name__}: {self.error}',
+            'wire_bytes': self.wire_bytes,
+            'start_time': self.start_time,
+            'phases': dict(self.phases),
+        }
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative on export, like Prometheus)."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by linear interpolation within its bucket.
+
+        Observations above the largest bucket report the largest bound.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p90': round(self.quantile(0.9), 6),
+            'p99': round(self.quantile(0.99), 6),
+        }
+
+
+def _label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Instrumentation:
+    """
+    Collects RequestTraces from a crawler into per-host/per-status histograms.
+
+    Thread-safe, so one instance can be shared by several crawlers and threads.
+    """
+
+    def __init__(self,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 per_host: bool = True):
+        """
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+            per_host: Keep separate histograms per host (set False to bound
+                label cardinality when crawling very many hosts)
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.per_host = per_host
+        self.listeners: List[Callable[[RequestTrace], Any]] = []
+        # (kind, host, status, phase) -> Histogram
+        self._histograms: Dict[Tuple[str, str, str, str], Histogram] = {}
+        # (kind, host, status) -> wire bytes
+        self._bytes: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[RequestTrace], Any]) -> Callable[[RequestTrace], Any]:
+        """
+        Call `listener(trace)` for every finished fetch (usable as a decorator).
+
+        Listeners run in the thread that finished the fetch (the event loop
+        for the async crawler); exceptions they raise propagate to the
+        caller of the fetch.
+        """
+        self.listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener: Callable[[RequestTrace], Any]) -> None:
+        self.listeners.remove(listener)
+
+    def start(self, kind: str, url: str) -> RequestTrace:
+        """Begin timing a fetch."""
+        return RequestTrace(kind, url)
+
+    def finish(self, trace: RequestTrace, error: Optional[BaseException] = None) -> None:
+        """Record a completed (or failed) fetch and notify listeners."""
+        trace.finish()
+        trace.error = error
+        host = trace.host if self.per_host else '*'
+        status = trace.status_label
+        with self._lock:
+            for phase, seconds in trace.phases.items():
+                key = (trace.kind, host, status, phase)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(self.buckets)
+                histogram.observe(seconds)
+            byte_key = (trace.kind, host, status)
+            self._bytes[byte_key] = self._bytes.get(byte_key, 0) + trace.wire_bytes
+        for listener in self.listeners:
+            listener(trace)
+
+    def histogram(self, kind: str, host: str, status: str, phase: str = 'total') -> Optional[Histogram]:
+        """Return the histogram for one label combination, if any were recorded."""
+        return self._histograms.get((kind, host, status, phase))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get latency summaries.
+
+        Returns:
+            Nested dict kind -> host -> status -> phase -> {count, mean, p50,
+            p90, p99} (seconds), plus 'bytes' under each status
+        """
+        stats: Dict[str, Any] = {}
+        with self._lock:
+            for (kind, host, status, phase), histogram in sorted(self._histograms.items()):
+                by_status = stats.setdefault(kind, {}).setdefault(host, {}).setdefault(status, {})
+                by_status[phase] = histogram.summary()
+            for (kind, host, status), count in self._bytes.items():
+                stats[kind][host][status]['bytes'] = count
+        return stats
+
+    def export_prometheus(self, prefix: str = 'collab_tunnel') -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Text for a /metrics endpoint or a node_exporter textfile
+        """
+        duration = f'{prefix}_request_duration_seconds'
+        received = f'{prefix}_response_bytes_total'
+        lines = [
+            f'# HELP {duration} TCT fetch duration by phase.',
+            f'# TYPE {duration} histogram',
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            byte_counts = sorted(self._bytes.items())
+        for (kind, host, status, phase), histogram in histograms:
+            labels = (f'kind="{kind}",host="{_label_value(host)}",'
+                      f'status="{status}",phase="{phase}"')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{duration}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{duration}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{duration}_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'{duration}_count{{{labels}}} {histogram.count}')
+        lines.append(f'# HELP {received} Bytes received on the wire.')
+        lines.append(f'# TYPE {received} counter')
+        for (kind, host, status), count in byte_counts:
+            lines.append(f'{received}{{kind="{kind}",host="{_label_value(host)}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Drop all recorded histograms and byte counts."""
+        with self._lock:
+            self._histograms.clear()
+            self._bytes.clear()
+
+
+class OpenTelemetryListener:
+    """
+    Listener that emits one OpenTelemetry span per fetch, with a child span
+    per phase (requires `pip install opentelemetry-api` and a configured SDK).
+
+    Example usage:
+        metrics.add_listener(OpenTelemetryListener())
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Args:
+            tracer: opentelemetry Tracer (defaults to the global tracer
+                provider's 'collab_tunnel' tracer)
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "OpenTelemetry export requires opentelemetry-api: pip install opentelemetry-api"
+            ) from None
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('collab_tunnel')
+
+    def __call__(self, trace: RequestTrace) -> None:
+        start_ns = int(trace.start_time * 1e9)
+        span = self.tracer.start_span(
+            f'tct.fetch_{trace.kind}',
+            start_time=start_ns,
+            attributes={
+                'http.url': trace.url,
+                'net.peer.name': trace.host,
+                'http.status_code': trace.status or 0,
+                'tct.wire_bytes': trace.wire_bytes,
+            },
+        )
+        context = self._trace.set_span_in_context(span)
+        for phase in PHASES[:-1]:
+            if phase not in trace.phases:
+                continue
+            phase_start = start_ns + int(trace.offsets[phase] * 1e9)
+            child = self.tracer.start_span(f'tct.{phase}', context=context, start_time=phase_start)
+            child.end(end_time=phase_start + int(trace.phases[phase] * 1e9))
+        if trace.error is not None:
+            span.record_exception(trace.error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(trace.error)))
+        span.end(end_time=start_ns + int(trace.phases['total'] * 1e9))
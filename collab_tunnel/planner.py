@@ -0,0 +1,144 @@
+"""
+Bulk zero-fetch planning for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+Calling should_fetch() per item costs a cache lookup, several dict lookups
+and a stats update each, which adds up to seconds for sitemaps with hundreds
+of thousands of items. plan_fetches() instead joins the sitemap's mUrl/etag
+columns against the cache in one pass (one get_many() call, so the SQLite
+cache answers in a few batched queries) and sorts every item into:
+
+- skip: etag matches the cache (zero-fetch, Section 8.1)
+- revalidate: cached, but the etag changed (conditional GET, Section 8.2)
+- fetch: not cached, or no etag to compare on either side (plain GET)
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .delta import DEFAULT_ITEM_SIZE
+from .records import CacheEntry, SitemapItem
+
+
+class FetchPlan:
+    """
+    Result of planning a crawl against the cache.
+
+    Attributes:
+        fetch: Items that are not cached (or have no etag to compare)
+        revalidate: Cached items whose etag changed
+        skip: Items whose etag matches the cache (zero-fetch)
+        saved_bytes: Estimated bytes saved by the skipped items
+        entries: Cache entries of the planned items, by M-URL (items that
+            are not cached are absent)
+    """
+
+    def __init__(self,
+                 fetch: List[Dict[str, Any]],
+                 revalidate: List[Dict[str, Any]],
+                 skip: List[Dict[str, Any]],
+                 saved_bytes: int,
+                 entries: Optional[Mapping[str, Any]] = None):
+        self.fetch = fetch
+        self.revalidate = revalidate
+        self.skip = skip
+        self.saved_bytes = saved_bytes
+        self.entries = entries if entries is not None else {}
+
+    @property
+    def to_fetch(self) -> List[Dict[str, Any]]:
+        """Items that need a request (fetch + revalidate)."""
+        return self.fetch + self.revalidate
+
+    def __len__(self) -> int:
+        return len(self.fetch) + len(self.revalidate) + len(self.skip)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get plan statistics.
+
+        Fetch estimates use each item's 'estimatedSize' (30000 if missing);
+        savings use the size recorded in the cache, as should_fetch() does.
+
+        Returns:
+            Dictionary with per-set counts and byte estimates
+        """
+        fetch_bytes = sum(item.get('estimatedSize', DEFAULT_ITEM_SIZE) for item in self.to_fetch)
+        total_bytes = fetch_bytes + self.saved_bytes
+        return {
+            'fetch': len(self.fetch),
+            'revalidate': len(self.revalidate),
+            'skip': len(self.skip),
+            'estimated_fetch_bytes': fetch_bytes,
+            'estimated_saved_bytes': self.saved_bytes,
+            'savings_percentage': round(self.saved_bytes / total_bytes * 100, 1) if total_bytes > 0 else 0,
+        }
+
+
+def _etag_key(etag: str) -> str:
+    # Same normalization as CollabTunnelCrawler._hashes_match()
+    return etag.replace('sha256-', '').replace('"', '')
+
+
+def same_etag(item_etag: Any, cached_etag: Any) -> bool:
+    """
+    Compare a sitemap etag with a cached ETag, ignoring quotes and 'sha256-'.
+
+    Args:
+        item_etag: Sitemap etag (string or raw digest bytes)
+        cached_etag: Cached ETag (string or raw digest bytes)
+
+    Returns:
+        True if both name the same payload hash
+    """
+    if isinstance(item_etag, bytes):
+        item_etag = item_etag.hex()
+    if isinstance(cached_etag, bytes):
+        cached_etag = cached_etag.hex()
+    return _etag_key(cached_etag) == _etag_key(item_etag)
+
+
+def plan_fetches(items: Iterable[Mapping], cache: Mapping) -> FetchPlan:
+    """
+    Sort sitemap items into fetch / revalidate / skip sets against a cache.
+
+    Args:
+        items: Sitemap items with 'mUrl' and 'etag' keys (dicts or
+            SitemapItem records)
+        cache: Crawler cache (CacheBackend or any Mapping of M-URL -> entry)
+
+    Returns:
+        FetchPlan
+    """
+    items = list(items)
+    # Columns: compact records contribute their digest, dicts their string
+    urls = [item.m_url or item.get('mUrl') if type(item) is SitemapItem else item.get('mUrl')
+            for item in items]
+    etags = [item.etag or item.get('etag') if type(item) is SitemapItem else item.get('etag')
+             for item in items]
+
+    wanted = [m_url for m_url in urls if m_url]
+    get_many = getattr(cache, 'get_many', None)
+    if get_many is not None:
+        cached = get_many(wanted)
+    else:
+        cached = {m_url: cache[m_url] for m_url in wanted if m_url in cache}
+    entries = [cached.get(m_url) if m_url else None for m_url in urls]
+    cached_etags = [None if entry is None
+                    else entry.etag or entry.get('etag') if type(entry) is CacheEntry
+                    else entry.get('etag')
+                    for entry in entries]
+
+    fetch = []
+    revalidate = []
+    skip = []
+    saved_bytes = 0
+    for item, etag, entry, cached_etag in zip(items, etags, entries, cached_etags):
+        if not etag or not cached_etag:
+            fetch.append(item)
+        # Fast path: equal digests, or a quoted cache ETag of the sitemap etag
+        elif (cached_etag == etag or cached_etag == f'"{etag}"'
+              or same_etag(etag, cached_etag)):
+            skip.append(item)
+            saved_bytes += entry.get('estimated_size', DEFAULT_ITEM_SIZE)
+        else:
+            revalidate.append(item)
+    return FetchPlan(fetch, revalidate, skip, saved_bytes, cached)
@@ -0,0 +1,235 @@
+"""
+Compact records for sitemap items and cache entries (draft-jurkovikj-collab-tunnel-01)
+
+At millions of tracked URLs, per-item dicts dominate memory. The records
+here keep each field in a __slots__ attribute in its smallest exact form:
+
+- `sha256-<hex>` etags/hashes as 32-byte digests instead of 71-char strings
+- timestamps as int epoch seconds instead of ISO strings
+- URLs interned, so the sitemap, its indexes and the cache share one copy
+
+Records are read-only Mappings, so code written against the dicts keeps
+working (item['etag'], cached.get('etag'), dict(record), ==). Views are
+exact: a value that would not round-trip to the identical original (e.g. an
+uppercase hex digest or a timestamp with fractional seconds) is kept as-is.
+"""
+
+import re
+import sys
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+_HASH_RE = re.compile(r'sha256-[0-9a-f]{64}\Z')
+_QUOTED_HASH_RE = re.compile(r'"sha256-[0-9a-f]{64}"\Z')
+_MISSING = object()
+
+
+def _intern(value: Any) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else None
+
+
+def _same(value: Any) -> Any:
+    return value
+
+
+def _pack_hash(value: Any) -> Optional[bytes]:
+    if isinstance(value, str) and _HASH_RE.match(value):
+        return bytes.fromhex(value[7:])
+    return None
+
+
+def _unpack_hash(digest: bytes) -> str:
+    return 'sha256-' + digest.hex()
+
+
+def _pack_quoted_hash(value: Any) -> Optional[bytes]:
+    if isinstance(value, str) and _QUOTED_HASH_RE.match(value):
+        return bytes.fromhex(value[8:-1])
+    return None
+
+
+def _unpack_quoted_hash(digest: bytes) -> str:
+    return '"sha256-' + digest.hex() + '"'
+
+
+def _pack_utc(value: Any) -> Optional[int]:
+    """'2025-10-01T12:00:00Z' (sitemap 'modified') -> epoch seconds."""
+    if not isinstance(value, str):
+        return None
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+
+def _unpack_utc(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _pack_naive_utc(value: Any) -> Optional[int]:
+    """'2025-10-01T12:00:00' (naive UTC, cache 'fetched_at') -> epoch seconds."""
+    if not isinstance(value, str):
+        return None
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _unpack_naive_utc(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _pack_int(value: Any) -> Optional[int]:
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def digest_from_etag(etag: str) -> Optional[bytes]:
+    """
+    Return the 32-byte SHA-256 digest of a `sha256-<hex>` etag (quoted or not).
+
+    Returns:
+        The digest, or None if the etag is not in canonical sha256 form
+    """
+    return _pack_hash(etag) or _pack_quoted_hash(etag)
+
+
+class _Record(Mapping):
+    """
+    Read-only Mapping over __slots__ fields.
+
+    _FIELDS lists (dict key, attribute, pack, unpack). pack() returns the
+    compact form or None; values that don't pack, or don't round-trip
+    exactly, and unknown keys are kept in `extra`.
+    """
+
+    __slots__ = ('extra',)
+    _FIELDS: Tuple[Tuple[str, str, Callable[[Any], Any], Callable[[Any], Any]], ...] = ()
+    _BY_KEY: Dict[str, Tuple[str, str, Callable[[Any], Any], Callable[[Any], Any]]] = {}
+
+    def __init__(self, data: Mapping):
+        extra = None
+        for key, attribute, pack, unpack in self._FIELDS:
+            value = data.get(key, _MISSING)
+            stored = None
+            if value is not _MISSING:
+                try:
+                    stored = pack(value)
+                except (TypeError, ValueError, OverflowError):
+                    stored = None
+                if stored is None or unpack(stored) != value:
+                    stored = None
+                    if extra is None:
+                        extra = {}
+                    extra[key] = value
+            setattr(self, attribute, stored)
+        for key, value in data.items():
+            if key not in self._BY_KEY:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self.extra = extra
+
+    @classmethod
+    def from_slots(cls, values: Iterable[Any], extra: Optional[Dict[str, Any]] = None) -> '_Record':
+        """
+        Build a record from already-compact values, in __slots__ order.
+
+        Used to load records from binary snapshots without re-packing them.
+        """
+        record = cls.__new__(cls)
+        for attribute, value in zip(cls.__slots__, values):
+            setattr(record, attribute, value)
+        record.extra = extra
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        field = self._BY_KEY.get(key)
+        if field is not None:
+            stored = getattr(self, field[1])
+            if stored is not None:
+                return field[3](stored)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, attribute, _, _ in self._FIELDS:
+            if getattr(self, attribute) is not None:
+                yield key
+        if self.extra is not None:
+            for key in self.extra:
+                field = self._BY_KEY.get(key)
+                if field is None or getattr(self, field[1]) is None:
+                    yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a plain dict copy."""
+        return dict(self)
+
+    def __reduce__(self):
+        return (type(self), (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+def _index_fields(cls):
+    cls._BY_KEY = {field[0]: field for field in cls._FIELDS}
+    return cls
+
+
+@_index_fields
+class SitemapItem(_Record):
+    """
+    Compact sitemap item (cUrl, mUrl, etag, modified, estimatedSize).
+
+    Attributes hold the compact forms: c_url/m_url (interned str), etag
+    (32-byte digest), modified (epoch seconds), estimated_size (int).
+    """
+
+    __slots__ = ('c_url', 'm_url', 'etag', 'modified', 'estimated_size')
+    _FIELDS = (
+        ('cUrl', 'c_url', _intern, _same),
+        ('mUrl', 'm_url', _intern, _same),
+        ('etag', 'etag', _pack_hash, _unpack_hash),
+        ('modified', 'modified', _pack_utc, _unpack_utc),
+        ('estimatedSize', 'estimated_size', _pack_int, _same),
+    )
+
+
+@_index_fields
+class CacheEntry(_Record):
+    """
+    Compact crawler cache entry.
+
+    etag is the digest of the quoted `"sha256-<hex>"` ETag header,
+    content_hash the digest of contentHash; fetched_at and the change-history
+    timestamps are epoch seconds.
+    """
+
+    __slots__ = ('etag', 'content_hash', 'fetched_at', 'estimated_size',
+                 'first_checked', 'checks', 'changes', 'last_checked', 'last_changed')
+    _FIELDS = (
+        ('etag', 'etag', _pack_quoted_hash, _unpack_quoted_hash),
+        ('contentHash', 'content_hash', _pack_hash, _unpack_hash),
+        ('fetched_at', 'fetched_at', _pack_naive_utc, _unpack_naive_utc),
+        ('estimated_size', 'estimated_size', _pack_int, _same),
+        ('first_checked', 'first_checked', _pack_int, _same),
+        ('checks', 'checks', _pack_int, _same),
+        ('changes', 'changes', _pack_int, _same),
+        ('last_checked', 'last_checked', _pack_int, _same),
+        ('last_changed', 'last_changed', _pack_int, _same),
+    )
+
+
+def etags_match(item: Mapping, cached: Mapping) -> Optional[bool]:
+    """
+    Compare the etag of a sitemap item and a cache entry by digest.
+
+    Returns:
+        True/False if both are compact records with digests, else None
+        (the caller falls back to comparing strings)
+    """
+    if isinstance(item, SitemapItem) and isinstance(cached, CacheEntry):
+        if item.etag is not None and cached.etag is not None:
+            return item.etag == cached.etag
+    return None
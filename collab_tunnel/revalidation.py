@@ -0,0 +1,304 @@
+"""
+Adaptive revalidation scheduling for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+Changes to a page (or to a whole sitemap) are modelled as a Poisson process.
+The crawler records how often each M-URL and each sitemap was checked and
+found changed; combined with the sitemap 'modified' timestamps this gives a
+change-rate estimate, from which the next check is scheduled for when a
+change has become likely. Sites that rarely change are polled far less
+often, and the schedule backs off further with every unchanged poll.
+
+M-URLs whose sitemap etag matches the cache are normally zero-fetched; the
+per-URL schedule revalidates them anyway once a change has become likely, as
+a safety net against stale sitemaps.
+"""
+
+import hashlib
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional
+
+from .cache import companion_cache
+
+# Table of per-sitemap history next to a SQLite crawler cache
+SITEMAP_HISTORY_TABLE = 'sitemap_history'
+
+
+def _now() -> int:
+    # Whole seconds are plenty for scheduling and keep cache entries compact
+    return int(time.time())
+
+
+def _parse_modified(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def record_check(entry: Dict[str, Any], changed: bool, now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Record one check of a URL or sitemap in its cache entry (in place).
+
+    Adds/updates 'checks', 'changes', 'first_checked', 'last_checked' and
+    'last_changed' (epoch seconds, int unless `now` is given as a float).
+    The first check of an entry only starts the observation period; it is
+    not counted as a change.
+
+    Args:
+        entry: Cache entry dict
+        changed: Whether the content differed from the previous check
+        now: Check time (defaults to the current time)
+
+    Returns:
+        The updated entry
+    """
+    now = _now() if now is None else now
+    if 'first_checked' not in entry:
+        entry.update(first_checked=now, checks=0, changes=0)
+    else:
+        entry['checks'] = entry.get('checks', 0) + 1
+        if changed:
+            entry['changes'] = entry.get('changes', 0) + 1
+            entry['last_changed'] = now
+    entry['last_checked'] = now
+    return entry
+
+
+class ChangeModel:
+    """
+    Poisson change-rate estimator and check-interval policy.
+
+    The rate estimate is (changes + prior_changes) / (observed + prior_seconds):
+    with no history it falls back to the prior, and every unchanged check
+    lengthens the observed period, backing the schedule off. The next check
+    is due when the probability of a change, 1 - exp(-rate * t), reaches
+    target_probability.
+    """
+
+    def __init__(self,
+                 target_probability: float = 0.5,
+                 min_interval: float = 300.0,
+                 max_interval: float = 7 * 86400.0,
+                 default_interval: float = 86400.0,
+                 window: float = 30 * 86400.0):
+        """
+        Args:
+            target_probability: Change probability at which a check is due
+            min_interval: Shortest interval between checks (seconds)
+            max_interval: Longest interval between checks (seconds)
+            default_interval: Assumed mean time between changes with no history
+            window: Look-back period for 'modified' timestamps (seconds)
+        """
+        if not 0 < target_probability < 1:
+            raise ValueError("target_probability must be between 0 and 1")
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("need 0 < min_interval <= max_interval")
+        self.target_probability = target_probability
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.window = window
+
+    def rate(self,
+             entry: Optional[Dict[str, Any]],
+             now: float,
+             prior_changes: float = 1.0,
+             prior_seconds: Optional[float] = None) -> float:
+        """
+        Estimate the change rate (changes per second) from an entry's history.
+
+        Args:
+            entry: Cache entry with history fields (see record_check), or None
+            now: Current time (end of the observation period)
+            prior_changes: Pseudo-count of changes in the prior
+            prior_seconds: Length of the prior period (default_interval per
+                prior change if None)
+
+        Returns:
+            Estimated changes per second
+        """
+        if prior_seconds is None:
+            prior_seconds = prior_changes * self.default_interval
+        changes = observed = 0.0
+        if entry and 'first_checked' in entry:
+            changes = entry.get('changes', 0)
+            observed = max(0.0, now - entry['first_checked'])
+        return (changes + prior_changes) / max(observed + prior_seconds, 1e-9)
+
+    def interval(self, rate: float) -> float:
+        """Seconds until a change reaches target_probability, clamped to the limits."""
+        if rate <= 0:
+            return self.max_interval
+        wait = -math.log(1 - self.target_probability) / rate
+        return min(self.max_interval, max(self.min_interval, wait))
+
+    def change_probability(self, rate: float, elapsed: float) -> float:
+        """Probability that at least one change happened within `elapsed` seconds."""
+        return 1 - math.exp(-rate * max(0.0, elapsed))
+
+
+class AdaptiveRevalidator:
+    """
+    Schedule sitemap polls and M-URL revalidation from observed change history.
+
+    M-URL history is recorded by the crawler in its cache on every
+    conditional fetch; observe_sitemap() records per-site history in a
+    separate history store (by default a table next to a SQLite crawler
+    cache), so schedules survive restarts with a persistent cache.
+
+    Example usage:
+        revalidator = AdaptiveRevalidator(crawler)
+        for url in revalidator.due_sitemaps(sitemap_urls):
+            sitemap = crawler.fetch_sitemap(url)
+            revalidator.observe_sitemap(url, sitemap)
+            for item in revalidator.due_items(sitemap.items):
+                crawler.fetch_content(item['mUrl'], item.get('etag'))
+    """
+
+    def __init__(self,
+                 crawler,
+                 model: Optional[ChangeModel] = None,
+                 history: Optional[MutableMapping] = None):
+        """
+        Args:
+            crawler: CollabTunnelCrawler (or subclass) whose cache holds the
+                M-URL history
+            model: Change model (defaults to ChangeModel())
+            history: Store of per-sitemap history, keyed by sitemap URL
+                (defaults to companion_cache(crawler.cache, 'sitemap_history'))
+        """
+        self.crawler = crawler
+        self.model = model or ChangeModel()
+        if history is None:
+            history = companion_cache(crawler.cache, SITEMAP_HISTORY_TABLE)
+        self.history = history
+
+    def _site_entry(self, sitemap_url: str) -> Optional[Dict[str, Any]]:
+        return self.history.get(sitemap_url)
+
+    @staticmethod
+    def _fingerprint(sitemap) -> str:
+        digest = hashlib.sha256()
+        for m_url, etag in sorted(sitemap.snapshot().items()):
+            digest.update(f'{m_url}\0{etag}\n'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def observe_sitemap(self, sitemap_url: str, sitemap, now: Optional[float] = None) -> bool:
+        """
+        Record a poll of a sitemap and whether any item was added, changed or removed.
+
+        Args:
+            sitemap_url: Sitemap URL
+            sitemap: SitemapParser returned by fetch_sitemap()
+            now: Poll time (defaults to the current time)
+
+        Returns:
+            True if the sitemap changed since the previous poll
+        """
+        now = _now() if now is None else now
+        entry = dict(self._site_entry(sitemap_url) or {})
+        fingerprint = self._fingerprint(sitemap)
+        changed = 'fingerprint' in entry and entry['fingerprint'] != fingerprint
+
+        # Items modified within the window act as the prior on a first poll
+        recent = 0
+        for item in sitemap.items:
+            modified = _parse_modified(item.get('modified'))
+            if modified is not None and now - modified <= self.model.window:
+                recent += 1
+        entry['fingerprint'] = fingerprint
+        entry['recent_modifications'] = recent
+        record_check(entry, changed, now)
+        self.history[sitemap_url] = entry
+        return changed
+
+    def sitemap_rate(self, sitemap_url: str, now: Optional[float] = None) -> float:
+        """Estimated changes per second of a sitemap (any item added/changed/removed)."""
+        now = _now() if now is None else now
+        entry = self._site_entry(sitemap_url)
+        # The 'modified' timestamps give a prior of recent changes per window
+        recent = (entry or {}).get('recent_modifications', 0)
+        if recent:
+            return self.model.rate(entry, now, prior_changes=recent, prior_seconds=self.model.window)
+        return self.model.rate(entry, now)
+
+    def next_sitemap_poll(self, sitemap_url: str, now: Optional[float] = None) -> float:
+        """
+        Time (epoch seconds) at which a sitemap should next be polled.
+
+        Never-polled sitemaps are due immediately.
+        """
+        now = _now() if now is None else now
+        entry = self._site_entry(sitemap_url)
+        if not entry or 'last_checked' not in entry:
+            return now
+        return entry['last_checked'] + self.model.interval(self.sitemap_rate(sitemap_url, now))
+
+    def due_sitemaps(self, sitemap_urls: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Return the sitemap URLs whose next poll time has come."""
+        now = _now() if now is None else now
+        return [url for url in sitemap_urls if self.next_sitemap_poll(url, now) <= now]
+
+    def item_rate(self, item: Dict[str, Any], now: Optional[float] = None) -> float:
+        """
+        Estimated changes per second of one M-URL.
+
+        The prior is one change over the item's age according to its
+        'modified' timestamp (or default_interval if it has none).
+        """
+        now = _now() if now is None else now
+        entry = self.crawler.cache.get(item['mUrl'])
+        modified = _parse_modified(item.get('modified'))
+        if modified is not None and modified < now:
+            return self.model.rate(entry, now, prior_seconds=now - modified)
+        return self.model.rate(entry, now)
+
+    def next_revalidation(self, item: Dict[str, Any], now: Optional[float] = None) -> float:
+        """
+        Time (epoch seconds) at which an M-URL should next be revalidated.
+
+        Items whose sitemap etag differs from the cache (or that were never
+        fetched) are due immediately, since a change is certain.
+        """
+        now = _now() if now is None else now
+        entry = self.crawler.cache.get(item['mUrl'])
+        if not entry or 'last_checked' not in entry:
+            return now
+        if item.get('etag') and not self.crawler._hashes_match(entry.get('etag') or '', item['etag']):
+            return now
+        return entry['last_checked'] + self.model.interval(self.item_rate(item, now))
+
+    def due_items(self, items: Iterable[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return the items that need a request now.
+
+        Items with a changed sitemap etag (or never fetched) are always due.
+        Items whose etag matches the cache, or that have no etag, are due
+        when their adaptive revalidation time has come (a conditional
+        request, normally answered with 304) and skipped until then.
+        """
+        now = _now() if now is None else now
+        due = []
+        for item in items:
+            if self.next_revalidation(item, now) <= now:
+                due.append(item)
+            elif item.get('etag'):
+                self.crawler.should_fetch(item)  # account the zero-fetch
+        return due
+
+    def priority(self, item: Dict[str, Any], cached: Optional[Dict[str, Any]]) -> float:
+        """
+        Probability that an item changed since it was last checked.
+
+        Usable as CrawlScheduler(priority=revalidator.priority).
+        """
+        now = _now()
+        if not cached or 'last_checked' not in cached:
+            return 1.0
+        if item.get('etag') and not self.crawler._hashes_match(cached.get('etag') or '', item['etag']):
+            return 1.0
+        return self.model.change_probability(self.item_rate(item, now), now - cached['last_checked'])
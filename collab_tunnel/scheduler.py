@@ -0,0 +1,361 @@
+"""
+Multi-site crawl scheduler for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+Crawls many sitemaps in one event loop. M-URL fetches are queued per host
+and dispatched round-robin across hosts, subject to a per-host token bucket,
+a per-host in-flight cap and a global concurrency cap. Within a host the
+most promising items go first. Hosts that keep failing are backed off and
+eventually abandoned, so they cannot starve the others; items that failed
+with a transient error (connection error, timeout, 429 or 5xx) are requeued
+and retried once the host's backoff delay has passed.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from .async_crawler import AsyncCollabTunnelCrawler, TokenBucket
+from .planner import same_etag
+from .records import etags_match
+
+
+def _modified_timestamp(item: Dict[str, Any]) -> float:
+    modified = item.get('modified')
+    if not modified:
+        return 0.0
+    try:
+        return datetime.fromisoformat(modified.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def default_priority(item: Dict[str, Any], cached: Optional[Dict[str, Any]]) -> Tuple:
+    """
+    Default ordering of a host's items (higher sorts first).
+
+    Items whose sitemap etag is known to differ from the cache (or that were
+    never fetched) are certain to transfer a new payload, so they go before
+    items that can only be revalidated; ties are broken by 'modified' recency.
+    """
+    return (_known_change(item, cached), _modified_timestamp(item))
+
+
+def _known_change(item: Dict[str, Any], cached: Optional[Dict[str, Any]]) -> bool:
+    """True if the item was never fetched or its etag differs from the cache (as in plan_fetches)."""
+    if not cached:
+        return True
+    etag = item.get('etag')
+    cached_etag = cached.get('etag')
+    if not etag or not cached_etag:
+        return False  # nothing to compare: only a conditional GET can tell
+    matches = etags_match(item, cached)
+    if matches is None:
+        matches = same_etag(etag, cached_etag)
+    return not matches
+
+
+def _transient(exc: Exception) -> bool:
+    """True if a failed fetch is worth retrying later."""
+    if isinstance(exc, requests.HTTPError):
+        response = exc.response
+        return response is None or response.status_code == 429 or response.status_code >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+class _HostQueue:
+    """Pending items, limits and health of one host."""
+
+    def __init__(self, host: str, rate: Optional[float]):
+        self.host = host
+        self.heap: List[Tuple[Any, int, Dict[str, Any], int]] = []
+        self.bucket = TokenBucket(rate) if rate else None
+        self.in_flight = 0
+        self.failures = 0
+        self.blocked_until = 0.0
+        self.abandoned = False
+        self.stats = {'queued': 0, 'fetched': 0, 'not_modified': 0, 'errors': 0,
+                      'retried': 0, 'dropped': 0}
+
+
+class CrawlScheduler:
+    """
+    Crawl many TCT sites concurrently with per-host politeness and fairness.
+
+    Example usage:
+        scheduler = CrawlScheduler(rate_per_host=2, max_concurrency=64)
+        async with scheduler:
+            async for item, content in scheduler.run(sitemap_urls):
+                if content is not None:
+                    # Process content...
+                    pass
+        print(scheduler.get_stats())
+    """
+
+    def __init__(self,
+                 crawler: Optional[AsyncCollabTunnelCrawler] = None,
+                 max_concurrency: int = 32,
+                 max_per_host: int = 4,
+                 rate_per_host: Optional[float] = 2.0,
+                 priority: Optional[Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Any]] = None,
+                 backoff: float = 1.0,
+                 max_backoff: float = 300.0,
+                 max_failures: int = 5,
+                 max_retries: int = 2):
+        """
+        Initialize the scheduler.
+
+        Args:
+            crawler: Crawler to fetch with (defaults to an AsyncCollabTunnelCrawler
+                sized for max_concurrency / max_per_host); its cache and stats
+                are shared across all sites
+            max_concurrency: Maximum number of requests in flight overall
+            max_per_host: Maximum number of requests in flight per host
+            rate_per_host: Maximum requests per second per host (None = unlimited)
+            priority: Function (item, cache_entry) -> sort key; higher keys are
+                fetched first within a host (default: default_priority)
+            backoff: Initial delay in seconds after a host's request fails;
+                doubles with every consecutive failure
+            max_backoff: Upper bound of the per-host backoff delay
+            max_failures: Consecutive failures after which a host's remaining
+                items are dropped
+            max_retries: Times an item is requeued after a transient error
+                (connection error, timeout, 429 or 5xx) before it counts as failed
+        """
+        if max_concurrency < 1 or max_per_host < 1:
+            raise ValueError("max_concurrency and max_per_host must be >= 1")
+        if crawler is None:
+            crawler = AsyncCollabTunnelCrawler(max_concurrency=max_concurrency,
+                                               max_per_host=max_per_host)
+        self.crawler = crawler
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.rate_per_host = rate_per_host
+        self.priority = priority or default_priority
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_failures = max_failures
+        self.max_retries = max_retries
+        self._hosts: Dict[str, _HostQueue] = {}
+        self._ring: Deque[_HostQueue] = deque()
+        self._sequence = itertools.count()
+        self.stats = {'sitemaps': 0, 'sitemaps_failed': 0, 'dispatched': 0, 'errors': 0, 'retried': 0}
+        self.sitemap_errors: Dict[str, Exception] = {}
+
+    async def __aenter__(self) -> 'CrawlScheduler':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying crawler."""
+        self.crawler.close()
+
+    def _host(self, host: str) -> _HostQueue:
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = _HostQueue(host, self.rate_per_host)
+            self._ring.append(queue)
+        return queue
+
+    def add_items(self, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queue sitemap items, skipping those the zero-fetch check rules out.
+
+        Args:
+            items: Sitemap items with 'mUrl' and 'etag' keys
+
+        Returns:
+            Number of items queued
+        """
+        queued = 0
+        plan = self.crawler.plan(items)
+        for item in plan.to_fetch:
+            queue = self._host(urlsplit(item['mUrl']).netloc)
+            if queue.abandoned:
+                queue.stats['dropped'] += 1
+                continue
+            # heapq is a min-heap: wrap the key so that higher priorities pop first
+            key = _Descending(self.priority(item, plan.entries.get(item['mUrl'])))
+            heapq.heappush(queue.heap, (key, next(self._sequence), item, 0))
+            queue.stats['queued'] += 1
+            queued += 1
+        return queued
+
+    async def _load_sitemap(self, sitemap_url: str) -> None:
+        queue = self._host(urlsplit(sitemap_url).netloc)
+        if queue.bucket is not None:
+            await queue.bucket.acquire()
+        try:
+            sitemap = await self.crawler.fetch_sitemap(sitemap_url)
+        except (requests.RequestException, ValueError) as exc:
+            self.stats['sitemaps_failed'] += 1
+            self.sitemap_errors[sitemap_url] = exc
+            return
+        self.stats['sitemaps'] += 1
+        self.add_items(sitemap.items)
+
+    def _next_host(self, now: float) -> Tuple[Optional[_HostQueue], float]:
+        """
+        Pick the next host allowed to send a request, rotating for fairness.
+
+        Returns:
+            (host, 0) if one is ready, else (None, seconds until one may be)
+        """
+        wait = float('inf')
+        for _ in range(len(self._ring)):
+            queue = self._ring[0]
+            self._ring.rotate(-1)
+            if not queue.heap or queue.in_flight >= self.max_per_host:
+                continue
+            if queue.blocked_until > now:
+                wait = min(wait, queue.blocked_until - now)
+                continue
+            if queue.bucket is not None and not queue.bucket.try_acquire():
+                wait = min(wait, queue.bucket.delay())
+                continue
+            return queue, 0.0
+        return None, wait
+
+    def _record_failure(self, queue: _HostQueue, entry: Tuple, exc: Exception) -> bool:
+        """
+        Account a failed fetch and back off its host.
+
+        Returns:
+            True if the item was requeued for a retry, False if it failed for good
+        """
+        if isinstance(exc, requests.RequestException):
+            queue.failures += 1
+            if queue.failures >= self.max_failures:
+                queue.abandoned = True
+                queue.stats['dropped'] += len(queue.heap)
+                queue.heap.clear()
+            else:
+                delay = min(self.max_backoff, self.backoff * 2 ** (queue.failures - 1))
+                queue.blocked_until = time.monotonic() + delay
+                key, _, item, attempt = entry
+                if attempt < self.max_retries and _transient(exc):
+                    # Same priority; the host's backoff delays the retry
+                    heapq.heappush(queue.heap, (key, next(self._sequence), item, attempt + 1))
+                    queue.stats['retried'] += 1
+                    self.stats['retried'] += 1
+                    return True
+        # Anything else is a payload problem (e.g. hash mismatch), not a host problem
+        queue.stats['errors'] += 1
+        self.stats['errors'] += 1
+        return False
+
+    async def _fetch(self, queue: _HostQueue, entry: Tuple) -> Tuple[_HostQueue, Tuple, Any]:
+        item = entry[2]
+        try:
+            return queue, entry, await self.crawler.fetch_content(item['mUrl'], item.get('etag'))
+        except Exception as exc:
+            return queue, entry, exc
+
+    async def run(self,
+                  sitemap_urls: Iterable[str] = (),
+                  return_exceptions: bool = False) -> AsyncIterator[Tuple[Dict[str, Any], Any]]:
+        """
+        Fetch the sitemaps and every queued item, yielding results as they complete.
+
+        Sitemaps are loaded concurrently with the crawl: a site's items are
+        dispatched as soon as its sitemap arrives, so a slow sitemap host
+        does not hold up the others. Items queued with add_items()
+        beforehand are crawled as well. A failed sitemap is recorded in
+        sitemap_errors and the other sites continue. Items that fail with a
+        transient error are retried (up to max_retries) after their host's
+        backoff delay; only the final failure is reported.
+
+        Args:
+            sitemap_urls: Sitemap URLs to crawl
+            return_exceptions: Yield (item, exception) for items that failed
+                for good (otherwise they are only counted in the stats)
+
+        Yields:
+            (item, content) tuples; content is None if 304 Not Modified
+        """
+        loading = {asyncio.ensure_future(self._load_sitemap(url)) for url in sitemap_urls}
+        pending = set()
+        try:
+            while True:
+                wait = float('inf')
+                while len(pending) < self.max_concurrency:
+                    queue, wait = self._next_host(time.monotonic())
+                    if queue is None:
+                        break
+                    entry = heapq.heappop(queue.heap)
+                    queue.in_flight += 1
+                    self.stats['dispatched'] += 1
+                    pending.add(asyncio.ensure_future(self._fetch(queue, entry)))
+
+                if not pending and not loading:
+                    if wait == float('inf'):
+                        break  # nothing queued anywhere
+                    await asyncio.sleep(wait)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    pending | loading,
+                    timeout=None if wait == float('inf') else wait,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                # Finished sitemaps have queued their items; dispatch on the next pass
+                for task in done & loading:
+                    loading.discard(task)
+                    task.result()
+                for task in done & pending:
+                    pending.discard(task)
+                    queue, entry, result = task.result()
+                    item = entry[2]
+                    queue.in_flight -= 1
+                    if isinstance(result, Exception):
+                        if self._record_failure(queue, entry, result) or not return_exceptions:
+                            continue
+                    else:
+                        queue.failures = 0
+                        queue.stats['not_modified' if result is None else 'fetched'] += 1
+                    yield item, result
+        finally:
+            for task in pending | loading:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary with overall counts, per-host counts (queued, fetched,
+            not_modified, errors, retried, dropped, abandoned) and the crawler stats
+        """
+        return {
+            **self.stats,
+            'hosts': len(self._hosts),
+            'hosts_abandoned': sum(1 for queue in self._hosts.values() if queue.abandoned),
+            'per_host': {
+                host: {**queue.stats, 'abandoned': queue.abandoned}
+                for host, queue in self._hosts.items()
+            },
+            'crawler': self.crawler.get_stats(),
+        }
+
+
+class _Descending:
+    """Sort-key wrapper that inverts the ordering of any comparable key."""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key: Any):
+        self.key = key
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.key < self.key
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.key == other.key
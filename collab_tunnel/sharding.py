@@ -0,0 +1,259 @@
+"""
+Sharded crawling across processes and machines (draft-jurkovikj-collab-tunnel-01)
+
+The M-URL space is partitioned with a consistent-hash ring. Every shard
+crawls only the items that hash to it and owns the matching slice of the
+ETag cache (one cache directory per shard index, independent of the shard
+count), so shards never share mutable state. Because the partition is a pure
+function of the URL, machines need no coordinator: each node fetches the
+sitemap and crawls its own shard, e.g. `collab-tunnel crawl URL --shard 2/8`.
+Adding a shard moves only ~1/N of the URLs, so most cached ETags stay with
+the shard that will need them.
+
+Stats of the shards are combined with merge_stats().
+"""
+
+import bisect
+import hashlib
+import multiprocessing
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_REPLICAS = 64
+# HashRing namespace for splitting a node's shard across its local processes
+LOCAL_NAMESPACE = 'process-'
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent-hash ring mapping keys (M-URLs) to shard indexes.
+
+    Example usage:
+        ring = HashRing(8)
+        mine = [item for item in sitemap.items if ring.shard_for(item['mUrl']) == 3]
+    """
+
+    def __init__(self, shards: int, replicas: int = DEFAULT_REPLICAS, namespace: str = ''):
+        """
+        Args:
+            shards: Number of shards
+            replicas: Virtual nodes per shard (more = more even split)
+            namespace: Prefix of the ring's virtual node names. Rings with
+                different namespaces partition independently, e.g. to split
+                one shard's items again across local processes
+        """
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        self.shards = shards
+        self.replicas = replicas
+        self.namespace = namespace
+        points = sorted(
+            (_hash(f'{namespace}shard-{shard}-{replica}'), shard)
+            for shard in range(shards) for replica in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> int:
+        """Return the shard index that owns `key`."""
+        if self.shards == 1:
+            return 0
+        position = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[position]
+
+    def filter(self, items: Iterable[Dict[str, Any]], shard: int) -> Iterator[Dict[str, Any]]:
+        """Yield the sitemap items owned by `shard`."""
+        for item in items:
+            if self.shard_for(item['mUrl']) == shard:
+                yield item
+
+    def partition(self, items: Iterable[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split sitemap items into one list per shard."""
+        parts: List[List[Dict[str, Any]]] = [[] for _ in range(self.shards)]
+        for item in items:
+            parts[self.shard_for(item['mUrl'])].append(item)
+        return parts
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec of the form "I/N" (0-based index I of N shards).
+
+    Raises:
+        ValueError: If the spec is malformed or out of range
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected I/N (e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec {spec!r}: need 0 <= I < N")
+    return index, count
+
+
+def shard_cache_dir(cache_dir: Optional[str], shard: int, shards: int,
+                    process: Optional[int] = None) -> Optional[str]:
+    """
+    Cache directory owned by one shard (cache_dir itself when unsharded).
+
+    The directory is named after the shard index only: the ring's virtual
+    nodes are too, so when the shard count changes each shard keeps its
+    cache and only the remapped URLs start without cached ETags.
+
+    Args:
+        cache_dir: Root cache directory (None = in-memory caches)
+        shard: Shard index
+        shards: Number of shards
+        process: Local worker process within the shard (see LOCAL_NAMESPACE)
+    """
+    if cache_dir is None:
+        return None
+    path = cache_dir if shards == 1 else os.path.join(cache_dir, f'shard-{shard}')
+    if process is not None:
+        path = os.path.join(path, f'process-{process}')
+    return path
+
+
+def merge_stats(stats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge get_stats() dicts of several shards into one global view.
+
+    Counters are summed; savings_percentage and compression_savings_percentage
+    are recomputed from the summed byte counts.
+
+    Args:
+        stats: Per-shard stats dicts
+
+    Returns:
+        Merged stats dict with an added 'shards' count
+    """
+    merged: Dict[str, Any] = {}
+    shards = 0
+    for shard_stats in stats:
+        shards += 1
+        for key, value in shard_stats.items():
+            if key.endswith('_percentage'):
+                continue  # recomputed below
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + value
+    if 'bytes_downloaded' in merged and 'bytes_saved' in merged:
+        _update_savings(merged)
+    merged['shards'] = shards
+    return merged
+
+
+def _update_savings(stats: Dict[str, Any]) -> None:
+    total = stats['bytes_downloaded'] + stats['bytes_saved']
+    stats['savings_percentage'] = round(stats['bytes_saved'] / total * 100, 1) if total else 0
+    decoded = stats.get('bytes_decoded')
+    if decoded is not None:
+        stats['compression_savings_percentage'] = (
+            round((1 - stats['bytes_downloaded'] / decoded) * 100, 1) if decoded else 0
+        )
+
+
+def _crawl_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker process entry point: crawl one shard's items and return its stats."""
+    import asyncio
+    from .async_crawler import AsyncCollabTunnelCrawler
+    from .sinks import JSONLSink
+
+    async def run() -> Dict[str, Any]:
+        errors = 0
+        crawler = AsyncCollabTunnelCrawler(
+            user_agent=task['user_agent'],
+            cache_dir=task['cache_dir'],
+            max_concurrency=task['max_concurrency'],
+            max_per_host=task['max_per_host'],
+        )
+        async with crawler:
+            sink = JSONLSink(task['output']) if task['output'] else None
+            try:
+                async for item, result in crawler.crawl(task['items'], return_exceptions=True):
+                    errors += isinstance(result, Exception)
+                    if sink is not None:
+                        sink.write(item, result)
+            finally:
+                if sink is not None:
+                    sink.close()
+            stats = crawler.get_stats()
+        stats['errors'] = errors
+        return stats
+
+    return asyncio.run(run())
+
+
+def crawl_sharded(sitemap_url: str,
+                  processes: Optional[int] = None,
+                  cache_dir: Optional[str] = None,
+                  output: Optional[str] = None,
+                  user_agent: str = "CollabTunnelCrawler/1.0",
+                  max_concurrency: int = 32,
+                  max_per_host: int = 8,
+                  limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Crawl a site with one worker process per shard.
+
+    The sitemap is fetched once in the parent and its items are partitioned
+    with a HashRing; each worker crawls its slice with its own
+    AsyncCollabTunnelCrawler and per-shard cache, so JSON parsing and hash
+    checks run on all cores.
+
+    Example:
+        stats = crawl_sharded("https://example.com/llm-sitemap.json", processes=8,
+                              output="crawl-{shard}.jsonl")
+
+    Args:
+        sitemap_url: URL to sitemap
+        processes: Number of shards/worker processes (default: CPU count)
+        cache_dir: Root cache directory (one subdirectory per shard; None =
+            in-memory caches)
+        output: JSONL output path pattern with a {shard} placeholder
+            (None = don't write results)
+        user_agent: User agent string
+        max_concurrency: Maximum number of requests in flight per shard
+        max_per_host: Maximum number of requests in flight per host per shard
+        limit: Maximum number of items to crawl (None = all)
+
+    Returns:
+        Merged stats of all shards (see merge_stats), including 'errors'
+    """
+    from .crawler import CollabTunnelCrawler
+
+    processes = processes or os.cpu_count() or 1
+    if output and '{shard}' not in output:
+        raise ValueError("output must contain a {shard} placeholder")
+
+    crawler = CollabTunnelCrawler(user_agent=user_agent, cache_dir=None)
+    try:
+        sitemap = crawler.fetch_sitemap(sitemap_url)
+        sitemap_stats = crawler.get_stats()
+    finally:
+        crawler.close()
+    items = sitemap.items[:limit] if limit else sitemap.items
+
+    tasks = [{
+        'items': part,
+        'user_agent': user_agent,
+        'cache_dir': shard_cache_dir(cache_dir, shard, processes),
+        'output': output.format(shard=shard) if output else None,
+        'max_concurrency': max_concurrency,
+        'max_per_host': max_per_host,
+    } for shard, part in enumerate(HashRing(processes).partition(items))]
+
+    if processes == 1:
+        results = [_crawl_shard(tasks[0])]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_crawl_shard, tasks, chunksize=1)
+
+    merged = merge_stats(results)
+    # Account for the sitemap fetch made by the parent
+    for key in ('requests', 'bytes_downloaded', 'bytes_decoded'):
+        merged[key] += sitemap_stats[key]
+    _update_savings(merged)
+    return merged
@@ -0,0 +1,224 @@
+"""
+Result sinks for streaming crawls (draft-jurkovikj-collab-tunnel-01)
+
+Sinks consume the (item, content) pairs produced by CollabTunnelCrawler.crawl()
+and AsyncCollabTunnelCrawler.crawl() one at a time, so nothing has to be
+collected in memory:
+
+    with JSONLSink("crawl.jsonl") as sink:
+        pipe(crawler.crawl(sitemap.items), sink)
+
+    await apipe(async_crawler.crawl(sitemap.items), QueueSink(queue))
+
+A sink that blocks (a full bounded queue, a slow callback) stalls the crawl:
+the sync crawler fetches one item at a time, and the async crawler keeps at
+most a bounded window of fetches in flight, so memory stays bounded by the
+concurrency settings rather than by the size of the site.
+"""
+
+import asyncio
+import inspect
+import json
+import queue as queue_module
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, Optional, TextIO, Tuple, Union
+
+
+def result_record(item: Dict[str, Any], result: Any) -> Dict[str, Any]:
+    """
+    Build the JSON record written for one crawl result.
+
+    Args:
+        item: Sitemap item
+        result: Parsed payload, None for 304 Not Modified, or an exception
+            (when crawling with return_exceptions=True)
+
+    Returns:
+        Dict with mUrl, cUrl, etag, status ('fetched', 'not_modified' or
+        'error') and either 'content' or 'error'
+    """
+    record = {'mUrl': item.get('mUrl'), 'cUrl': item.get('cUrl'), 'etag': item.get('etag')}
+    if isinstance(result, BaseException):
+        record.update(status='error', error=f'{type(result).__name__}: {result}')
+    elif result is None:
+        record.update(status='not_modified')
+    else:
+        # Typed payloads (see decoders.Payload) are written as plain objects
+        content = result.to_dict() if hasattr(result, 'to_dict') else result
+        record.update(status='fetched', content=content)
+    return record
+
+
+class ResultSink:
+    """
+    Base class for crawl result sinks.
+
+    write() receives each (item, content) pair; close() is called once the
+    crawl is finished. Either may return an awaitable, which apipe() awaits.
+    """
+
+    def write(self, item: Dict[str, Any], content: Any) -> Any:
+        raise NotImplementedError
+
+    def close(self) -> Any:
+        """Flush and release resources held by the sink."""
+
+    def __enter__(self) -> 'ResultSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JSONLSink(ResultSink):
+    """
+    Append one JSON record per result (see result_record()) to a file.
+
+    Example usage:
+        with JSONLSink("crawl.jsonl", skip_not_modified=True) as sink:
+            pipe(crawler.crawl(sitemap.items), sink)
+    """
+
+    def __init__(self,
+                 output: Union[str, TextIO],
+                 append: bool = True,
+                 flush: bool = True,
+                 skip_not_modified: bool = False):
+        """
+        Args:
+            output: File path, or an open text stream (not closed by the sink)
+            append: Append to an existing file instead of truncating it
+            flush: Flush after every record, so a crash loses at most the
+                record being written
+            skip_not_modified: Don't write records for 304 responses
+        """
+        if isinstance(output, str):
+            self._stream = open(output, 'a' if append else 'w', encoding='utf-8')
+            self._owns_stream = True
+        else:
+            self._stream = output
+            self._owns_stream = False
+        self.flush = flush
+        self.skip_not_modified = skip_not_modified
+        self.records = 0
+
+    def write(self, item: Dict[str, Any], content: Any) -> None:
+        if content is None and self.skip_not_modified:
+            return
+        record = result_record(item, content)
+        self._stream.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        if self.flush:
+            self._stream.flush()
+        self.records += 1
+
+    def close(self) -> None:
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+
+class CallbackSink(ResultSink):
+    """
+    Call a function with every (item, content) pair.
+
+    The callback may be a coroutine function when used with apipe().
+    """
+
+    def __init__(self, callback: Callable[[Dict[str, Any], Any], Any]):
+        self.callback = callback
+
+    def write(self, item: Dict[str, Any], content: Any) -> Any:
+        return self.callback(item, content)
+
+
+class QueueSink(ResultSink):
+    """
+    Put every (item, content) pair on a queue for another consumer.
+
+    Works with queue.Queue (blocking put, for consumer threads) and
+    asyncio.Queue (awaited put, for consumer tasks via apipe()). Give the
+    queue a maxsize to apply backpressure: the crawl waits while the
+    queue is full. close() puts `sentinel` so consumers know to stop.
+    """
+
+    def __init__(self,
+                 queue: Union[queue_module.Queue, asyncio.Queue],
+                 sentinel: Optional[Any] = None):
+        """
+        Args:
+            queue: queue.Queue or asyncio.Queue to put results on
+            sentinel: Value put on the queue by close()
+        """
+        self.queue = queue
+        self.sentinel = sentinel
+
+    def write(self, item: Dict[str, Any], content: Any) -> Any:
+        return self.queue.put((item, content))
+
+    def close(self) -> Any:
+        return self.queue.put(self.sentinel)
+
+
+def _as_sinks(sinks: Tuple[Union[ResultSink, Callable], ...]):
+    return [sink if isinstance(sink, ResultSink) else CallbackSink(sink) for sink in sinks]
+
+
+def pipe(results: Iterable[Tuple[Dict[str, Any], Any]],
+         *sinks: Union[ResultSink, Callable],
+         close: bool = True) -> int:
+    """
+    Feed crawl results to one or more sinks as they are produced.
+
+    Args:
+        results: Iterable of (item, content) pairs, e.g. crawler.crawl(items)
+        *sinks: ResultSink instances or plain callables
+        close: Close the sinks when the results are exhausted
+
+    Returns:
+        Number of results consumed
+    """
+    targets = _as_sinks(sinks)
+    count = 0
+    try:
+        for item, content in results:
+            for sink in targets:
+                sink.write(item, content)
+            count += 1
+    finally:
+        if close:
+            for sink in targets:
+                sink.close()
+    return count
+
+
+async def apipe(results: AsyncIterable[Tuple[Dict[str, Any], Any]],
+                *sinks: Union[ResultSink, Callable],
+                close: bool = True) -> int:
+    """
+    Async version of pipe(); awaits sinks that return awaitables.
+
+    Args:
+        results: Async iterable of (item, content) pairs, e.g.
+            AsyncCollabTunnelCrawler.crawl(items)
+        *sinks: ResultSink instances or plain (sync or async) callables
+        close: Close the sinks when the results are exhausted
+
+    Returns:
+        Number of results consumed
+    """
+    targets = _as_sinks(sinks)
+    count = 0
+    try:
+        async for item, content in results:
+            for sink in targets:
+                pending = sink.write(item, content)
+                if inspect.isawaitable(pending):
+                    await pending
+            count += 1
+    finally:
+        if close:
+            for sink in targets:
+                pending = sink.close()
+                if inspect.isawaitable(pending):
+                    await pending
+    return count
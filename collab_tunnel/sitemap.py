@@ -2,9 +2,28 @@
 Sitemap parser for TCT protocol (draft-jurkovikj-collab-tunnel-01)
 """
 
-from typing import Dict, List, Any, Optional
+import bisect
+import codecs
+import json
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Union
 from datetime import datetime
 
+from .delta import SitemapDelta, diff_sitemaps
+from .records import SitemapItem
+
+REQUIRED_FIELDS = ('cUrl', 'mUrl', 'etag')
+
+
+def _validate_item(idx: int, item: Any):
+    """Validate a single sitemap item's required fields."""
+    if not isinstance(item, dict):
+        raise ValueError(f"Sitemap item {idx} must be an object")
+    for field in REQUIRED_FIELDS:
+        if field not in item:
+            raise ValueError(
+                f"Sitemap item {idx} missing required field: {field}"
+            )
+
 
 class SitemapParser:
     """
@@ -23,20 +42,37 @@ class SitemapParser:
             }
         ]
     }
+
+    Lookups build their indexes on first use and treat the items as immutable
+    from then on. Replacing the items list or changing its length is detected
+    and triggers a rebuild, but replacing an item in place (items[i] = ...) is
+    not; build a new parser instead.
     """
 
-    def __init__(self, sitemap_data: Dict[str, Any]):
+    def __init__(self, sitemap_data: Dict[str, Any], compact: bool = False):
         """
         Initialize sitemap parser.
 
         Args:
             sitemap_data: Parsed JSON sitemap dictionary
+            compact: Store items as compact read-only SitemapItem records
+                (digest etags, int timestamps, interned URLs) instead of dicts
 
         Raises:
             ValueError: If sitemap format is invalid
         """
         self.data = sitemap_data
         self._validate()
+        if compact:
+            # Shallow copy so the caller's dict and items list stay untouched
+            self.data = dict(sitemap_data)
+            self.data['items'] = [SitemapItem(item) for item in self.data['items']]
+        # Lookup indexes, built on first use (see _url_indexes)
+        self._indexed: Optional[tuple] = None
+        self._by_canonical: Dict[str, Dict[str, Any]] = {}
+        self._by_mobile: Dict[str, Dict[str, Any]] = {}
+        self._modified_times: Optional[List[float]] = None
+        self._modified_positions: List[int] = []
 
     def _validate(self):
         """Validate sitemap format."""
@@ -47,12 +83,7 @@ class SitemapParser:
             raise ValueError("Sitemap 'items' must be an array")
 
         for idx, item in enumerate(self.data['items']):
-            required = ['cUrl', 'mUrl', 'etag']
-            for field in required:
-                if field not in item:
-                    raise ValueError(
-                        f"Sitemap item {idx} missing required field: {field}"
-                    )
+            _validate_item(idx, item)
 
     @property
     def items(self) -> List[Dict[str, Any]]:
@@ -69,27 +100,59 @@ class SitemapParser:
         """Get total number of items."""
         return len(self.items)
 
+    def _index_key(self) -> tuple:
+        # Cheap change detection: catches a new list or appends/removals only
+        items = self.items
+        return (id(items), len(items))
+
+    def _url_indexes(self):
+        """Build the cUrl/mUrl hash indexes on first use (or after items change)."""
+        key = self._index_key()
+        if self._indexed != key:
+            items = self.items
+            # Reversed so the first occurrence of a duplicate URL wins
+            self._by_canonical = {item['cUrl']: item for item in reversed(items)}
+            self._by_mobile = {item['mUrl']: item for item in reversed(items)}
+            self._modified_times = None
+            self._modified_positions = []
+            self._indexed = key
+
+    def _modified_index(self):
+        """Build the sorted 'modified' timestamp index on first use."""
+        self._url_indexes()
+        if self._modified_times is not None:
+            return
+
+        dated = []
+        for position, item in enumerate(self.items):
+            if isinstance(item, SitemapItem) and item.modified is not None:
+                dated.append((item.modified, position))
+                continue
+            modified_str = item.get('modified')
+            if modified_str:
+                modified = datetime.fromisoformat(modified_str.replace('Z', '+00:00'))
+                dated.append((modified.timestamp(), position))
+        dated.sort()
+        self._modified_times = [timestamp for timestamp, _ in dated]
+        self._modified_positions = [position for _, position in dated]
+
     def filter_by_date(self, since: datetime) -> List[Dict[str, Any]]:
         """
         Filter items modified since a given date.
 
+        Uses a binary search over the pre-parsed 'modified' timestamps, which
+        are built once on first call. Naive datetimes are treated as local time.
+
         Args:
             since: Datetime to filter from
 
         Returns:
-            List of items modified after 'since'
+            List of items modified after 'since', in sitemap order
         """
-        filtered = []
-        for item in self.items:
-            modified_str = item.get('modified')
-            if not modified_str:
-                continue
-
-            modified = datetime.fromisoformat(modified_str.replace('Z', '+00:00'))
-            if modified >= since:
-                filtered.append(item)
-
-        return filtered
+        self._modified_index()
+        start = bisect.bisect_left(self._modified_times, since.timestamp())
+        items = self.items
+        return [items[position] for position in sorted(self._modified_positions[start:])]
 
     def find_by_canonical(self, c_url: str) -> Optional[Dict[str, Any]]:
         """
@@ -101,10 +164,48 @@ class SitemapParser:
         Returns:
             Matching item or None
         """
-        for item in self.items:
-            if item['cUrl'] == c_url:
-                return item
-        return None
+        self._url_indexes()
+        return self._by_canonical.get(c_url)
+
+    def find_by_mobile_url(self, m_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Find sitemap item by machine-readable URL (M-URL).
+
+        Args:
+            m_url: M-URL to search for
+
+        Returns:
+            Matching item or None
+        """
+        self._url_indexes()
+        return self._by_mobile.get(m_url)
+
+    def snapshot(self) -> Dict[str, str]:
+        """
+        Get a compact {mUrl: etag} snapshot for diffing against later sitemaps.
+
+        Returns:
+            Dictionary mapping each M-URL to its etag
+        """
+        return {item['mUrl']: item['etag'] for item in self.items}
+
+    def diff(self, previous: Union['SitemapParser', Dict[str, str]]) -> SitemapDelta:
+        """
+        Diff this sitemap against a previous snapshot by mUrl and etag.
+
+        Example:
+            delta = sitemap.diff(previous_snapshot)
+            for item in delta.to_fetch:
+                crawler.fetch_content(item['mUrl'], item['etag'])
+            previous_snapshot = sitemap.snapshot()
+
+        Args:
+            previous: Previous SitemapParser, or {mUrl: etag} from snapshot()
+
+        Returns:
+            SitemapDelta with added, changed, unchanged and removed sets
+        """
+        return diff_sitemaps(self.items, previous)
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -124,3 +225,153 @@ class SitemapParser:
             'has_dates': sum(1 for item in self.items if 'modified' in item),
             'has_etags': sum(1 for item in self.items if 'etag' in item)
         }
+
+
+class StreamingSitemapParser:
+    """
+    Incremental parser for large TCT JSON sitemaps.
+
+    Parses the 'items' array straight from a stream of chunks and yields each
+    validated item as soon as it is complete, so memory stays flat no matter
+    how many items the sitemap has. Items can only be iterated once.
+
+    Top-level fields ('version', 'profile', ...) are collected in `data` as
+    they are encountered; fields that follow 'items' in the document are only
+    available once iteration has finished.
+
+    Example usage:
+        sitemap = crawler.iter_sitemap("https://example.com/llm-sitemap.json")
+        for item in sitemap:
+            if crawler.should_fetch(item):
+                crawler.fetch_content(item['mUrl'], item['etag'])
+    """
+
+    _WHITESPACE = ' \t\n\r'
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        """
+        Args:
+            chunks: Iterable of bytes (UTF-8) or str chunks of the sitemap JSON
+        """
+        self.data: Dict[str, Any] = {}
+        self.count = 0
+        self._chunks = iter(chunks)
+        self._started = False
+
+    @property
+    def version(self) -> int:
+        """Get sitemap version."""
+        return self.data.get('version', 1)
+
+    @property
+    def profile(self) -> Optional[str]:
+        """Get sitemap profile (e.g. 'tct-1')."""
+        return self.data.get('profile')
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._started:
+            raise ValueError("StreamingSitemapParser can only be iterated once")
+        self._started = True
+        return self._parse()
+
+    def _parse(self) -> Iterator[Dict[str, Any]]:
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        buf = ''
+        pos = 0
+        eof = False
+        state = 'start'
+        key = None
+        seen_items = False
+
+        while True:
+            # Skip whitespace
+            while pos < len(buf) and buf[pos] in self._WHITESPACE:
+                pos += 1
+
+            need_more = pos >= len(buf)
+            if not need_more:
+                ch = buf[pos]
+                if state == 'start':
+                    if ch != '{':
+                        raise ValueError("Sitemap must be a JSON object")
+                    pos += 1
+                    state = 'key'
+                elif state == 'key':
+                    if ch == '}':
+                        break
+                    if ch == ',':
+                        pos += 1
+                        continue
+                    try:
+                        key, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        need_more = True
+                    else:
+                        if not isinstance(key, str):
+                            raise ValueError("Invalid sitemap JSON: expected object key")
+                        pos = end
+                        state = 'colon'
+                elif state == 'colon':
+                    if ch != ':':
+                        raise ValueError("Invalid sitemap JSON: expected ':'")
+                    pos += 1
+                    state = 'items_start' if key == 'items' else 'value'
+                elif state == 'value':
+                    try:
+                        value, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        need_more = True
+                    else:
+                        # A value ending exactly at the buffer edge (e.g. a
+                        # number) may continue in the next chunk.
+                        if end == len(buf) and not eof:
+                            need_more = True
+                        else:
+                            self.data[key] = value
+                            pos = end
+                            state = 'key'
+                elif state == 'items_start':
+                    if ch != '[':
+                        raise ValueError("Sitemap 'items' must be an array")
+                    seen_items = True
+                    pos += 1
+                    state = 'items'
+                elif state == 'items':
+                    if ch == ']':
+                        pos += 1
+                        state = 'key'
+                        continue
+                    if ch == ',':
+                        pos += 1
+                        continue
+                    try:
+                        item, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        need_more = True
+                    else:
+                        if end == len(buf) and not eof:
+                            need_more = True
+                        else:
+                            pos = end
+                            _validate_item(self.count, item)
+                            self.count += 1
+                            yield item
+
+            if need_more:
+                if eof:
+                    raise ValueError("Invalid sitemap JSON: unexpected end of document")
+                # Drop consumed text before appending the next chunk
+                buf = buf[pos:]
+                pos = 0
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    eof = True
+                    buf += text_decoder.decode(b'', final=True)
+                elif isinstance(chunk, bytes):
+                    buf += text_decoder.decode(chunk)
+                else:
+                    buf += chunk
+
+        if not seen_items:
+            raise ValueError("Sitemap missing 'items' array")
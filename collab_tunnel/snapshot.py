@@ -0,0 +1,648 @@
+"""
+Memory-mapped read-only snapshots of sitemaps and ETag caches (draft-jurkovikj-collab-tunnel-01)
+
+A fleet of crawler workers on one machine would otherwise each parse the
+same multi-megabyte sitemap JSON and load the same ETag cache into private
+memory. A snapshot is a compact binary file that every worker maps
+read-only instead: opening it only reads the header, pages are shared
+through the OS page cache, and records are decoded on access.
+
+File layout (little-endian):
+
+- header: magic, format version, kind (sitemap/cache), row count and offsets
+- rows: fixed-width, one per item/entry. A presence bitmask, then the
+  SitemapItem/CacheEntry slots: URLs as (offset, length) references into
+  the string table, etags/hashes as 32-byte digests, timestamps and sizes
+  as int64, and non-compact values (record `extra`) as a JSON string
+- hash indexes: open addressing over CRC-32 of the URL, one u32 slot
+  (row + 1) per bucket, for mUrl/cUrl (sitemap) or the M-URL key (cache)
+- string table: UTF-8 URLs and extras
+- metadata: JSON (sitemap version, profile and other top-level fields)
+
+Writers build the file next to the target and os.replace() it into place,
+so readers always see either the old or the new snapshot, never a partial
+one. Open readers keep their mapping of the old file until reload().
+
+Example usage:
+    # Writer (e.g. once per sitemap refresh)
+    write_sitemap_snapshot("sitemap.snap", crawler.fetch_sitemap(url))
+    write_cache_snapshot("etags.snap", crawler.cache)
+
+    # Workers
+    sitemap = SitemapSnapshot("sitemap.snap")
+    crawler = CollabTunnelCrawler(cache=SnapshotCache("etags.snap"))
+    plan = crawler.plan(sitemap)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .cache import CacheBackend, MemoryCache
+from .delta import SitemapDelta, diff_sitemaps
+from .records import CacheEntry, SitemapItem, _Record
+from .sitemap import SitemapParser
+
+MAGIC = b'TCTSNAP\x00'
+FORMAT_VERSION = 1
+
+_SITEMAP = 1
+_CACHE = 2
+
+# Column types
+_STR = 's'
+_DIGEST = 'd'
+_INT = 'i'
+_FORMATS = {_STR: 'II', _DIGEST: '32s', _INT: 'q'}
+
+# (attribute, type) per row; cache rows start with their M-URL key
+_COLUMNS = {
+    _SITEMAP: (('c_url', _STR), ('m_url', _STR), ('etag', _DIGEST),
+               ('modified', _INT), ('estimated_size', _INT)),
+    _CACHE: (('key', _STR), ('etag', _DIGEST), ('content_hash', _DIGEST),
+             ('fetched_at', _INT), ('estimated_size', _INT), ('first_checked', _INT),
+             ('checks', _INT), ('changes', _INT), ('last_checked', _INT), ('last_changed', _INT)),
+}
+_RECORDS = {_SITEMAP: SitemapItem, _CACHE: CacheEntry}
+# Indexed string columns, by position in _COLUMNS
+_INDEXED = {_SITEMAP: (1, 0), _CACHE: (0,)}
+
+# magic, format version, kind, index count, row size, rows, offsets of rows,
+# strings (+ size) and metadata (+ size)
+_HEADER = struct.Struct('<8sHHHxxIQQQQQQ')
+# column, slot count, offset
+_INDEX = struct.Struct('<IIQ')
+_U32 = struct.Struct('<I')
+_STR_REF = struct.Struct('<II')
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_U32_MAX = (1 << 32) - 1
+
+
+def _row_struct(kind: int) -> struct.Struct:
+    # Presence bitmask, the columns, then the extras reference
+    return struct.Struct('<I' + ''.join(_FORMATS[column_type] for _, column_type in _COLUMNS[kind]) + 'II')
+
+
+def _slot_count(count: int) -> int:
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+def _build_index(keys: List[Optional[bytes]]) -> bytes:
+    """Open-addressing table of row + 1 (0 = empty); the first occurrence of a key wins."""
+    slots = _slot_count(len(keys))
+    mask = slots - 1
+    table = [0] * slots
+    seen = set()
+    for row, key in enumerate(keys):
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        slot = zlib.crc32(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = row + 1
+    return struct.pack(f'<{slots}I', *table)
+
+
+def _pad(offset: int) -> int:
+    return -offset % 8
+
+
+def _encode(kind: int, rows: Iterable[Tuple[Optional[str], Mapping]],
+            meta: Dict[str, Any]) -> Tuple[List[bytes], int]:
+    """Build the snapshot file contents; returns (chunks, row count)."""
+    record_type = _RECORDS[kind]
+    columns = _COLUMNS[kind]
+    row_struct = _row_struct(kind)
+    # Dict key for each attribute, for values that must move to extras
+    dict_keys = {attribute: key for key, attribute, _, _ in record_type._FIELDS}
+
+    strings = bytearray()
+    packed = bytearray()
+    index_keys: Dict[int, List[Optional[bytes]]] = {column: [] for column in _INDEXED[kind]}
+
+    def add_string(data: bytes) -> Tuple[int, int]:
+        start = len(strings)
+        strings.extend(data)
+        if len(strings) > _U32_MAX:
+            raise ValueError("Snapshot string table exceeds 4 GiB")
+        return start, len(data)
+
+    count = 0
+    for key, item in rows:
+        record = item if type(item) is record_type else record_type(item)
+        extra = dict(record.extra) if record.extra else None
+        present = 0
+        values: List[Any] = []
+        for position, (attribute, column_type) in enumerate(columns):
+            value = key if attribute == 'key' else getattr(record, attribute)
+            if column_type == _INT and value is not None and not _INT64_MIN <= value <= _INT64_MAX:
+                if extra is None:
+                    extra = {}
+                extra[dict_keys[attribute]] = value
+                value = None
+            if value is None:
+                values.extend((0, 0) if column_type == _STR else (b'' if column_type == _DIGEST else 0,))
+            elif column_type == _STR:
+                data = value.encode('utf-8')
+                values.extend(add_string(data))
+                present |= 1 << position
+            else:
+                values.append(value)
+                present |= 1 << position
+            if position in index_keys:
+                index_keys[position].append(None if value is None else data)
+        if extra:
+            values.extend(add_string(json.dumps(extra, separators=(',', ':')).encode('utf-8')))
+            present |= 1 << len(columns)
+        else:
+            values.extend((0, 0))
+        packed.extend(row_struct.pack(present, *values))
+        count += 1
+
+    indexes = [(column, _build_index(keys)) for column, keys in index_keys.items()]
+    meta_data = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+
+    offset = _HEADER.size + _INDEX.size * len(indexes)
+    rows_offset = offset + _pad(offset)
+    directory = []
+    chunks: List[bytes] = [b'\0' * _pad(offset), bytes(packed)]
+    offset = rows_offset + len(packed)
+    for column, table in indexes:
+        padding = _pad(offset)
+        chunks.append(b'\0' * padding)
+        offset += padding
+        directory.append(_INDEX.pack(column, len(table) // 4, offset))
+        chunks.append(table)
+        offset += len(table)
+    strings_offset = offset
+    meta_offset = strings_offset + len(strings)
+    chunks.extend((bytes(strings), meta_data))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, kind, len(indexes), row_struct.size, count,
+                          rows_offset, strings_offset, len(strings), meta_offset, len(meta_data))
+    return [header] + directory + chunks, count
+
+
+def _atomic_write(path: str, chunks: Iterable[bytes]) -> None:
+    """Write to a temporary file in the target directory, fsync, then os.replace()."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_sitemap_snapshot(path: str, sitemap: Union[Any, Iterable[Mapping]]) -> int:
+    """
+    Write a sitemap snapshot atomically.
+
+    Args:
+        path: Snapshot file to create or replace
+        sitemap: SitemapParser (its top-level fields are kept as metadata),
+            SitemapSnapshot, or an iterable of sitemap items
+
+    Returns:
+        Number of items written
+    """
+    if isinstance(sitemap, SitemapParser):
+        meta = {key: value for key, value in sitemap.data.items() if key != 'items'}
+        items = sitemap.items
+    elif isinstance(sitemap, SitemapSnapshot):
+        meta = sitemap.metadata
+        items = sitemap
+    else:
+        meta = {}
+        items = sitemap
+    chunks, count = _encode(_SITEMAP, ((None, item) for item in items), meta)
+    _atomic_write(path, chunks)
+    return count
+
+
+def write_cache_snapshot(path: str, cache: Mapping) -> int:
+    """
+    Write a crawler ETag cache snapshot atomically.
+
+    Example:
+        write_cache_snapshot(".cache/etags.snap", crawler.cache)
+
+    Args:
+        path: Snapshot file to create or replace
+        cache: Any cache backend or mapping of M-URL -> entry
+
+    Returns:
+        Number of entries written
+    """
+    chunks, count = _encode(_CACHE, cache.items(), {})
+    _atomic_write(path, chunks)
+    return count
+
+
+class _MappedFile:
+    """One mapped snapshot file; replaced as a whole on reload()."""
+
+    def __init__(self, path: str, kind: int):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < _HEADER.size:
+                raise ValueError(f"Not a TCT snapshot: {path}")
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, file_kind, index_count, row_size, count, rows_offset,
+         strings_offset, strings_size, meta_offset, meta_size) = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            buf.close()
+            raise ValueError(f"Not a TCT snapshot: {path}")
+        if version != FORMAT_VERSION:
+            buf.close()
+            raise ValueError(f"Unsupported snapshot format version {version}: {path}")
+        if file_kind != kind:
+            buf.close()
+            raise ValueError(f"Snapshot {path} holds a {'sitemap' if file_kind == _SITEMAP else 'cache'}")
+        self.row_struct = _row_struct(kind)
+        if row_size != self.row_struct.size:
+            buf.close()
+            raise ValueError(f"Corrupt snapshot row size: {path}")
+
+        self.buf = buf
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.count = count
+        self.row_size = row_size
+        self.rows_offset = rows_offset
+        self.strings_offset = strings_offset
+        self.meta = json.loads(buf[meta_offset:meta_offset + meta_size].decode('utf-8'))
+
+        columns = _COLUMNS[kind]
+        # Byte offset of each string column within a row (after the bitmask)
+        column_offsets = []
+        offset = 4
+        for _, column_type in columns:
+            column_offsets.append(offset)
+            offset += struct.calcsize('<' + _FORMATS[column_type])
+        self.indexes = {}
+        for position in range(index_count):
+            column, slots, index_offset = _INDEX.unpack_from(buf, _HEADER.size + position * _INDEX.size)
+            self.indexes[column] = (index_offset, slots - 1, column_offsets[column])
+        self.record_type = _RECORDS[kind]
+        # (presence bit, index into the unpacked row, is a string) per column
+        plan = []
+        index = 1
+        for position, (_, column_type) in enumerate(columns):
+            plan.append((1 << position, index, column_type == _STR))
+            index += 2 if column_type == _STR else 1
+        self.plan = tuple(plan)
+        self.all_columns = (1 << len(columns)) - 1
+        self.extras_bit = 1 << len(columns)
+        self.extras_index = index
+
+    def string(self, start: int, length: int) -> str:
+        start += self.strings_offset
+        return self.buf[start:start + length].decode('utf-8')
+
+    def row(self, position: int) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+        """Decoded column values and extras of one row."""
+        values = self.row_struct.unpack_from(self.buf, self.rows_offset + position * self.row_size)
+        present = values[0]
+        buf = self.buf
+        base = self.strings_offset
+        intern = sys.intern
+        if present == self.all_columns:
+            # Common case: every column set, no extras
+            return [intern(str(buf[base + values[index]:base + values[index] + values[index + 1]], 'utf-8'))
+                    if is_str else values[index]
+                    for _, index, is_str in self.plan], None
+        decoded = [None if not present & bit else
+                   intern(str(buf[base + values[index]:base + values[index] + values[index + 1]], 'utf-8'))
+                   if is_str else values[index]
+                   for bit, index, is_str in self.plan]
+        extra = None
+        if present & self.extras_bit:
+            index = self.extras_index
+            extra = json.loads(self.string(values[index], values[index + 1]))
+        return decoded, extra
+
+    def lookup(self, column: int, key: str) -> int:
+        """Row of the first item whose string column equals key, or -1."""
+        index = self.indexes.get(column)
+        if index is None:
+            return -1
+        slots_offset, mask, column_offset = index
+        buf = self.buf
+        data = key.encode('utf-8')
+        slot = zlib.crc32(data) & mask
+        while True:
+            row = _U32.unpack_from(buf, slots_offset + slot * 4)[0]
+            if not row:
+                return -1
+            row -= 1
+            start, length = _STR_REF.unpack_from(buf, self.rows_offset + row * self.row_size + column_offset)
+            if length == len(data):
+                start += self.strings_offset
+                if buf[start:start + length] == data:
+                    return row
+            slot = (slot + 1) & mask
+
+
+class _Snapshot:
+    _KIND = 0
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot file written by write_*_snapshot()
+
+        Raises:
+            ValueError: If the file is not a snapshot of this kind
+        """
+        self.path = path
+        self._file: Optional[_MappedFile] = _MappedFile(path, self._KIND)
+
+    def _mapped(self) -> _MappedFile:
+        mapped = self._file
+        if mapped is None:
+            raise ValueError("Snapshot is closed")
+        return mapped
+
+    def reload(self) -> bool:
+        """
+        Map the current file at path if a writer has replaced it.
+
+        Records already returned stay valid; the old mapping is released once
+        no reader holds it.
+
+        Returns:
+            True if a new snapshot was mapped
+        """
+        stat = os.stat(self.path)
+        identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._file is not None and identity == self._file.identity:
+            return False
+        self._file = _MappedFile(self.path, self._KIND)
+        return True
+
+    def _record(self, mapped: _MappedFile, row: int) -> _Record:
+        values, extra = mapped.row(row)
+        return mapped.record_type.from_slots(values, extra)
+
+    def close(self) -> None:
+        """Unmap the snapshot."""
+        mapped, self._file = self._file, None
+        if mapped is not None:
+            mapped.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SitemapSnapshot(_Snapshot, Sequence):
+    """
+    Read-only, memory-mapped sitemap.
+
+    A Sequence of SitemapItem records with the SitemapParser lookup API, so
+    it can be passed to crawler.plan(), crawl() and diff_sitemaps() as-is.
+
+    Example usage:
+        sitemap = SitemapSnapshot("sitemap.snap")
+        item = sitemap.find_by_mobile_url(m_url)
+        plan = crawler.plan(sitemap)
+    """
+
+    _KIND = _SITEMAP
+
+    def __len__(self) -> int:
+        return self._mapped().count
+
+    def __getitem__(self, position):
+        mapped = self._mapped()
+        if isinstance(position, slice):
+            return [self._record(mapped, row) for row in range(*position.indices(mapped.count))]
+        if position < 0:
+            position += mapped.count
+        if not 0 <= position < mapped.count:
+            raise IndexError('snapshot index out of range')
+        return self._record(mapped, position)
+
+    def __iter__(self) -> Iterator[SitemapItem]:
+        mapped = self._mapped()
+        for row in range(mapped.count):
+            yield self._record(mapped, row)
+
+    @property
+    def items(self) -> 'SitemapSnapshot':
+        """The items (this snapshot), for code written against SitemapParser."""
+        return self
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Top-level sitemap fields other than 'items'."""
+        return dict(self._mapped().meta)
+
+    @property
+    def version(self) -> int:
+        """Get sitemap version."""
+        return self._mapped().meta.get('version', 1)
+
+    @property
+    def profile(self) -> Optional[str]:
+        """Get sitemap profile, if declared."""
+        return self._mapped().meta.get('profile')
+
+    @property
+    def count(self) -> int:
+        """Get total number of items."""
+        return len(self)
+
+    def _find(self, column: int, url: str) -> Optional[SitemapItem]:
+        mapped = self._mapped()
+        row = mapped.lookup(column, url)
+        return None if row < 0 else self._record(mapped, row)
+
+    def find_by_canonical(self, c_url: str) -> Optional[SitemapItem]:
+        """
+        Find sitemap item by canonical URL.
+
+        Args:
+            c_url: Canonical URL to search for
+
+        Returns:
+            Matching item or None
+        """
+        return self._find(0, c_url)
+
+    def find_by_mobile_url(self, m_url: str) -> Optional[SitemapItem]:
+        """
+        Find sitemap item by machine-readable URL (M-URL).
+
+        Args:
+            m_url: M-URL to search for
+
+        Returns:
+            Matching item or None
+        """
+        return self._find(1, m_url)
+
+    def snapshot(self) -> Dict[str, str]:
+        """
+        Get a compact {mUrl: etag} snapshot for diffing against later sitemaps.
+
+        Returns:
+            Dictionary mapping each M-URL to its etag
+        """
+        return {item['mUrl']: item['etag'] for item in self}
+
+    def diff(self, previous: Union[Any, Dict[str, str]]) -> SitemapDelta:
+        """
+        Diff this sitemap against a previous snapshot by mUrl and etag.
+
+        Args:
+            previous: Previous SitemapParser/SitemapSnapshot, or {mUrl: etag}
+
+        Returns:
+            SitemapDelta with added, changed, unchanged and removed sets
+        """
+        return diff_sitemaps(self, previous)
+
+
+class CacheSnapshot(_Snapshot, Mapping):
+    """
+    Read-only, memory-mapped crawler ETag cache (M-URL -> CacheEntry).
+
+    Use SnapshotCache to give a crawler a writable view of it.
+    """
+
+    _KIND = _CACHE
+
+    def __getitem__(self, m_url: str) -> CacheEntry:
+        mapped = self._mapped()
+        row = mapped.lookup(0, m_url) if isinstance(m_url, str) else -1
+        if row < 0:
+            raise KeyError(m_url)
+        values, extra = mapped.row(row)
+        return CacheEntry.from_slots(values[1:], extra)
+
+    def __contains__(self, m_url: object) -> bool:
+        return isinstance(m_url, str) and self._mapped().lookup(0, m_url) >= 0
+
+    def get_many(self, m_urls: Iterable[str]) -> Dict[str, CacheEntry]:
+        """
+        Look up many entries at once.
+
+        Args:
+            m_urls: M-URLs to look up
+
+        Returns:
+            Dict of M-URL -> entry for the M-URLs in the snapshot
+        """
+        mapped = self._mapped()
+        entries = {}
+        for m_url in m_urls:
+            row = mapped.lookup(0, m_url)
+            if row >= 0:
+                values, extra = mapped.row(row)
+                entries[m_url] = CacheEntry.from_slots(values[1:], extra)
+        return entries
+
+    def __iter__(self) -> Iterator[str]:
+        mapped = self._mapped()
+        for row in range(mapped.count):
+            start, length = _STR_REF.unpack_from(mapped.buf, mapped.rows_offset + row * mapped.row_size + 4)
+            yield sys.intern(mapped.string(start, length))
+
+    def __len__(self) -> int:
+        return self._mapped().count
+
+
+class SnapshotCache(CacheBackend):
+    """
+    Crawler cache backend reading through to a CacheSnapshot.
+
+    Lookups hit the shared, memory-mapped snapshot; this worker's writes and
+    deletes go to an in-process overlay. Publish the merged state with
+    write_cache_snapshot(path, cache), then reload() in the workers.
+
+    Example usage:
+        cache = SnapshotCache(".cache/etags.snap")
+        crawler = CollabTunnelCrawler(cache=cache)
+    """
+
+    def __init__(self, snapshot: Union[str, CacheSnapshot], overlay: Optional[CacheBackend] = None):
+        """
+        Args:
+            snapshot: CacheSnapshot, or path to a cache snapshot file
+            overlay: Backend for local writes (compact MemoryCache if None)
+        """
+        self.snapshot = snapshot if isinstance(snapshot, CacheSnapshot) else CacheSnapshot(snapshot)
+        self.overlay = overlay if overlay is not None else MemoryCache(compact=True)
+        self._deleted = set()
+
+    def __getitem__(self, m_url: str) -> Mapping:
+        try:
+            return self.overlay[m_url]
+        except KeyError:
+            if m_url in self._deleted:
+                raise
+        return self.snapshot[m_url]
+
+    def __setitem__(self, m_url: str, entry: Mapping) -> None:
+        self.overlay[m_url] = entry
+        self._deleted.discard(m_url)
+
+    def __delitem__(self, m_url: str) -> None:
+        if m_url not in self:
+            raise KeyError(m_url)
+        self.overlay.pop(m_url, None)
+        if m_url in self.snapshot:
+            self._deleted.add(m_url)
+
+    def get_many(self, m_urls: Iterable[str]) -> Dict[str, Mapping]:
+        m_urls = list(m_urls)
+        entries = self.overlay.get_many(m_urls)
+        deleted = self._deleted
+        entries.update(self.snapshot.get_many(
+            m_url for m_url in m_urls if m_url not in entries and m_url not in deleted
+        ))
+        return entries
+
+    def __iter__(self) -> Iterator[str]:
+        overlay = self.overlay
+        yield from overlay
+        deleted = self._deleted
+        for m_url in self.snapshot:
+            if m_url not in deleted and m_url not in overlay:
+                yield m_url
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def reload(self) -> bool:
+        """Map a newer snapshot file if one was written; local writes are kept."""
+        return self.snapshot.reload()
+
+    def close(self) -> None:
+        self.overlay.close()
+        self.snapshot.close()
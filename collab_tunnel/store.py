@@ -0,0 +1,355 @@
+"""
+Content-addressed payload store for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+The ETag cache only remembers which version of each M-URL was seen. A
+PayloadStore also keeps the payload 'content', keyed by its `sha256-<hex>`
+hash (the sitemap etag / payload 'hash'), so that:
+
+- identical content served under several M-URLs (or by mirrored sites) is
+  stored once
+- a zero-fetch or 304 Not Modified can hand back the stored payload instead
+  of None
+
+Only the hashed 'content' text is shared. The other payload fields
+(canonical_url, title, ...) differ between M-URLs with the same content, so
+the crawler keeps them in each M-URL's cache entry and rebuilds the payload
+from both. Contents are stored compressed (zlib by default, zstd with `pip
+install zstandard`) as UTF-8.
+
+Example usage:
+    store = SQLitePayloadStore(".cache/payloads.sqlite3")
+    crawler = CollabTunnelCrawler(payload_store=store)
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+COMPRESSIONS = ('zlib', 'zstd', 'none')
+
+_KEY_RE = re.compile(r'sha256-[0-9a-f]{64}')
+_HEX_RE = re.compile(r'[0-9a-f]{64}')
+
+
+def content_key(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize an etag, ETag header or payload hash to a store key.
+
+    Args:
+        value: 'sha256-<hex>', '"sha256-<hex>"', W/-prefixed or bare hex
+
+    Returns:
+        'sha256-<64 lowercase hex>', or None if the value is not a sha256 hash
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    value = value.strip('"').lower()
+    if _KEY_RE.fullmatch(value):
+        return value
+    if _HEX_RE.fullmatch(value):
+        return 'sha256-' + value
+    return None
+
+
+class PayloadStore:
+    """
+    Base class for content-addressed payload stores.
+
+    Maps 'sha256-<hex>' -> content bytes. Subclasses implement _read, _write,
+    _delete and _keys on compressed records; compression, deduplication and
+    statistics are handled here.
+    """
+
+    def __init__(self, compression: str = 'zlib', level: Optional[int] = None):
+        """
+        Args:
+            compression: 'zlib', 'zstd' (requires zstandard) or 'none'
+            level: Compression level (codec default if None)
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}")
+        self.compression = compression
+        self.level = level
+        self._zstd = None
+        if compression == 'zstd':
+            self._zstd = _import_zstd()
+        self._counts = {'puts': 0, 'deduplicated': 0, 'hits': 0, 'misses': 0}
+
+    # Backend hooks: records are (codec, raw size, compressed data)
+
+    def _read(self, key: str) -> Optional[Tuple[str, int, bytes]]:
+        raise NotImplementedError
+
+    def _write(self, key: str, codec: str, size: int, data: bytes) -> bool:
+        """Store a record unless the key exists; return True if it was added."""
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _keys(self) -> List[str]:
+        raise NotImplementedError
+
+    def _sizes(self) -> Tuple[int, int, int]:
+        """Return (objects, raw bytes, stored bytes)."""
+        raise NotImplementedError
+
+    def _compress(self, body: bytes) -> Tuple[str, bytes]:
+        if self.compression == 'zlib':
+            data = zlib.compress(body, 6 if self.level is None else self.level)
+        elif self.compression == 'zstd':
+            data = self._zstd.ZstdCompressor(level=3 if self.level is None else self.level).compress(body)
+        else:
+            return 'none', body
+        # Incompressible bodies are kept as-is
+        return (self.compression, data) if len(data) < len(body) else ('none', body)
+
+    def _decompress(self, codec: str, data: bytes) -> bytes:
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        if codec == 'zstd':
+            zstd = self._zstd or _import_zstd()
+            return zstd.ZstdDecompressor().decompress(data)
+        return bytes(data)
+
+    def put(self, key: str, body: bytes) -> bool:
+        """
+        Store a payload body under its hash.
+
+        Bodies already stored under the same hash are not written again.
+
+        Args:
+            key: Payload hash (any form accepted by content_key())
+            body: Bytes to store (the crawler stores the UTF-8 payload 'content')
+
+        Returns:
+            True if the body was added, False if it was already stored
+
+        Raises:
+            ValueError: If key is not a sha256 hash
+        """
+        normalized = content_key(key)
+        if normalized is None:
+            raise ValueError(f"Not a sha256 content hash: {key!r}")
+        self._counts['puts'] += 1
+        if normalized in self:
+            self._counts['deduplicated'] += 1
+            return False
+        codec, data = self._compress(body)
+        added = self._write(normalized, codec, len(body), data)
+        if not added:
+            self._counts['deduplicated'] += 1
+        return added
+
+    def get(self, key: Optional[str]) -> Optional[bytes]:
+        """
+        Return the payload body stored under a hash.
+
+        Args:
+            key: Payload hash (any form accepted by content_key())
+
+        Returns:
+            Payload bytes, or None if not stored
+        """
+        normalized = content_key(key)
+        record = self._read(normalized) if normalized else None
+        if record is None:
+            self._counts['misses'] += 1
+            return None
+        self._counts['hits'] += 1
+        codec, _, data = record
+        return self._decompress(codec, data)
+
+    def __contains__(self, key: object) -> bool:
+        normalized = content_key(key) if isinstance(key, str) else None
+        return normalized is not None and self._read(normalized) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return self._sizes()[0]
+
+    def discard(self, key: str) -> bool:
+        """Remove a payload; return True if it was stored."""
+        normalized = content_key(key)
+        return normalized is not None and self._delete(normalized)
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """
+        Remove every payload whose hash is not in `keep`.
+
+        Example:
+            # Drop bodies no longer referenced by the crawler's cache
+            store.prune(entry.get('contentHash') for entry in crawler.cache.values())
+
+        Args:
+            keep: Hashes still referenced
+
+        Returns:
+            Number of payloads removed
+        """
+        wanted = {content_key(key) for key in keep}
+        removed = 0
+        for key in self._keys():
+            if key not in wanted and self._delete(key):
+                removed += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with stored object count and sizes, compression ratio,
+            and this session's puts, deduplicated puts, hits and misses
+        """
+        objects, raw_bytes, stored_bytes = self._sizes()
+        stats = {
+            'objects': objects,
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'compression_savings_percentage':
+                round((1 - stored_bytes / raw_bytes) * 100, 1) if raw_bytes > 0 else 0,
+        }
+        stats.update(self._counts)
+        return stats
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression requires zstandard: pip install zstandard"
+        ) from None
+    return zstandard
+
+
+class MemoryPayloadStore(PayloadStore):
+    """In-process payload store; payloads are lost when the process exits."""
+
+    def __init__(self, compression: str = 'zlib', level: Optional[int] = None):
+        super().__init__(compression, level)
+        self._records: Dict[str, Tuple[str, int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, key: str) -> Optional[Tuple[str, int, bytes]]:
+        return self._records.get(key)
+
+    def _write(self, key: str, codec: str, size: int, data: bytes) -> bool:
+        with self._lock:
+            if key in self._records:
+                return False
+            self._records[key] = (codec, size, data)
+            return True
+
+    def _delete(self, key: str) -> bool:
+        with self._lock:
+            return self._records.pop(key, None) is not None
+
+    def _keys(self) -> List[str]:
+        return list(self._records)
+
+    def _sizes(self) -> Tuple[int, int, int]:
+        records = list(self._records.values())
+        return (len(records),
+                sum(size for _, size, _ in records),
+                sum(len(data) for _, _, data in records))
+
+
+class SQLitePayloadStore(PayloadStore):
+    """
+    Persistent payload store in a single SQLite file.
+
+    Like SQLiteCache, the database is opened on first access and every
+    write is committed immediately.
+
+    Example usage:
+        store = SQLitePayloadStore(".cache/payloads.sqlite3")
+    """
+
+    def __init__(self, path: str, compression: str = 'zlib', level: Optional[int] = None):
+        """
+        Args:
+            path: Path to the SQLite database file (created if missing)
+            compression: 'zlib', 'zstd' (requires zstandard) or 'none'
+            level: Compression level (codec default if None)
+        """
+        super().__init__(compression, level)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS payloads ('
+                'hash TEXT PRIMARY KEY, codec TEXT NOT NULL, '
+                'size INTEGER NOT NULL, data BLOB NOT NULL)'
+            )
+            self._conn = conn
+        return self._conn
+
+    def _read(self, key: str) -> Optional[Tuple[str, int, bytes]]:
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT codec, size, data FROM payloads WHERE hash = ?', (key,)
+            ).fetchone()
+        return None if row is None else (row[0], row[1], bytes(row[2]))
+
+    def __contains__(self, key: object) -> bool:
+        # Existence check without reading the body
+        normalized = content_key(key) if isinstance(key, str) else None
+        if normalized is None:
+            return False
+        with self._lock:
+            return self._connect().execute(
+                'SELECT 1 FROM payloads WHERE hash = ?', (normalized,)
+            ).fetchone() is not None
+
+    def _write(self, key: str, codec: str, size: int, data: bytes) -> bool:
+        with self._lock:
+            cursor = self._connect().execute(
+                'INSERT OR IGNORE INTO payloads (hash, codec, size, data) VALUES (?, ?, ?, ?)',
+                (key, codec, size, sqlite3.Binary(data))
+            )
+        return cursor.rowcount == 1
+
+    def _delete(self, key: str) -> bool:
+        with self._lock:
+            cursor = self._connect().execute('DELETE FROM payloads WHERE hash = ?', (key,))
+        return cursor.rowcount == 1
+
+    def _keys(self) -> List[str]:
+        with self._lock:
+            rows = self._connect().execute('SELECT hash FROM payloads').fetchall()
+        return [row[0] for row in rows]
+
+    def _sizes(self) -> Tuple[int, int, int]:
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT COUNT(*), TOTAL(size), TOTAL(LENGTH(data)) FROM payloads'
+            ).fetchone()
+        return row[0], int(row[1]), int(row[2])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,355 @@
+"""
+Pooled HTTP transport for the TCT crawler (draft-jurkovikj-collab-tunnel-01)
+
+Conditional requests for unchanged M-URLs return tiny 304 responses, so the
+cost of a crawl is dominated by connection setup. A single transport keeps
+connections alive and reuses them for every sitemap, M-URL and handshake
+request the crawler makes.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# RequestTrace (see instrumentation.py) of the request in progress on this
+# thread, so connection setup deep inside urllib3/httpx can be attributed
+_active = threading.local()
+
+
+def _add_connect_time(seconds: float) -> None:
+    trace = getattr(_active, 'trace', None)
+    if trace is not None:
+        trace.add('connect', seconds)
+
+
+def supported_encodings() -> str:
+    """
+    Accept-Encoding value listing every content coding that can be decoded.
+
+    Always includes gzip and deflate; br and zstd are added by urllib3 when
+    brotli/brotlicffi or zstandard are installed.
+    """
+    try:
+        from urllib3.util.request import ACCEPT_ENCODING
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip,deflate'
+    return ', '.join(coding.strip() for coding in ACCEPT_ENCODING.split(','))
+
+
+def wire_bytes(response) -> Optional[int]:
+    """
+    Number of body bytes received on the wire (before content decoding).
+
+    Only meaningful once the body has been read. Returns None if the backend
+    doesn't expose it.
+    """
+    if isinstance(response, _HTTPXResponse):
+        return response.num_bytes_downloaded
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'tell'):
+        return raw.tell()
+    return None
+
+
+class _Counter:
+    """Thread-safe counter shared by the connection pools of a transport."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections count and time their setup.
+
+    Only public urllib3 extension points are used: the PoolManager's
+    pool_classes_by_scheme, the pools' ConnectionCls and the connections'
+    connect(), which runs once for every newly opened (or re-opened)
+    connection.
+    """
+
+    def __init__(self, counter: _Counter, **kwargs):
+        self._counter = counter
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        counter = self._counter
+        pool_classes = {}
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+            def connect(conn, _base=pool_cls.ConnectionCls):
+                counter.increment()
+                if getattr(_active, 'trace', None) is None:
+                    return _base.connect(conn)
+                start = time.perf_counter()
+                try:
+                    return _base.connect(conn)
+                finally:
+                    _add_connect_time(time.perf_counter() - start)
+
+            connection_cls = type('Counting' + pool_cls.ConnectionCls.__name__,
+                                  (pool_cls.ConnectionCls,), {'connect': connect})
+            pool_classes[scheme] = type('Counting' + pool_cls.__name__, (pool_cls,),
+                                        {'ConnectionCls': connection_cls})
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+
+class _HTTPXResponse:
+    """Adapts an httpx response to the subset of requests.Response the crawler uses."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def json(self, **kwargs) -> Any:
+        self._response.read()
+        return self._response.json(**kwargs)
+
+    def iter_content(self, chunk_size: int = 1, decode_unicode: bool = False) -> Iterator[bytes]:
+        return self._response.iter_bytes(chunk_size)
+
+    @property
+    def num_bytes_downloaded(self) -> int:
+        return self._response.num_bytes_downloaded
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class PooledTransport:
+    """
+    Shared HTTP transport with connection pooling, keep-alive and retries.
+
+    Uses a requests.Session by default. With http2=True it uses an httpx
+    client instead (requires `pip install httpx[http2]`), multiplexing
+    requests to the same host over a single connection.
+
+    Example usage:
+        transport = PooledTransport(pool_maxsize=64, max_retries=5)
+        crawler = CollabTunnelCrawler(transport=transport)
+    """
+
+    def __init__(self,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 keep_alive: bool = True,
+                 max_retries: int = 3,
+                 backoff_factor: float = 0.3,
+                 http2: bool = False,
+                 verify_ssl: bool = True,
+                 accept_encoding: Optional[str] = None):
+        """
+        Args:
+            pool_connections: Number of per-host pools to keep
+            pool_maxsize: Maximum connections kept open per host
+            keep_alive: Reuse connections between requests
+            max_retries: Retries for connection errors and 429/502/503/504
+            backoff_factor: Exponential backoff factor between retries
+            http2: Use HTTP/2 via httpx instead of requests
+            verify_ssl: Whether to verify SSL certificates
+            accept_encoding: Accept-Encoding sent with every request unless
+                the caller sets one (default: supported_encodings();
+                'identity' disables compression)
+        """
+        self.keep_alive = keep_alive
+        self.accept_encoding = accept_encoding or supported_encodings()
+        self.http2 = http2
+        self.verify_ssl = verify_ssl
+        self._requests = _Counter()
+        self._connections = _Counter()
+
+        if http2:
+            self._client = self._build_httpx_client(
+                pool_connections, pool_maxsize, max_retries, verify_ssl
+            )
+            self._session = None
+        else:
+            self._client = None
+            self._session = requests.Session()
+            self._session.verify = verify_ssl
+            retry = Retry(
+                total=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                raise_on_status=False,
+            )
+            adapter = _CountingAdapter(
+                self._connections,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=retry,
+            )
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+
+    def _build_httpx_client(self, pool_connections: int, pool_maxsize: int,
+                            max_retries: int, verify_ssl: bool):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError(
+                "HTTP/2 support requires httpx: pip install 'httpx[http2]'"
+            ) from None
+
+        limits = httpx.Limits(
+            max_connections=pool_connections * pool_maxsize,
+            max_keepalive_connections=pool_connections * pool_maxsize if self.keep_alive else 0,
+        )
+        return httpx.Client(transport=httpx.HTTPTransport(
+            http2=True, verify=verify_ssl, limits=limits, retries=max_retries
+        ))
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == 'connection.connect_tcp.complete':
+            self._connections.increment()
+        if event_name in ('connection.connect_tcp.started', 'connection.start_tls.started'):
+            _active.connect_started = time.perf_counter()
+        elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+            _add_connect_time(time.perf_counter() - _active.connect_started)
+
+    def request(self,
+                method: str,
+                url: str,
+                headers: Optional[Dict[str, str]] = None,
+                timeout: float = 30,
+                stream: bool = False,
+                allow_redirects: bool = True):
+        """
+        Send a request over the pooled connections.
+
+        Returns:
+            requests.Response (or an equivalent wrapper for the HTTP/2 backend)
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        headers = dict(headers or {})
+        if not any(name.lower() == 'accept-encoding' for name in headers):
+            headers['Accept-Encoding'] = self.accept_encoding
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        self._requests.increment()
+
+        if self._session is not None:
+            return self._session.request(
+                method, url, headers=headers, timeout=timeout,
+                stream=stream, allow_redirects=allow_redirects
+            )
+
+        import httpx
+        try:
+            request = self._client.build_request(
+                method, url, headers=headers, timeout=timeout,
+                extensions={'trace': self._trace}
+            )
+            response = self._client.send(request, stream=stream,
+                                         follow_redirects=allow_redirects)
+        except httpx.TimeoutException as exc:
+            raise requests.Timeout(str(exc)) from exc
+        except httpx.HTTPError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+        return _HTTPXResponse(response)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: float = 30, stream: bool = False):
+        """Send a GET request. See request()."""
+        return self.request('GET', url, headers=headers, timeout=timeout, stream=stream)
+
+    def get_body(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 30, chunk_size: int = 65536,
+                 trace=None) -> Tuple[Any, bytearray, int]:
+        """
+        Send a GET request and read the body, decoding it as it streams in.
+
+        Compressed data is decoded chunk by chunk into a single buffer, so
+        neither the compressed nor the decoded body is held twice. The
+        connection is returned to the pool before this returns.
+
+        Args:
+            trace: RequestTrace to record connect / ttfb / body timings in
+
+        Returns:
+            (response, decoded body, bytes received on the wire)
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        if trace is None:
+            response = self.get(url, headers=headers, timeout=timeout, stream=True)
+        else:
+            _active.trace = trace
+            try:
+                response = self.get(url, headers=headers, timeout=timeout, stream=True)
+            finally:
+                _active.trace = None
+            trace.mark('ttfb')
+        try:
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size):
+                body += chunk
+            received = wire_bytes(response)
+        finally:
+            response.close()
+        received = len(body) if received is None else received
+        if trace is not None:
+            trace.mark('body')
+            trace.status = response.status_code
+            trace.wire_bytes = received
+        return response, body, received
+
+    def head(self, url: str, headers: Optional[Dict[str, str]] = None,
+             timeout: float = 30, allow_redirects: bool = False):
+        """Send a HEAD request. See request()."""
+        return self.request('HEAD', url, headers=headers, timeout=timeout,
+                            allow_redirects=allow_redirects)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Get connection reuse statistics.
+
+        Returns:
+            Dictionary with requests sent, connections opened and reused
+        """
+        requests_sent = self._requests.value
+        opened = self._connections.value
+        return {
+            'requests': requests_sent,
+            'connections_opened': opened,
+            'connections_reused': max(requests_sent - opened, 0),
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if self._session is not None:
+            self._session.close()
+        if self._client is not None:
+            self._client.close()
@@ -12,9 +12,246 @@ This produces valid strong ETags per RFC 9110 with deterministic JSON.
 
 import hashlib
 import html
+import os
 import re
+import time
 import unicodedata
-from typing import Dict, Any, List, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from enum import IntFlag
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# Unicode category Cc is exactly U+0000-U+001F and U+007F-U+009F.
+# Normalization removes all of them except TAB, LF, CR.
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]+')
+_ASCII_CONTROL_CHARS = str.maketrans('', '', ''.join(
+    chr(c) for c in list(range(0x20)) + [0x7f] if chr(c) not in '\t\n\r'
+))
+# Runs of ASCII whitespace other than a lone SPACE (which is already collapsed)
+_ASCII_WHITESPACE_RE = re.compile(r' [ \t\n\r]+|[\t\n\r][ \t\n\r]*')
+
+
+class HeaderFlag(IntFlag):
+    """Bits of HeaderCheck.flags, one per check_headers() check."""
+    JSON_CONTENT_TYPE = 1
+    ETAG_PRESENT = 2
+    ETAG_FORMAT = 4
+    ETAG_WEAK = 8
+    CANONICAL_LINK = 16
+    MUST_REVALIDATE = 32
+    STALE_WHILE_REVALIDATE = 64
+    VARY_ACCEPT_ENCODING = 128
+
+
+# Plain ints: IntFlag arithmetic creates a new enum member per operation
+_JSON_CONTENT_TYPE = int(HeaderFlag.JSON_CONTENT_TYPE)
+_ETAG_PRESENT = int(HeaderFlag.ETAG_PRESENT)
+_ETAG_FORMAT = int(HeaderFlag.ETAG_FORMAT)
+_ETAG_WEAK = int(HeaderFlag.ETAG_WEAK)
+_CANONICAL_LINK = int(HeaderFlag.CANONICAL_LINK)
+_MUST_REVALIDATE = int(HeaderFlag.MUST_REVALIDATE)
+_STALE_WHILE_REVALIDATE = int(HeaderFlag.STALE_WHILE_REVALIDATE)
+_VARY_ACCEPT_ENCODING = int(HeaderFlag.VARY_ACCEPT_ENCODING)
+
+# Checks whose failure makes a response non-compliant (the others only warn)
+_REQUIRED_HEADER_FLAGS = _JSON_CONTENT_TYPE | _ETAG_PRESENT | _ETAG_FORMAT | _CANONICAL_LINK
+
+# sha256 entity tag, quoted or bare; a W/ prefix is captured to flag it as weak
+_ETAG_RE = re.compile(r'(W/)?("?)sha256-[0-9a-fA-F]{64}\2')
+# The form TCT servers send; matched first, without groups
+_QUOTED_ETAG_RE = re.compile(r'"sha256-[0-9a-fA-F]{64}"')
+# RFC 9111 Section 5.2: directive = token [ "=" ( token / quoted-string ) ]
+_CACHE_DIRECTIVE_RE = re.compile(
+    r"""\s*([!#$%&'*+.^_`|~0-9A-Za-z-]+)\s*(?:=\s*(?:"(?:[^"\\]|\\.)*"|[^,]*))?\s*(?:,|$)"""
+)
+# RFC 8288 Section 3: link-value = "<" URI-Reference ">" *( OWS ";" OWS link-param )
+_LINK_VALUE_RE = re.compile(
+    r"""<[^>]*>((?:\s*;\s*[^;,="\s]+\s*(?:=\s*(?:"(?:[^"\\]|\\.)*"|[^;,]*))?)*)"""
+)
+_LINK_REL_RE = re.compile(r""";\s*rel\s*=\s*(?:"([^"]*)"|([^;,\s]+))""", re.IGNORECASE)
+
+
+def _content_type_flags(value: str) -> int:
+    media_type = value.split(';', 1)[0].strip().lower()
+    return _JSON_CONTENT_TYPE if media_type == 'application/json' else 0
+
+
+def _cache_control_flags(value: str) -> int:
+    flags = 0
+    for directive in _CACHE_DIRECTIVE_RE.findall(value):
+        directive = directive.lower()
+        if directive == 'must-revalidate':
+            flags |= _MUST_REVALIDATE
+        elif directive == 'stale-while-revalidate':
+            flags |= _STALE_WHILE_REVALIDATE
+    return flags
+
+
+def _vary_flags(value: str) -> int:
+    for field in value.split(','):
+        if field.strip().lower() == 'accept-encoding':
+            return _VARY_ACCEPT_ENCODING
+    return 0
+
+
+# Content-Type, Cache-Control and Vary are usually identical across a site's
+# responses, so they are parsed once per distinct combination
+@lru_cache(maxsize=256)
+def _site_header_flags(content_type: str, cache_control: str, vary: str) -> int:
+    return _content_type_flags(content_type) | _cache_control_flags(cache_control) | _vary_flags(vary)
+
+
+@lru_cache(maxsize=256)
+def _link_params_flags(params: str) -> int:
+    for quoted, bare in _LINK_REL_RE.findall(params):
+        if 'canonical' in (quoted or bare).lower().split():
+            return _CANONICAL_LINK
+    return 0
+
+
+def _link_flags(value: str) -> int:
+    end = value.find('>')
+    if value[0] == '<' and value.find('<', end) < 0:
+        # One link-value: its parameters (not the per-URL target) decide
+        return _link_params_flags(value[end + 1:])
+    for params in _LINK_VALUE_RE.findall(value):
+        if _link_params_flags(params):
+            return _CANONICAL_LINK
+    return 0
+
+
+def _etag_flags(value: str) -> int:
+    match = _ETAG_RE.fullmatch(value.strip())
+    if match is None:
+        return _ETAG_PRESENT | (_ETAG_WEAK if value.lstrip().startswith('W/') else 0)
+    return _ETAG_PRESENT | _ETAG_FORMAT | (_ETAG_WEAK if match.group(1) else 0)
+
+
+class HeaderCheck:
+    """
+    Compact result of a header compliance check.
+
+    Holds only an int of HeaderFlag bits; the verbose dict returned by
+    check_headers() is built by to_dict() on demand. Instances are shared
+    per flag combination, so checking a response allocates no result.
+
+    Example usage:
+        check = check_header_flags(response.headers)
+        if not check:
+            log.warning("non-compliant %s: %s", url, check.errors())
+    """
+
+    __slots__ = ('flags', '_verbose')
+
+    def __init__(self, flags: int):
+        self.flags = flags
+        self._verbose = None
+
+    @property
+    def compliant(self) -> bool:
+        """True if all required checks passed and the ETag is not weak."""
+        flags = self.flags
+        return flags & _REQUIRED_HEADER_FLAGS == _REQUIRED_HEADER_FLAGS and not flags & _ETAG_WEAK
+
+    def __bool__(self) -> bool:
+        return self.compliant
+
+    def __contains__(self, flag: int) -> bool:
+        return self.flags & flag == flag
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, HeaderCheck) and other.flags == self.flags
+
+    def __hash__(self) -> int:
+        return hash(self.flags)
+
+    def __repr__(self) -> str:
+        return f'HeaderCheck({HeaderFlag(self.flags)!r})'
+
+    def errors(self) -> List[str]:
+        """Error messages, in the order check_headers() reports them."""
+        flags = self.flags
+        errors = []
+        if not flags & _JSON_CONTENT_TYPE:
+            errors.append("Content-Type should be application/json")
+        if flags & _ETAG_PRESENT:
+            if flags & _ETAG_WEAK:
+                errors.append(
+                    'Weak ETag not allowed in draft-01. '
+                    'M-URLs MUST use strong ETags per Section 6.2.'
+                )
+            if not flags & _ETAG_FORMAT:
+                errors.append("ETag must be 'sha256-<64hex>' format")
+        else:
+            errors.append("ETag header missing")
+        if not flags & _CANONICAL_LINK:
+            errors.append("Link header missing rel='canonical'")
+        if not flags & _MUST_REVALIDATE:
+            errors.append("Cache-Control should include must-revalidate")
+        if not flags & _VARY_ACCEPT_ENCODING:
+            errors.append("Vary header should include Accept-Encoding")
+        return errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Verbose result, as returned by ContentValidator.check_headers()."""
+        if self._verbose is None:
+            self._verbose = self._build_checks(), self.errors()
+        checks, errors = self._verbose
+        # Fresh containers: callers may modify the result
+        return {'compliant': self.compliant, 'checks': dict(checks), 'errors': list(errors), 'warnings': []}
+
+    def _build_checks(self) -> Dict[str, bool]:
+        flags = self.flags
+        return {
+            'json_content_type': bool(flags & _JSON_CONTENT_TYPE),
+            'etag_present': bool(flags & _ETAG_PRESENT),
+            'etag_format': bool(flags & _ETAG_FORMAT),
+            'etag_weak': bool(flags & _ETAG_WEAK),
+            'canonical_link': bool(flags & _CANONICAL_LINK),
+            'must_revalidate': bool(flags & _MUST_REVALIDATE),
+            'stale_while_revalidate': bool(flags & _STALE_WHILE_REVALIDATE),
+            'vary_accept_encoding': bool(flags & _VARY_ACCEPT_ENCODING),
+        }
+
+
+# One shared (immutable) result per flag combination
+_HEADER_CHECKS = [HeaderCheck(flags) for flags in range(int(max(HeaderFlag)) * 2)]
+
+
+def check_header_flags(headers: Mapping[str, str]) -> HeaderCheck:
+    """
+    Check TCT header compliance without building the verbose result.
+
+    Content-Type, Cache-Control and Vary are tokenized, the ETag must match
+    sha256-<64hex> (quoted or bare) and the Link header is parsed into
+    link-values, so e.g. rel=canonical unquoted or rel="canonical alternate"
+    are recognized and 'x-no-must-revalidate' is not mistaken for
+    must-revalidate.
+
+    Args:
+        headers: Response headers (requests' case-insensitive headers, or a
+            dict with lowercase or original-case names)
+
+    Returns:
+        HeaderCheck
+    """
+    if type(headers) is dict and 'content-type' not in headers:
+        # Plain dict keyed by original-case names ('Content-Type')
+        headers = {name.lower(): value for name, value in headers.items()}
+    get = headers.get
+    content_type = get('content-type')
+    cache_control = get('cache-control')
+    vary = get('vary')
+    etag = get('etag')
+    link = get('link')
+
+    flags = _site_header_flags(content_type or '', cache_control or '', vary or '')
+    if etag:
+        flags |= _ETAG_PRESENT | _ETAG_FORMAT if _QUOTED_ETAG_RE.fullmatch(etag) else _etag_flags(etag)
+    if link:
+        flags |= _link_flags(link)
+    return _HEADER_CHECKS[flags]
 
 
 class ContentValidator:
@@ -42,6 +279,81 @@ class ContentValidator:
         computed_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
         return etag_hex == computed_hash
 
+    @staticmethod
+    def validate_many(pairs: Iterable[Tuple[str, str]],
+                      workers: Optional[int] = None,
+                      use_processes: bool = True,
+                      chunksize: int = 64) -> Iterator[Dict[str, Any]]:
+        """
+        Diagnostic validation of many (etag, content) pairs in parallel.
+
+        Normalization runs in a process pool by default (it holds the GIL);
+        use_processes=False uses threads, which only pays off when content is
+        large and hashing dominates (hashlib releases the GIL). Results are
+        yielded as chunks complete, so order is not preserved; use 'index'.
+
+        Args:
+            pairs: Iterable of (etag, content) tuples
+            workers: Number of workers (defaults to the CPU count)
+            use_processes: Use a process pool instead of a thread pool
+            chunksize: Number of pairs sent to a worker at a time
+
+        Yields:
+            Dictionaries with 'index', 'etag', 'valid', 'computed' and 'seconds'
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = _chunked(enumerate(pairs), chunksize)
+
+        if workers == 1:
+            for chunk in chunks:
+                yield from _validate_chunk(chunk)
+            return
+
+        pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            # Keep a bounded number of chunks in flight so huge inputs stream
+            pending = set()
+            for chunk in islice(chunks, workers * 2):
+                pending.add(pool.submit(_validate_chunk, chunk))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        pending.add(pool.submit(_validate_chunk, chunk))
+                    yield from future.result()
+
+    @staticmethod
+    def validate_batch(pairs: Iterable[Tuple[str, str]],
+                       workers: Optional[int] = None,
+                       use_processes: bool = True,
+                       chunksize: int = 64) -> Dict[str, Any]:
+        """
+        Validate many (etag, content) pairs and aggregate the results.
+
+        See validate_many for the arguments.
+
+        Returns:
+            Dictionary with per-item 'results' (in input order), counts and timing
+        """
+        start = time.perf_counter()
+        results = sorted(
+            ContentValidator.validate_many(pairs, workers, use_processes, chunksize),
+            key=lambda result: result['index']
+        )
+        elapsed = time.perf_counter() - start
+        valid = sum(1 for result in results if result['valid'])
+
+        return {
+            'results': results,
+            'total': len(results),
+            'valid': valid,
+            'invalid': len(results) - valid,
+            'elapsed_seconds': round(elapsed, 3),
+            'cpu_seconds': round(sum(result['seconds'] for result in results), 3),
+            'items_per_second': round(len(results) / elapsed, 1) if elapsed > 0 else 0
+        }
+
     @staticmethod
     def clean_etag(etag: str) -> str:
         """Return ETag's hash as 'sha256-<64hex>' (strip W/ and quotes)."""
@@ -88,11 +400,15 @@ class ContentValidator:
             Normalized text ready for SHA-256 hashing
         """
         text = html.unescape(text)
+        if text.isascii():
+            # ASCII fast path: NFKC is the identity and casefold() equals
+            # lower(). Once control characters are gone, the only whitespace
+            # left is SPACE/TAB/LF/CR, so split/join collapses and trims.
+            return ' '.join(text.lower().translate(_ASCII_CONTROL_CHARS).split())
         text = unicodedata.normalize('NFKC', text)
         text = text.casefold()
-        preserved_cc = {chr(9), chr(10), chr(13)}  # TAB, LF, CR
-        text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Cc' or ch in preserved_cc)
-        text = re.sub(r'[ \t\n\r]+', ' ', text)
+        text = _CONTROL_CHARS_RE.sub('', text)
+        text = _ASCII_WHITESPACE_RE.sub(' ', text)
         return text.strip()
 
 
@@ -101,81 +417,16 @@ class ContentValidator:
         """
         Check TCT protocol compliance of HTTP headers.
 
+        Hot paths should call check_header_flags(), which returns a compact
+        HeaderCheck and builds this dict only on to_dict().
+
         Args:
             headers: Dictionary of HTTP headers
 
         Returns:
             Dictionary with compliance check results
         """
-        results = {
-            'compliant': True,
-            'checks': {},
-            'errors': [],
-            'warnings': []
-        }
-
-        # Check Content-Type
-        content_type = headers.get('content-type', '').lower()
-        results['checks']['json_content_type'] = 'application/json' in content_type
-
-        if not results['checks']['json_content_type']:
-            results['errors'].append("Content-Type should be application/json")
-            results['compliant'] = False
-
-        # Check ETag
-        etag = headers.get('etag', '')
-        results['checks']['etag_present'] = bool(etag)
-        results['checks']['etag_format'] = False
-        results['checks']['etag_weak'] = False
-
-        if etag:
-            # Per draft-01 Section 6.2: ETags MUST be strong (no W/ prefix)
-            if etag.startswith('W/'):
-                results['checks']['etag_weak'] = True
-                results['errors'].append(
-                    'Weak ETag not allowed in draft-01. '
-                    'M-URLs MUST use strong ETags per Section 6.2.'
-                )
-                results['compliant'] = False
-                etag_clean = etag[2:]
-            else:
-                etag_clean = etag
-
-            results['checks']['etag_format'] = (
-                etag_clean.startswith('"sha256-') or
-                etag_clean.startswith('sha256-')
-            )
-            if not results['checks']['etag_format']:
-                results['errors'].append("ETag must be 'sha256-<64hex>' format")
-                results['compliant'] = False
-        else:
-            results['errors'].append("ETag header missing")
-            results['compliant'] = False
-
-        # Check Link canonical
-        link = headers.get('link', '')
-        results['checks']['canonical_link'] = 'rel="canonical"' in link.lower()
-
-        if not results['checks']['canonical_link']:
-            results['errors'].append("Link header missing rel='canonical'")
-            results['compliant'] = False
-
-        # Check Cache-Control
-        cache_control = headers.get('cache-control', '').lower()
-        results['checks']['must_revalidate'] = 'must-revalidate' in cache_control
-        results['checks']['stale_while_revalidate'] = 'stale-while-revalidate' in cache_control
-
-        if not results['checks']['must_revalidate']:
-            results['errors'].append("Cache-Control should include must-revalidate")
-
-        # Check Vary (should be Accept-Encoding, not Accept)
-        vary = headers.get('vary', '').lower()
-        results['checks']['vary_accept_encoding'] = 'accept-encoding' in vary
-
-        if not results['checks']['vary_accept_encoding']:
-            results['errors'].append("Vary header should include Accept-Encoding")
-
-        return results
+        return check_header_flags(headers).to_dict()
 
     @staticmethod
     def validate_sitemap_item(item: Dict[str, Any]) -> Dict[str, Any]:
@@ -237,3 +488,31 @@ class ContentValidator:
                 out['parity'] = False
                 out['mismatches'].append(k)
         return out
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most `size` elements."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _validate_chunk(chunk: List[Tuple[int, Tuple[str, str]]]) -> List[Dict[str, Any]]:
+    """Worker for validate_many; module-level so it can be pickled."""
+    results = []
+    for index, (etag, content) in chunk:
+        start = time.perf_counter()
+        normalized = ContentValidator.normalize_minimal(content)
+        computed = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        expected = ContentValidator.clean_etag(etag).replace('sha256-', '')
+        results.append({
+            'index': index,
+            'etag': etag,
+            'valid': expected == computed,
+            'computed': f'sha256-{computed}',
+            'seconds': time.perf_counter() - start
+        })
+    return results
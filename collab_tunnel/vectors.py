@@ -5,19 +5,10 @@ Generates expected normalized text, sha256 hex, ETag, and contentHash.
 
 from typing import List, Dict
 import hashlib
-import html
-import unicodedata
-import re
-
-
-def normalize_minimal(text: str) -> str:
-    text = html.unescape(text)
-    text = unicodedata.normalize('NFKC', text)
-    text = text.casefold()
-    preserved_cc = {chr(9), chr(10), chr(13)}  # TAB, LF, CR
-    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Cc' or ch in preserved_cc)
-    text = re.sub(r'[ \t\n\r]+', ' ', text)
-    return text.strip()
+
+from .validator import ContentValidator
+
+normalize_minimal = ContentValidator.normalize_minimal
 
 
 def compute(text: str) -> Dict[str, str]:
@@ -41,8 +41,12 @@ setup(
     python_requires=">=3.7",
     install_requires=[
         "requests>=2.25.0",
+        "urllib3>=1.26",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.6",
+        ],
         "dev": [
             "pytest>=6.0",
             "pytest-cov>=2.0",
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# Import collab_tunnel and benchmarks from the checkout, installed or not
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_server import MockTCTServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    with MockTCTServer(items=20, payload_size=500) as mock:
+        yield mock
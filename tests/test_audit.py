@@ -0,0 +1,26 @@
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.audit import ComplianceAuditor
+
+
+def test_report(server):
+    crawler = CollabTunnelCrawler(cache_dir=None)
+    items = crawler.fetch_sitemap(server.sitemap_url).items
+    report = ComplianceAuditor(crawler, max_workers=4, conditional=True).report(items)
+    assert report['audited'] == 20 and report['compliant'] == 20, report['errors']
+
+
+def test_unexpected_errors_are_recorded_per_item(server, monkeypatch):
+    crawler = CollabTunnelCrawler(cache_dir=None)
+    items = crawler.fetch_sitemap(server.sitemap_url).items
+    auditor = ComplianceAuditor(crawler, max_workers=4)
+    check_endpoint = auditor._check_endpoint
+
+    def broken(item, result):
+        if item['mUrl'] == server.m_url(5):
+            raise LookupError('unknown encoding: x-bogus')
+        check_endpoint(item, result)
+
+    monkeypatch.setattr(auditor, '_check_endpoint', broken)
+    report = auditor.report(items)
+    assert report['audited'] == 20 and report['non_compliant'] == 1
+    assert report['errors'] == {'Check failed: LookupError: unknown encoding: x-bogus': 1}
@@ -0,0 +1,66 @@
+import pytest
+
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.cache import MemoryCache, SQLiteCache, default_cache
+from collab_tunnel.records import CacheEntry
+
+ENTRY = {
+    'etag': '"sha256-' + 'ab' * 32 + '"',
+    'contentHash': 'sha256-' + 'ab' * 32,
+    'fetched_at': '2025-10-01T12:00:00',
+    'estimated_size': 1234,
+}
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / 'etags.sqlite3')
+    cache = SQLiteCache(path)
+    cache['https://example.com/a/llm/'] = ENTRY
+    cache['https://example.com/b/llm/'] = CacheEntry(dict(ENTRY, checks=3))
+    assert cache['https://example.com/a/llm/'] == ENTRY
+    assert len(cache) == 2
+    cache.close()
+
+    cache = SQLiteCache(path)
+    assert set(cache) == {'https://example.com/a/llm/', 'https://example.com/b/llm/'}
+    assert cache['https://example.com/b/llm/']['checks'] == 3
+    many = cache.get_many(['https://example.com/a/llm/', 'https://example.com/missing/'])
+    assert many == {'https://example.com/a/llm/': ENTRY}
+    del cache['https://example.com/a/llm/']
+    with pytest.raises(KeyError):
+        cache['https://example.com/a/llm/']
+    with pytest.raises(KeyError):
+        del cache['https://example.com/a/llm/']
+    cache.close()
+
+
+def test_sqlite_get_many_is_chunked(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'etags.sqlite3'))
+    urls = [f'https://example.com/{i}/llm/' for i in range(1200)]
+    for url in urls:
+        cache[url] = ENTRY
+    assert len(cache.get_many(urls)) == 1200
+    cache.close()
+
+
+def test_compact_memory_cache():
+    cache = MemoryCache(compact=True)
+    cache['https://example.com/a/llm/'] = ENTRY
+    entry = cache['https://example.com/a/llm/']
+    assert isinstance(entry, CacheEntry)
+    assert entry == ENTRY
+
+
+def test_default_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    crawler = CollabTunnelCrawler()
+    assert isinstance(crawler.cache, MemoryCache)
+    assert list(tmp_path.iterdir()) == []
+
+    crawler = CollabTunnelCrawler(cache_dir=str(tmp_path / 'cache'), compact=True)
+    crawler.cache['https://example.com/a/llm/'] = ENTRY
+    entry = crawler.cache['https://example.com/a/llm/']
+    assert isinstance(crawler.cache, SQLiteCache) and isinstance(entry, CacheEntry)
+    assert entry == ENTRY
+    assert isinstance(default_cache(str(tmp_path / 'cache')).get('https://example.com/a/llm/'), dict)
+    crawler.close()
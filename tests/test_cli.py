@@ -0,0 +1,60 @@
+import json
+
+from collab_tunnel.cli import main
+
+
+def crawl(server, output, *args, sitemap_url=None):
+    return main(['crawl', sitemap_url or server.sitemap_url, '-o', str(output),
+                 '--cache-dir', str(output.parent / 'cache'), *args])
+
+
+def m_urls(output):
+    with open(output, encoding='utf-8') as fh:
+        return [json.loads(line)['mUrl'] for line in fh]
+
+
+def test_crawl_writes_every_item(server, tmp_path):
+    output = tmp_path / 'crawl.jsonl'
+    assert crawl(server, output) == 0
+    assert sorted(m_urls(output)) == sorted(server.m_url(i) for i in range(20))
+    assert not (tmp_path / 'crawl.jsonl.state').exists()
+    assert not (tmp_path / 'crawl.jsonl.done').exists()
+
+
+def test_resume_drops_uncheckpointed_records(server, tmp_path):
+    output = tmp_path / 'crawl.jsonl'
+    assert crawl(server, output) == 0
+    lines = output.read_bytes().splitlines(keepends=True)
+
+    # Simulate a crash after 5 checkpointed records, one written but not
+    # checkpointed record and a torn last line
+    output.write_bytes(b''.join(lines[:6]) + b'{"mUrl": "torn')
+    offsets = [sum(len(line) for line in lines[:i + 1]) for i in range(5)]
+    (tmp_path / 'crawl.jsonl.done').write_text(''.join(
+        f'fetched\t{offset}\t{json.loads(line)["mUrl"]}\n' for offset, line in zip(offsets, lines)
+    ))
+    (tmp_path / 'crawl.jsonl.state').write_text(json.dumps({
+        'sitemap_url': server.sitemap_url, 'started_at': '2000-01-01T00:00:00', 'output_offset': 0,
+    }))
+
+    assert crawl(server, output) == 0
+    urls = m_urls(output)
+    assert len(urls) == 20 and set(urls) == {server.m_url(i) for i in range(20)}
+
+
+def test_failed_job_keeps_earlier_output(server, tmp_path, capsys):
+    output = tmp_path / 'crawl.jsonl'
+    assert crawl(server, output) == 0
+    before = output.read_bytes()
+
+    # A new job whose sitemap fails before its first record is checkpointed,
+    # then run again: the earlier crawl's records must survive both runs
+    missing = server.base_url + '/missing-sitemap.json'
+    assert crawl(server, output, sitemap_url=missing) == 1
+    assert 'cannot load' in capsys.readouterr().err
+    assert crawl(server, output, sitemap_url=missing) == 1
+    assert output.read_bytes() == before
+
+    # The next good job appends after them (unchanged items are zero-fetched)
+    assert crawl(server, output) == 0
+    assert output.read_bytes().startswith(before)
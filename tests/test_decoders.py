@@ -0,0 +1,49 @@
+import json
+import pickle
+
+import pytest
+
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.decoders import JSONDecoder, Payload, available_decoders, get_decoder
+
+PAYLOAD = {
+    'profile': 'tct-1',
+    'canonical_url': 'https://example.com/post/',
+    'title': 'Example',
+    'content': 'Text — café',
+    'hash': 'sha256-' + '0' * 64,
+}
+
+
+def test_stdlib_is_the_default():
+    assert type(get_decoder()) is JSONDecoder
+    assert type(CollabTunnelCrawler(cache_dir=None).decoder) is JSONDecoder
+    # Input only the stdlib accepts keeps working by default
+    assert get_decoder().loads(b'{"n": NaN, "big": 18446744073709551616}')['big'] == 2 ** 64
+    assert get_decoder('auto').name in available_decoders()
+    with pytest.raises(ValueError):
+        get_decoder('yaml')
+
+
+@pytest.mark.parametrize('name', sorted(available_decoders()))
+def test_backends_agree(name):
+    decoder = get_decoder(name)
+    body = json.dumps(PAYLOAD, ensure_ascii=False).encode('utf-8')
+    assert decoder.loads(body) == PAYLOAD
+    payload = decoder.decode_payload(body)
+    assert payload.to_dict() == PAYLOAD
+    assert payload['title'] == 'Example' and payload.get('missing', 1) == 1
+    assert decoder.payload_from_dict(PAYLOAD).to_dict() == PAYLOAD
+    assert pickle.loads(pickle.dumps(payload)).to_dict() == PAYLOAD
+
+
+@pytest.mark.parametrize('name', sorted(available_decoders()))
+def test_typed_payloads_validate_field_types(name):
+    decoder = get_decoder(name)
+    with pytest.raises(ValueError):
+        decoder.decode_payload(json.dumps(dict(PAYLOAD, title=42)).encode('utf-8'))
+    with pytest.raises(ValueError):
+        decoder.payload_from_dict(dict(PAYLOAD, content=['a']))
+    assert decoder.decode_payload(b'{"title": null}').get('title', '') == ''
+    with pytest.raises(ValueError):
+        Payload.from_dict([])
@@ -0,0 +1,50 @@
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.cache import SQLiteCache
+from collab_tunnel.handshake import HandshakeAuditor, has_alternate_link, has_canonical_link
+
+
+def test_links():
+    head = "<head><LINK href='llm/' rel='Alternate' type=application/json></head>"
+    assert has_alternate_link(head, 'https://example.com/post/', 'https://example.com/post/llm/')
+    assert not has_alternate_link(head, 'https://example.com/other/', 'https://example.com/post/llm/')
+    link = '<https://example.com/post/>; rel="canonical"'
+    assert has_canonical_link(link, 'https://example.com/post/llm/', 'https://example.com/post/')
+    assert not has_canonical_link('', 'https://example.com/post/llm/', 'https://example.com/post/')
+
+
+def test_report_and_cached_results(server, tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'etags.sqlite3'))
+    crawler = CollabTunnelCrawler(cache=cache)
+    items = crawler.fetch_sitemap(server.sitemap_url).items
+    auditor = HandshakeAuditor(crawler, max_workers=4)
+
+    report = auditor.report(items)
+    assert report['checked'] == report['valid'] == 20 and report['cached'] == 0
+    assert all(0 < result['bytes_read'] < 1000 for result in report['results'])
+
+    # Unchanged etags: every result comes from the results table, not the ETag cache
+    requests = crawler.transport.connection_stats()
+    assert auditor.report(items)['cached'] == 20
+    assert crawler.transport.connection_stats() == requests
+    assert len(cache) == 0 and len(auditor.results) == 20
+    crawler.close()
+
+
+def test_unexpected_errors_are_recorded_per_pair(server, monkeypatch):
+    crawler = CollabTunnelCrawler(cache_dir=None)
+    items = crawler.fetch_sitemap(server.sitemap_url).items
+    auditor = HandshakeAuditor(crawler, max_workers=4)
+    read_head = auditor._read_head
+
+    def broken(c_url):
+        if c_url == server.c_url(3):
+            raise LookupError('unknown encoding: x-bogus')
+        return read_head(c_url)
+
+    monkeypatch.setattr(auditor, '_read_head', broken)
+    report = auditor.report(items)
+    assert report['checked'] == 20 and report['invalid'] == 1
+    assert report['errors'] == {'c_url_LookupError': 1}
+    # Not cached: the next audit checks the pair again
+    monkeypatch.setattr(auditor, '_read_head', read_head)
+    assert auditor.check(server.c_url(3), server.m_url(3), items[3]['etag'])['valid']
@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.normalize import edge_cases, generate, reference_normalize, vector_inputs
+from collab_tunnel import ContentValidator
+
+
+@pytest.mark.parametrize('sample', vector_inputs() + edge_cases())
+def test_matches_reference(sample):
+    assert ContentValidator.normalize_minimal(sample) == reference_normalize(sample)
+
+
+@pytest.mark.parametrize('ascii_only', [True, False])
+def test_matches_reference_on_payloads(ascii_only):
+    text = generate(20000, ascii_only=ascii_only)
+    assert ContentValidator.normalize_minimal(text) == reference_normalize(text)
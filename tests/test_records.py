@@ -0,0 +1,64 @@
+import pickle
+
+import pytest
+
+from collab_tunnel.records import CacheEntry, SitemapItem, digest_from_etag, etags_match
+
+HASH = 'sha256-' + '0123456789abcdef' * 4
+
+ITEM = {
+    'cUrl': 'https://example.com/post/',
+    'mUrl': 'https://example.com/post/llm/',
+    'etag': HASH,
+    'modified': '2025-10-01T12:34:56Z',
+    'estimatedSize': 4200,
+}
+
+
+@pytest.mark.parametrize('item', [
+    ITEM,
+    {'cUrl': 'https://example.com/post/', 'mUrl': 'https://example.com/post/llm/'},
+    # Values that do not round-trip through the compact form are kept as-is
+    dict(ITEM, etag=HASH.upper().replace('SHA256', 'sha256')),
+    dict(ITEM, modified='2025-10-01T12:34:56.5Z'),
+    dict(ITEM, estimatedSize='large', extra={'nested': [1, 2]}),
+])
+def test_sitemap_item_round_trip(item):
+    record = SitemapItem(item)
+    assert dict(record) == item
+    assert record == item
+    assert pickle.loads(pickle.dumps(record)) == item
+
+
+def test_sitemap_item_is_compact():
+    record = SitemapItem(ITEM)
+    assert record.etag == bytes.fromhex(HASH[7:])
+    assert isinstance(record.modified, int)
+    assert record.extra is None
+
+
+def test_cache_entry_round_trip():
+    entry = {
+        'etag': f'"{HASH}"', 'contentHash': HASH, 'fetched_at': '2025-10-01T12:00:00',
+        'estimated_size': 10, 'first_checked': 1, 'checks': 2, 'changes': 1,
+        'last_checked': 3, 'last_changed': 3,
+    }
+    record = CacheEntry(entry)
+    assert dict(record) == entry
+    assert record.extra is None
+    assert CacheEntry(dict(entry, fetched_at='2025-10-01T12:00:00.123456')) == \
+        dict(entry, fetched_at='2025-10-01T12:00:00.123456')
+
+
+def test_from_slots():
+    record = SitemapItem(ITEM)
+    copy = SitemapItem.from_slots([getattr(record, name) for name in SitemapItem.__slots__])
+    assert copy == ITEM
+
+
+def test_etags_match():
+    assert etags_match(SitemapItem(ITEM), CacheEntry({'etag': f'"{HASH}"'})) is True
+    assert etags_match(SitemapItem(ITEM), CacheEntry({'etag': '"sha256-' + '0' * 64 + '"'})) is False
+    assert etags_match(ITEM, {'etag': f'"{HASH}"'}) is None
+    assert digest_from_etag(f'"{HASH}"') == digest_from_etag(HASH)
+
@@ -0,0 +1,84 @@
+import pytest
+
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.cache import MemoryCache, SQLiteCache, companion_cache
+from collab_tunnel.revalidation import AdaptiveRevalidator, ChangeModel, record_check
+from collab_tunnel.sitemap import SitemapParser
+
+HASH = 'sha256-' + 'ab' * 32
+OTHER = 'sha256-' + 'cd' * 32
+NOW = 1760000000
+DAY = 86400
+
+ITEM = {
+    'cUrl': 'https://example.com/post/',
+    'mUrl': 'https://example.com/post/llm/',
+    'etag': HASH,
+    'modified': '2025-01-01T00:00:00Z',
+}
+
+
+def revalidator(entry=None):
+    crawler = CollabTunnelCrawler(cache_dir=None)
+    if entry is not None:
+        crawler.cache[ITEM['mUrl']] = entry
+    return AdaptiveRevalidator(crawler, ChangeModel(min_interval=600, max_interval=7 * DAY))
+
+
+def test_record_check():
+    entry = record_check({}, changed=True, now=100)
+    assert entry == {'first_checked': 100, 'checks': 0, 'changes': 0, 'last_checked': 100}
+    record_check(entry, changed=True, now=200)
+    record_check(entry, changed=False, now=300)
+    assert entry['checks'] == 2 and entry['changes'] == 1 and entry['last_changed'] == 200
+
+
+def test_unchanged_items_get_a_safety_revalidation():
+    entry = {'etag': f'"{HASH}"', 'first_checked': NOW - 30 * DAY, 'checks': 30,
+             'changes': 0, 'last_checked': NOW - 60}
+    subject = revalidator(entry)
+    # Matching etag: zero-fetched until the schedule says a change is likely
+    assert subject.due_items([ITEM], now=NOW) == []
+    assert subject.crawler.stats['zero_fetches'] == 1
+    due_at = subject.next_revalidation(ITEM, now=NOW)
+    assert NOW < due_at <= NOW - 60 + 7 * DAY
+    assert subject.due_items([ITEM], now=due_at) == [ITEM]
+    # A changed etag or an unknown item is due at once
+    assert subject.due_items([dict(ITEM, etag=OTHER)], now=NOW) == [dict(ITEM, etag=OTHER)]
+    assert revalidator().due_items([ITEM], now=NOW) == [ITEM]
+
+
+def test_frequent_changes_shorten_the_interval():
+    calm = {'etag': f'"{HASH}"', 'first_checked': NOW - 30 * DAY, 'checks': 30,
+            'changes': 0, 'last_checked': NOW}
+    busy = dict(calm, changes=25)
+    item = dict(ITEM, modified='2025-10-08T00:00:00Z')
+    assert revalidator(busy).next_revalidation(item, NOW) < revalidator(calm).next_revalidation(item, NOW)
+
+
+def test_sitemap_history_is_kept_apart_from_the_cache(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'etags.sqlite3'))
+    subject = AdaptiveRevalidator(CollabTunnelCrawler(cache=cache))
+    url = 'https://example.com/llm-sitemap.json'
+    sitemap = SitemapParser({'version': 1, 'items': [dict(ITEM)]})
+    assert subject.observe_sitemap(url, sitemap, now=NOW) is False
+    assert subject.next_sitemap_poll(url, now=NOW) > NOW
+    changed = SitemapParser({'version': 1, 'items': [dict(ITEM, etag=OTHER)]})
+    assert subject.observe_sitemap(url, changed, now=NOW + DAY) is True
+    assert len(cache) == 0 and list(subject.history) == [url]
+    assert subject.history[url]['changes'] == 1
+    cache.close()
+
+
+def test_companion_tables_are_separate(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'etags.sqlite3'))
+    history = companion_cache(cache, 'sitemap_history')
+    cache['https://example.com/a/llm/'] = {'etag': f'"{HASH}"'}
+    history['https://example.com/llm-sitemap.json'] = {'checks': 1}
+    assert list(cache) == ['https://example.com/a/llm/']
+    assert list(history) == ['https://example.com/llm-sitemap.json']
+    assert isinstance(companion_cache(MemoryCache(), 'sitemap_history'), MemoryCache)
+    with pytest.raises(ValueError):
+        SQLiteCache(str(tmp_path / 'x.sqlite3'), table='entries; DROP TABLE entries')
+    history.close()
+    cache.close()
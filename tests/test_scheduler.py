@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import requests
+
+from benchmarks.mock_server import MockTCTServer
+from collab_tunnel.async_crawler import AsyncCollabTunnelCrawler
+from collab_tunnel.scheduler import CrawlScheduler, default_priority
+
+HASH = 'sha256-' + 'a' * 64
+OTHER = 'sha256-' + 'b' * 64
+
+
+def run(scheduler, sitemap_urls):
+    async def collect():
+        results = []
+        async with scheduler:
+            async for item, content in scheduler.run(sitemap_urls):
+                results.append((time.monotonic(), item, content))
+        return results
+    return asyncio.run(collect())
+
+
+def test_run_crawls_every_item(server):
+    scheduler = CrawlScheduler(crawler=AsyncCollabTunnelCrawler(cache_dir=None), rate_per_host=None)
+    results = run(scheduler, [server.sitemap_url])
+    assert sorted(item['mUrl'] for _, item, _ in results) == sorted(server.m_url(i) for i in range(20))
+    assert all(content is not None for _, _, content in results)
+    stats = scheduler.get_stats()
+    assert stats['sitemaps'] == 1 and stats['errors'] == 0
+
+
+def test_slow_sitemap_does_not_stall_other_hosts(server):
+    with MockTCTServer(items=2, payload_size=500, latency=1.0) as slow:
+        scheduler = CrawlScheduler(crawler=AsyncCollabTunnelCrawler(cache_dir=None), rate_per_host=None)
+        started = time.monotonic()
+        results = run(scheduler, [slow.sitemap_url, server.sitemap_url])
+    assert len(results) == 22
+    # The fast host's items arrive while the slow sitemap is still loading
+    first_fast = min(at for at, item, _ in results if item['mUrl'].startswith(server.base_url))
+    assert first_fast - started < 0.9
+
+
+def test_default_priority_puts_known_changes_first():
+    item = {'mUrl': 'https://example.com/a/llm/', 'etag': HASH, 'modified': '2025-01-01T00:00:00Z'}
+    newer = dict(item, modified='2025-06-01T00:00:00Z')
+    changed = default_priority(item, {'etag': f'"{OTHER}"'})
+    uncached = default_priority(item, None)
+    unverifiable = default_priority({'mUrl': item['mUrl'], 'modified': newer['modified']}, {'etag': '"x"'})
+    assert changed[0] and uncached[0] and not unverifiable[0]
+    # A known change outranks a newer item that can only be revalidated
+    assert sorted([unverifiable, changed], reverse=True)[0] == changed
+    assert not default_priority(item, {'etag': f'"{HASH}"'})[0]
+
+
+def flaky(crawler, failures):
+    """Make fetch_content raise the queued exceptions of an M-URL before succeeding."""
+    fetch_content = crawler.fetch_content
+    calls = {}
+
+    async def fetch(m_url, expected_etag=None):
+        calls[m_url] = calls.get(m_url, 0) + 1
+        if failures.get(m_url):
+            raise failures[m_url].pop(0)
+        return await fetch_content(m_url, expected_etag)
+    crawler.fetch_content = fetch
+    return calls
+
+
+def test_transient_failures_are_retried_after_backoff(server):
+    crawler = AsyncCollabTunnelCrawler(cache_dir=None)
+    not_found = requests.Response()
+    not_found.status_code = 404
+    calls = flaky(crawler, {
+        server.m_url(0): [requests.ConnectionError('reset')],
+        server.m_url(1): [requests.Timeout('slow')] * 5,
+        server.m_url(2): [requests.HTTPError('404', response=not_found)],
+    })
+    scheduler = CrawlScheduler(crawler=crawler, rate_per_host=None, backoff=0.01, max_retries=2)
+    results = run_with_exceptions(scheduler, [server.sitemap_url])
+
+    by_url = {item['mUrl']: content for item, content in results}
+    assert len(results) == 20                          # each item reported once
+    assert isinstance(by_url[server.m_url(0)], dict)   # retried, then fetched
+    assert isinstance(by_url[server.m_url(1)], requests.Timeout)
+    assert isinstance(by_url[server.m_url(2)], requests.HTTPError)
+    assert calls[server.m_url(0)] == 2 and calls[server.m_url(1)] == 3 and calls[server.m_url(2)] == 1
+    stats = scheduler.get_stats()
+    assert stats['retried'] == 3 and stats['errors'] == 2
+
+
+def test_add_items_uses_plan_entries(server):
+    crawler = AsyncCollabTunnelCrawler(cache_dir=None)
+    seen = {}
+
+    def priority(item, cached):
+        seen[item['mUrl']] = cached
+        return 0
+    scheduler = CrawlScheduler(crawler=crawler, priority=priority)
+    items = [{'mUrl': f'{server.base_url}/{i}/llm/', 'etag': HASH} for i in range(3)]
+    crawler.cache[items[0]['mUrl']] = {'etag': f'"{OTHER}"'}
+    crawler.cache.get = None                           # add_items must not query the cache per item
+    assert scheduler.add_items(items) == 3
+    assert seen[items[0]['mUrl']] == {'etag': f'"{OTHER}"'}
+    assert seen[items[1]['mUrl']] is None and seen[items[2]['mUrl']] is None
+
+
+def run_with_exceptions(scheduler, sitemap_urls):
+    async def collect():
+        async with scheduler:
+            return [result async for result in scheduler.run(sitemap_urls, return_exceptions=True)]
+    return asyncio.run(collect())
@@ -0,0 +1,19 @@
+from collab_tunnel.records import SitemapItem
+from collab_tunnel.sitemap import SitemapParser
+
+HASH = 'sha256-' + '0123456789abcdef' * 4
+
+ITEM = {
+    'cUrl': 'https://example.com/post/',
+    'mUrl': 'https://example.com/post/llm/',
+    'etag': HASH,
+    'modified': '2025-10-01T12:34:56Z',
+}
+
+
+def test_compact_parser_leaves_input_untouched():
+    data = {'version': 1, 'profile': 'tct-1', 'items': [dict(ITEM)]}
+    items = data['items']
+    parser = SitemapParser(data, compact=True)
+    assert data['items'] is items and type(items[0]) is dict
+    assert isinstance(parser.items[0], SitemapItem)
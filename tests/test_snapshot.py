@@ -0,0 +1,100 @@
+import pytest
+
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.cache import MemoryCache
+from collab_tunnel.records import CacheEntry, SitemapItem
+from collab_tunnel.sitemap import SitemapParser
+from collab_tunnel.snapshot import (CacheSnapshot, SitemapSnapshot, SnapshotCache,
+                                    write_cache_snapshot, write_sitemap_snapshot)
+
+
+def make_items(count):
+    items = []
+    for index in range(count):
+        items.append({
+            'cUrl': f'https://example.com/post/{index}/',
+            'mUrl': f'https://example.com/post/{index}/llm/',
+            'etag': 'sha256-{:064x}'.format(index),
+            'modified': '2025-10-01T12:00:00Z',
+            'estimatedSize': 1000 + index,
+        })
+    items[3]['note'] = 'kept in extras'
+    items[4]['estimatedSize'] = 2 ** 70          # outside int64
+    items[5]['etag'] = 'sha256-not-a-digest'
+    items[6]['cUrl'] = items[2]['cUrl']          # duplicate: first occurrence wins
+    return items
+
+
+@pytest.fixture
+def items():
+    return make_items(200)
+
+
+def test_sitemap_round_trip(tmp_path, items):
+    path = str(tmp_path / 'sitemap.snap')
+    parser = SitemapParser({'version': 1, 'profile': 'tct-1', 'items': [dict(item) for item in items]})
+    assert write_sitemap_snapshot(path, parser) == len(items)
+
+    with SitemapSnapshot(path) as snapshot:
+        assert len(snapshot) == snapshot.count == len(items)
+        assert snapshot.version == 1 and snapshot.profile == 'tct-1'
+        assert [dict(item) for item in snapshot] == items
+        assert all(type(item) is SitemapItem for item in snapshot)
+        assert snapshot[-1] == items[-1] and snapshot[10:12] == items[10:12]
+        assert snapshot.find_by_mobile_url(items[150]['mUrl']) == items[150]
+        assert snapshot.find_by_canonical(items[2]['cUrl']) == items[2]
+        assert snapshot.find_by_mobile_url('https://example.com/missing/') is None
+        assert snapshot.snapshot() == parser.snapshot()
+        assert len(snapshot.diff(parser).unchanged) == len(items)
+
+
+def test_cache_snapshot_and_overlay(tmp_path, items):
+    cache = MemoryCache(compact=True)
+    for item in items:
+        cache[item['mUrl']] = {'etag': f'"{item["etag"]}"', 'estimated_size': 10, 'checks': 1}
+    path = str(tmp_path / 'etags.snap')
+    write_cache_snapshot(path, cache)
+
+    snapshot = CacheSnapshot(path)
+    assert len(snapshot) == len(items)
+    assert dict(snapshot.items()) == dict(cache.items())
+    assert isinstance(snapshot[items[0]['mUrl']], CacheEntry)
+
+    overlay = SnapshotCache(snapshot)
+    plan = CollabTunnelCrawler(cache=overlay).plan(items)
+    assert len(plan.skip) == len(items)
+
+    m_url = items[0]['mUrl']
+    overlay[m_url] = {'etag': '"sha256-' + '0' * 64 + '"'}
+    assert overlay[m_url]['etag'] == '"sha256-' + '0' * 64 + '"'
+    assert snapshot[m_url]['etag'] == f'"{items[0]["etag"]}"'
+    del overlay[m_url]
+    assert m_url not in overlay and len(overlay) == len(items) - 1
+    overlay['https://example.com/new/llm/'] = {'etag': '"x"'}
+    assert len(overlay) == len(items)
+    overlay.close()
+
+
+def test_atomic_replace_and_reload(tmp_path, items):
+    path = str(tmp_path / 'sitemap.snap')
+    write_sitemap_snapshot(path, items)
+    snapshot = SitemapSnapshot(path)
+    write_sitemap_snapshot(path, items[:10])
+
+    # The open mapping still sees the old file until reload()
+    assert len(snapshot) == len(items)
+    assert snapshot.reload() is True
+    assert len(snapshot) == 10
+    assert snapshot.reload() is False
+    assert not [name for name in tmp_path.iterdir() if name.suffix == '.tmp']
+    snapshot.close()
+
+
+def test_rejects_other_files(tmp_path, items):
+    path = tmp_path / 'bad.snap'
+    path.write_bytes(b'x' * 100)
+    with pytest.raises(ValueError):
+        SitemapSnapshot(str(path))
+    write_cache_snapshot(str(path), {})
+    with pytest.raises(ValueError):
+        SitemapSnapshot(str(path))
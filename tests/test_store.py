@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks.mock_server import MockTCTServer
+from collab_tunnel import CollabTunnelCrawler
+from collab_tunnel.store import MemoryPayloadStore, SQLitePayloadStore, content_key
+
+HASH = 'sha256-' + 'ab' * 32
+
+
+class SharedContentServer(MockTCTServer):
+    """Every M-URL serves the same content under its own canonical_url/title."""
+
+    def _content(self, index, version):
+        return super()._content(0, version)
+
+
+class TrackingStore(MemoryPayloadStore):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('typed_payloads', [False, True])
+def test_shared_hash_keeps_per_url_fields(typed_payloads):
+    store = TrackingStore()
+    with SharedContentServer(items=3, payload_size=500) as server:
+        crawler = CollabTunnelCrawler(cache_dir=None, payload_store=store, typed_payloads=typed_payloads)
+        sitemap = crawler.fetch_sitemap(server.sitemap_url)
+        assert len({item['etag'] for item in sitemap.items}) == 1
+        fetched = dict((item['mUrl'], content) for item, content in crawler.crawl(sitemap.items))
+
+        # One stored content for all three M-URLs
+        assert len(store) == 1 and store.get_stats()['deduplicated'] == 2
+
+        def check(m_url, payload):
+            index = int(m_url.rstrip('/').split('/')[-2])
+            assert payload['canonical_url'] == server.c_url(index)
+            assert payload['title'] == f'Item {index}'
+            assert payload == fetched[m_url]
+
+        for m_url in fetched:
+            check(m_url, crawler.load_content(m_url))
+            check(m_url, crawler.fetch_content(m_url))           # 304 from the server
+        unchanged = list(crawler.crawl(sitemap.items, include_unchanged=True))
+        assert len(unchanged) == 3
+        for item, payload in unchanged:
+            check(item['mUrl'], payload)
+        crawler.close()
+    assert not store.closed
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = SQLitePayloadStore(str(tmp_path / 'payloads.sqlite3'))
+    assert store.put(f'"{HASH}"', b'x' * 1000) is True
+    assert store.put(HASH.upper().replace('SHA256', 'sha256'), b'x' * 1000) is False
+    store.close()
+
+    store = SQLitePayloadStore(str(tmp_path / 'payloads.sqlite3'))
+    assert store.get(HASH) == b'x' * 1000
+    assert HASH in store and list(store) == [HASH]
+    assert store.get_stats()['stored_bytes'] < 1000
+    assert store.prune([]) == 1 and len(store) == 0
+    with pytest.raises(ValueError):
+        store.put('not-a-hash', b'')
+    store.close()
+
+
+def test_content_key():
+    assert content_key(f'W/"{HASH}"') == HASH
+    assert content_key(HASH[7:]) == HASH
+    assert content_key('md5-abc') is None
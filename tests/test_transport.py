@@ -0,0 +1,15 @@
+import pytest
+
+from collab_tunnel.transport import PooledTransport
+
+
+@pytest.mark.parametrize('keep_alive, opened', [(True, 1), (False, 10)])
+def test_connection_stats(server, keep_alive, opened):
+    transport = PooledTransport(keep_alive=keep_alive)
+    for index in range(10):
+        response, body, received = transport.get_body(server.m_url(index))
+        assert response.status_code == 200 and received > 0
+    assert transport.connection_stats() == {
+        'requests': 10, 'connections_opened': opened, 'connections_reused': 10 - opened,
+    }
+    transport.close()